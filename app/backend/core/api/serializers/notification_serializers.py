@@ -1,15 +1,49 @@
 from rest_framework import serializers
-from core.models import Notification, NotificationType
+from core.models import Notification, NotificationType, ArchivedNotification, RegisteredUser, Task
 from .user_serializers import UserSerializer
 from .task_serializers import TaskSerializer
 
 
+class NotificationUserSummarySerializer(serializers.ModelSerializer):
+    """Compact serializer for the recipient of a notification"""
+    class Meta:
+        model = RegisteredUser
+        fields = ['id', 'username', 'email', 'name', 'surname']
+        read_only_fields = fields
+
+
+class NotificationTaskSummarySerializer(serializers.ModelSerializer):
+    """Compact serializer for the task a notification refers to"""
+    creator = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Task
+        fields = ['id', 'title', 'status', 'category', 'creator']
+        read_only_fields = fields
+    
+    def get_creator(self, obj):
+        """Get the ID and username of the task creator"""
+        return {'id': obj.creator_id, 'username': obj.creator.username}
+
+
 class NotificationSerializer(serializers.ModelSerializer):
-    """Serializer for Notification model"""
-    user = UserSerializer(read_only=True)
-    related_task = TaskSerializer(read_only=True)
+    """
+    Serializer for Notification model
+    
+    The recipient and related task are summarized by default. The context
+    may name nested fields to serialize in full (`expand`, e.g.
+    ['related_task']) and restrict the output to some fields (`fields`).
+    """
+    user = NotificationUserSummarySerializer(read_only=True)
+    related_task = NotificationTaskSummarySerializer(read_only=True)
     type_display = serializers.SerializerMethodField()
     
+    # Full serializers used for expanded nested fields
+    EXPANDABLE_FIELDS = {
+        'user': UserSerializer,
+        'related_task': TaskSerializer,
+    }
+    
     class Meta:
         model = Notification
         fields = ['id', 'content', 'timestamp', 'type', 'type_display', 
@@ -17,11 +51,33 @@ class NotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'content', 'timestamp', 'type', 
                            'type_display', 'user', 'related_task']
     
+    def __init__(self, *args, **kwargs):
+        """Apply the `expand` and `fields` selections from the context"""
+        super().__init__(*args, **kwargs)
+        
+        for field_name in self.context.get('expand', ()):
+            if field_name in self.EXPANDABLE_FIELDS:
+                self.fields[field_name] = self.EXPANDABLE_FIELDS[field_name](read_only=True)
+        
+        selected = self.context.get('fields')
+        if selected:
+            for field_name in set(self.fields) - set(selected):
+                self.fields.pop(field_name)
+    
     def get_type_display(self, obj):
         """Get the display name for the notification type"""
         return dict(NotificationType.choices)[obj.type]
 
 
+class ArchivedNotificationSerializer(NotificationSerializer):
+    """Serializer for archived notifications, with the same `expand` and `fields` options"""
+    class Meta:
+        model = ArchivedNotification
+        fields = ['id', 'content', 'timestamp', 'type', 'type_display',
+                 'is_read', 'user', 'related_task', 'archived_at']
+        read_only_fields = fields
+
+
 class NotificationCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating a new notification"""
     user_id = serializers.IntegerField(write_only=True)
@@ -82,11 +138,8 @@ class NotificationUpdateSerializer(serializers.ModelSerializer):
     
     def update(self, instance, validated_data):
         """Update notification read status"""
-        if 'is_read' in validated_data and validated_data['is_read']:
-            instance.mark_as_read()
-        else:
-            instance.is_read = validated_data.get('is_read', instance.is_read)
-            instance.save()
+        if 'is_read' in validated_data:
+            instance.set_is_read(validated_data['is_read'])
         
         return instance
 
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from core.models import Photo
+from core.services.image_service import ImageService
 from .task_serializers import TaskSerializer
 from typing import Optional
 import logging
@@ -14,12 +15,13 @@ class PhotoSerializer(serializers.ModelSerializer):
     photo_url = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
     alt_text = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Photo
         # Keep backward-compatibility by exposing multiple keys for the image URL
-        fields = ['id', 'url', 'photo_url', 'image', 'uploaded_at', 'alt_text', 'task']
-        read_only_fields = ['id', 'uploaded_at', 'alt_text', 'task']
+        fields = ['id', 'url', 'photo_url', 'image', 'variants', 'status', 'uploaded_at', 'alt_text', 'task']
+        read_only_fields = ['id', 'uploaded_at', 'alt_text', 'variants', 'status', 'task']
 
     def _absolute(self, url: Optional[str]) -> Optional[str]:
         """Convert relative URL to absolute URL"""
@@ -67,6 +69,10 @@ class PhotoSerializer(serializers.ModelSerializer):
         # Alias used by some components as a generic image field
         return self.get_url(obj)
 
+    def get_variants(self, obj: Photo) -> dict:
+        """Get the absolute URLs and dimensions of the resized variants"""
+        return ImageService.get_variant_urls(obj.variants, self.context.get('request'))
+
     def get_alt_text(self, obj: Photo) -> str:
         # Provide a helpful default alt text for accessibility
         task_title = getattr(obj.task, 'title', None)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from core.models import Task, TaskCategory, TaskStatus
+from core.services.image_service import ImageService
 from django.utils import timezone
 from .user_serializers import UserSerializer
 from core.utils import mask_address, mask_phone_number
@@ -12,16 +13,20 @@ class TaskSerializer(serializers.ModelSerializer):
     location = serializers.SerializerMethodField()
     status_display = serializers.SerializerMethodField()
     category_display = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
     primary_photo_url = serializers.SerializerMethodField()
+    primary_photo_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Task
         fields = ['id', 'title', 'description', 'category', 'category_display',
                   'location', 'deadline', 'requirements', 'urgency_level', 
                   'volunteer_number', 'status', 'status_display', 'is_recurring',
-                  'creator', 'assignee', 'created_at', 'updated_at', 'primary_photo_url']
+                  'creator', 'assignee', 'created_at', 'updated_at', 'primary_photo_url',
+                  'primary_photo_variants', 'distance_km']
         read_only_fields = ['id', 'created_at', 'updated_at', 'status_display',
-                           'category_display', 'creator', 'assignee', 'location']
+                           'category_display', 'creator', 'assignee', 'location',
+                           'primary_photo_variants', 'distance_km']
     
     def _is_user_authorized(self, task, user):
         """
@@ -36,28 +41,34 @@ class TaskSerializer(serializers.ModelSerializer):
             return True
         if hasattr(user, 'is_superuser') and user.is_superuser:
             return True
-            
-        return user == task.creator or user == task.assignee or user in task.assignees.all()
+        
+        # Compare ids so prefetched assignees are used and no related rows are fetched
+        if user.pk in (task.creator_id, task.assignee_id):
+            return True
+        return any(assignee.pk == user.pk for assignee in task.assignees.all())
+    
+    def _is_request_user_authorized(self, task):
+        """Authorization of the requesting user for a task, computed once per task"""
+        cache = self.__dict__.setdefault('_authorization_cache', {})
+        if task.pk not in cache:
+            request = self.context.get('request')
+            user = request.user if request else None
+            cache[task.pk] = self._is_user_authorized(task, user)
+        return cache[task.pk]
     
     def get_location(self, obj):
         """Get location with masking for unauthorized users"""
-        request = self.context.get('request')
-        user = request.user if request else None
-        
-        if self._is_user_authorized(obj, user):
+        if self._is_request_user_authorized(obj):
             return obj.location
         else:
             return mask_address(obj.location)
     
     def get_creator(self, obj):
         """Get creator with phone number masking for unauthorized users"""
-        request = self.context.get('request')
-        user = request.user if request else None
-        
         creator_data = UserSerializer(obj.creator, context=self.context).data
         
         # Mask phone number if user is not authorized
-        if not self._is_user_authorized(obj, user):
+        if not self._is_request_user_authorized(obj):
             if 'phone_number' in creator_data:
                 creator_data['phone_number'] = mask_phone_number(creator_data['phone_number'])
         
@@ -65,16 +76,13 @@ class TaskSerializer(serializers.ModelSerializer):
     
     def get_assignee(self, obj):
         """Get assignee with phone number masking for unauthorized users"""
-        if not obj.assignee:
+        if not obj.assignee_id:
             return None
-            
-        request = self.context.get('request')
-        user = request.user if request else None
         
         assignee_data = UserSerializer(obj.assignee, context=self.context).data
         
         # Mask phone number if user is not authorized
-        if not self._is_user_authorized(obj, user):
+        if not self._is_request_user_authorized(obj):
             if 'phone_number' in assignee_data:
                 assignee_data['phone_number'] = mask_phone_number(assignee_data['phone_number'])
         
@@ -87,9 +95,33 @@ class TaskSerializer(serializers.ModelSerializer):
     def get_category_display(self, obj):
         """Get the display name for the category"""
         return dict(TaskCategory.choices)[obj.category]
+    
+    def get_distance_km(self, obj):
+        """Get the distance from a `near` search point, if one was given"""
+        distance_km = getattr(obj, 'distance_km', None)
+        return round(distance_km, 2) if distance_km is not None else None
+
+    def _get_primary_photo(self, obj: Task):
+        # Read from the prefetch cache when the queryset was built with
+        # Task.objects.with_serializer_relations(); fall back to a query otherwise
+        prefetched = getattr(obj, '_prefetched_objects_cache', {})
+        if 'photos' in prefetched:
+            photos = prefetched['photos']
+            return photos[0] if photos else None
+        # Cache the lookup so the URL and variants share one query
+        if not hasattr(obj, '_primary_photo'):
+            obj._primary_photo = obj.photos.order_by('id').first()
+        return obj._primary_photo
+
+    def get_primary_photo_variants(self, obj: Task):
+        """Get the resized variants of the first photo, keyed by variant name"""
+        photo = self._get_primary_photo(obj)
+        if not photo:
+            return {}
+        return ImageService.get_variant_urls(photo.variants, self.context.get('request'))
 
     def get_primary_photo_url(self, obj: Task):
-        photo = getattr(obj, 'photos', None).first() if hasattr(obj, 'photos') else None
+        photo = self._get_primary_photo(obj)
         if not photo or not photo.url:
             return None
         try:
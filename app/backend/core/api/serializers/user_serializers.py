@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from core.models import RegisteredUser, Administrator
+from core.services.image_service import ImageService
 from django.contrib.auth.password_validation import validate_password
 from core.utils import password_meets_requirements, validate_phone_number
 
@@ -7,6 +8,7 @@ from core.utils import password_meets_requirements, validate_phone_number
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the RegisteredUser model"""
     profile_photo = serializers.SerializerMethodField()
+    profile_photo_variants = serializers.SerializerMethodField()
     followers_count = serializers.SerializerMethodField()
     following_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
@@ -21,10 +23,11 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'surname', 'username', 'email', 
                  'phone_number', 'location', 'rating', 
                  'completed_task_count', 'is_active', 'profile_photo',
-                 'followers_count', 'following_count', 'is_following',
-                 'badges', 'badges_count']
+                 'profile_photo_variants', 'profile_photo_status', 'followers_count',
+                 'following_count', 'is_following', 'badges', 'badges_count']
         read_only_fields = ['id', 'rating', 'completed_task_count', 'is_active', 
-                          'profile_photo', 'followers_count', 'following_count', 
+                          'profile_photo', 'profile_photo_variants', 'profile_photo_status',
+                          'followers_count', 'following_count', 
                           'is_following', 'badges', 'badges_count']
     
     def get_name(self, obj):
@@ -51,18 +54,32 @@ class UserSerializer(serializers.ModelSerializer):
             return obj.profile_photo.url
         return None
     
+    def get_profile_photo_variants(self, obj):
+        """Get the URLs and dimensions of the resized profile photo variants"""
+        # Hidden like the photo itself if user is banned
+        if not obj.is_active or not obj.profile_photo:
+            return {}
+        return ImageService.get_variant_urls(obj.profile_photo_variants, self.context.get('request'))
+    
     def get_followers_count(self, obj):
         """Get the number of followers"""
+        # Use the annotation from RegisteredUser.objects.with_profile_stats() when present
+        if hasattr(obj, 'followers_count'):
+            return obj.followers_count
         return obj.followers_set.count()
     
     def get_following_count(self, obj):
         """Get the number of users this user is following"""
+        if hasattr(obj, 'following_count'):
+            return obj.following_count
         return obj.following_set.count()
     
     def get_is_following(self, obj):
         """Check if the current user is following this user"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'viewer_is_following'):
+                return obj.viewer_is_following
             from core.models import UserFollows
             return UserFollows.objects.filter(
                 follower=request.user, 
@@ -73,11 +90,18 @@ class UserSerializer(serializers.ModelSerializer):
     def get_badges(self, obj):
         """Get user's badges"""
         from core.api.serializers.badge_serializers import UserBadgeSimpleSerializer
-        badges = obj.earned_badges.select_related('badge').all()[:10]  # Limit to 10 most recent
+        from core.models.user import UserQuerySet
+        limit = UserQuerySet.PROFILE_BADGE_LIMIT
+        if hasattr(obj, 'profile_badges'):
+            badges = obj.profile_badges[:limit]
+        else:
+            badges = obj.earned_badges.select_related('badge').all()[:limit]  # Limit to 10 most recent
         return UserBadgeSimpleSerializer(badges, many=True).data
     
     def get_badges_count(self, obj):
         """Get total number of badges earned"""
+        if hasattr(obj, 'badges_count'):
+            return obj.badges_count
         return obj.earned_badges.count()
 
 
@@ -8,7 +8,7 @@ from core.api.serializers.bookmark_serializers import (
     BookmarkSerializer, BookmarkCreateSerializer, BookmarkUpdateSerializer
 )
 from core.permissions import IsOwner
-from core.utils import format_response, paginate_results
+from core.utils import format_response, paginate_request
 
 
 class BookmarkViewSet(viewsets.ModelViewSet):
@@ -47,12 +47,10 @@ class BookmarkViewSet(viewsets.ModelViewSet):
         else:
             bookmarks = self.get_queryset()
         
-        # Get page and limit parameters
-        page = int(request.query_params.get('page', 1))
-        limit = int(request.query_params.get('limit', 20))
-        
-        # Paginate results
-        paginated = paginate_results(bookmarks.order_by('-timestamp'), page=page, items_per_page=limit)
+        # Paginate results (page/limit, or cursor for keyset paging)
+        paginated = paginate_request(
+            request, bookmarks.order_by('-timestamp'), cursor_ordering=('-timestamp', '-id')
+        )
         
         # Serialize bookmarks
         serializer = self.get_serializer(paginated['data'], many=True)
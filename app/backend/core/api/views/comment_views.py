@@ -1,13 +1,14 @@
 from rest_framework import viewsets, permissions, status, views
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch
 
-from core.models import Comment, Task
+from core.models import Comment, Task, RegisteredUser
 from core.api.serializers.comment_serializers import (
     CommentSerializer, CommentCreateSerializer, CommentUpdateSerializer
 )
 from core.permissions import IsOwner
-from core.utils import format_response, paginate_results
+from core.utils import format_response, paginate_request
 
 
 class CommentViewSet(viewsets.ModelViewSet):
@@ -86,14 +87,13 @@ class TaskCommentsView(views.APIView):
         task = get_object_or_404(Task, id=task_id)
         
         # Get comments
-        comments = Comment.objects.filter(task=task).order_by('timestamp')
+        comments = Comment.objects.filter(task=task).prefetch_related(
+            Prefetch('user', queryset=RegisteredUser.objects.with_profile_stats()),
+            Prefetch('task', queryset=Task.objects.with_serializer_relations()),
+        ).order_by('timestamp')
         
-        # Get page and limit parameters
-        page = int(request.query_params.get('page', 1))
-        limit = int(request.query_params.get('limit', 20))
-        
-        # Paginate results
-        paginated = paginate_results(comments, page=page, items_per_page=limit)
+        # Paginate results (page/limit, or cursor for keyset paging)
+        paginated = paginate_request(request, comments, cursor_ordering=('timestamp', 'id'))
         
         # Serialize comments
         serializer = CommentSerializer(paginated['data'], many=True)
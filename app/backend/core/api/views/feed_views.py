@@ -0,0 +1,31 @@
+from rest_framework import views, permissions
+from rest_framework.response import Response
+
+from core.models import Feed
+from core.api.serializers.task_serializers import TaskSerializer
+from core.utils import format_response
+
+
+class FeedView(views.APIView):
+    """View for the current user's personalized, ranked task feed"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        """Handle GET requests to retrieve a page of the feed"""
+        # Get page and limit parameters
+        page = int(request.query_params.get('page', 1))
+        limit = int(request.query_params.get('limit', 20))
+        
+        # Ranking is cached per user; a warm page only loads its own tasks
+        paginated = Feed(request.user).load_ranked_feed(page=page, items_per_page=limit)
+        
+        # Serialize tasks
+        serializer = TaskSerializer(paginated['data'], many=True, context={'request': request})
+        
+        return Response(format_response(
+            status='success',
+            data={
+                'tasks': serializer.data,
+                'pagination': paginated['pagination']
+            }
+        ))
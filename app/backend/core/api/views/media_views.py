@@ -0,0 +1,177 @@
+import mimetypes
+import os
+from stat import S_ISREG
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from core.storage import ContentAddressedStorage
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range lies outside the file"""
+
+
+class FileRange:
+    """Read-only view of `length` bytes of an open file, starting where it is positioned"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def get_byte_range(header, size):
+    """
+    Parse a single `Range: bytes=...` header
+
+    Multiple ranges and malformed headers are ignored, as HTTP allows.
+
+    Returns:
+        (first byte, last byte) inclusive, or None to send the whole file
+
+    Raises:
+        RangeNotSatisfiable: if the range starts past the end of the file
+    """
+    unit, _, ranges = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in ranges:
+        return None
+    start, separator, end = ranges.strip().partition('-')
+    if not separator or not (start or end) or not all(part.isdigit() for part in (start, end) if part):
+        return None
+
+    if not start:
+        # Suffix range: the last `end` bytes
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    end = min(int(end), size - 1) if end else size - 1
+    return start, end
+
+
+def get_etag(path, file_stat):
+    """
+    Strong ETag of a media file
+
+    Content-addressed files use their digest; other files their inode,
+    size and modification time, which change whenever the file does.
+    """
+    digest = ContentAddressedStorage.get_digest(path)
+    if digest is not None:
+        return f'"{digest}"'
+    return f'"{file_stat.st_ino:x}-{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}"'
+
+
+def get_offload_headers(path, full_path):
+    """
+    Headers handing the transfer to the reverse proxy, per settings.MEDIA_SENDFILE_BACKEND
+
+    Returns:
+        dict of headers, or None to send the file from Python
+    """
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    if backend == 'x-accel-redirect':
+        return {'X-Accel-Redirect': settings.MEDIA_ACCEL_REDIRECT_PREFIX + path}
+    if backend == 'x-sendfile':
+        return {'X-Sendfile': full_path}
+    return None
+
+
+def build_file_response(request, path, full_path, size, etag, last_modified):
+    """Response carrying the file, the requested byte range of it, or an offload header"""
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    offload_headers = get_offload_headers(path, full_path)
+    if offload_headers is not None:
+        # The proxy answers Range requests itself
+        response = HttpResponse(content_type=content_type)
+        for header, value in offload_headers.items():
+            response[header] = value
+        return response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    # A stale If-Range validator asks for the whole, changed file
+    if range_header and (not if_range or if_range == etag or parse_http_date_safe(if_range) == last_modified):
+        try:
+            byte_range = get_byte_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    elif byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        file = open(full_path, 'rb')
+        file.seek(start)
+        response = FileResponse(FileRange(file, length), content_type=content_type)
+
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['X-Content-Type-Options'] = 'nosniff'
+    if byte_range is not None:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT
+
+    Responses carry a strong ETag and Last-Modified, so repeat loads are
+    answered with 304 Not Modified, and single byte ranges are honoured.
+    With MEDIA_SENDFILE_BACKEND set, the reverse proxy sends the bytes
+    (X-Accel-Redirect or X-Sendfile); otherwise FileResponse streams them,
+    using the server's sendfile support where it has one.
+    Content-addressed files never change and are cached as immutable.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('File not found.')
+    if not S_ISREG(file_stat.st_mode):
+        raise Http404('File not found.')
+
+    etag = get_etag(path, file_stat)
+    last_modified = int(file_stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build_file_response(request, path, full_path, file_stat.st_size, etag, last_modified)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if ContentAddressedStorage.get_digest(path) is not None:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_BLOB_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
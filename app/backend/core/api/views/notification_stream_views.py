@@ -0,0 +1,205 @@
+"""
+Server-Sent Events stream of new notifications.
+Served by the ASGI application (neighborhood_assistance_board/asgi.py), which
+routes settings.NOTIFICATION_STREAM_PATH here and everything else to Django.
+"""
+import asyncio
+import functools
+import json
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.authtoken.models import Token
+
+from core.models import Notification, RegisteredUser
+from core.services.notification_broker import NotificationBroker
+from core.utils import format_response
+
+
+def get_event_data(notification):
+    """Flat representation of a notification sent on the stream"""
+    return {
+        'id': notification.id,
+        'content': notification.content,
+        'timestamp': notification.timestamp.isoformat(),
+        'type': notification.type,
+        'type_display': notification.get_type_display(),
+        'is_read': notification.is_read,
+        'related_task_id': notification.related_task_id,
+    }
+
+
+def format_event(event, data, event_id=None):
+    """Encode one Server-Sent Event"""
+    lines = [] if event_id is None else [f'id: {event_id}']
+    lines += [f'event: {event}', f'data: {json.dumps(data)}']
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def recycles_connections(func):
+    """
+    Drop stale or broken database connections before and after `func`
+
+    Streams bypass Django's request handler, which would otherwise do this
+    on request_started and request_finished, so CONN_MAX_AGE and failed
+    connections are honoured for the stream's database work too.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+@recycles_connections
+def get_user_for_token(key):
+    """Return the active user owning an auth token, or None"""
+    token = Token.objects.select_related('user').filter(key=key, user__is_active=True).first()
+    return token.user if token else None
+
+
+@recycles_connections
+def get_notification_events(user_id, notification_ids=None, after_id=None):
+    """
+    Load a user's notifications as encoded events, followed by the unread count
+
+    Args:
+        user_id: ID of the recipient
+        notification_ids: Notifications published to the user
+        after_id: Or, notifications newer than this ID (replay after reconnect)
+
+    Returns:
+        (list of encoded events, ID of the last notification sent or None)
+    """
+    notifications = []
+    if notification_ids is not None:
+        notifications = Notification.objects.filter(user_id=user_id, id__in=notification_ids).order_by('id')
+    elif after_id is not None:
+        notifications = Notification.objects.filter(
+            user_id=user_id, id__gt=after_id
+        ).order_by('id')[:settings.NOTIFICATION_STREAM_REPLAY_LIMIT]
+    notifications = list(notifications)
+
+    events = [
+        format_event('notification', get_event_data(notification), event_id=notification.id)
+        for notification in notifications
+    ]
+    unread_count = RegisteredUser.objects.values_list(
+        'unread_notification_count', flat=True
+    ).get(id=user_id)
+    events.append(format_event('unread_count', {'unread_count': unread_count}))
+
+    return events, notifications[-1].id if notifications else None
+
+
+class NotificationStreamApplication:
+    """
+    ASGI application streaming a user's new notifications
+
+    GET settings.NOTIFICATION_STREAM_PATH with `Authorization: Token <key>`
+    (or `?token=<key>`, as EventSource cannot set headers) opens a
+    text/event-stream response. It starts with the unread count, then sends
+    a `notification` event for each notification published to the user,
+    followed by the updated unread count. A client reconnecting with
+    Last-Event-ID first receives the notifications it missed. Other
+    requests are passed to `app`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != settings.NOTIFICATION_STREAM_PATH:
+            return await self.app(scope, receive, send)
+
+        if scope['method'] != 'GET':
+            return await self.send_error(send, 405, 'Method not allowed.')
+
+        headers = {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope['headers']}
+        query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+
+        key = query.get('token', [''])[0]
+        scheme, _, header_key = headers.get('authorization', '').partition(' ')
+        if scheme.lower() == 'token' and header_key:
+            key = header_key.strip()
+        user = await sync_to_async(get_user_for_token)(key) if key else None
+        if user is None:
+            return await self.send_error(send, 401, 'Authentication credentials were not provided or are invalid.')
+
+        last_event_id = headers.get('last-event-id') or query.get('last_event_id', [''])[0]
+        after_id = int(last_event_id) if last_event_id.isdigit() else None
+
+        await self.stream(user, after_id, receive, send)
+
+    async def send_error(self, send, status_code, message):
+        """Answer with a JSON error response"""
+        await send({
+            'type': 'http.response.start',
+            'status': status_code,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': json.dumps(format_response(status='error', message=message)).encode(),
+        })
+
+    async def wait_for_disconnect(self, receive):
+        """Return once the client has disconnected"""
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def send_events(self, send, events):
+        """Write encoded events to the response"""
+        await send({'type': 'http.response.body', 'body': b''.join(events), 'more_body': True})
+
+    async def stream(self, user, after_id, receive, send):
+        """Send events until the client disconnects"""
+        # Subscribe before replaying so nothing published meanwhile is lost
+        subscription = NotificationBroker.subscribe(user.id)
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        published = None
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    # Stop reverse proxies from buffering the stream
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+
+            events, last_id = await sync_to_async(get_notification_events)(user.id, after_id=after_id)
+            last_id = last_id or after_id or 0
+            await self.send_events(send, [f'retry: {settings.NOTIFICATION_STREAM_HEARTBEAT * 1000}\n\n'.encode()] + events)
+
+            while True:
+                if published is None:
+                    published = asyncio.ensure_future(subscription.get_batch())
+                done, _ = await asyncio.wait(
+                    {published, disconnected},
+                    timeout=settings.NOTIFICATION_STREAM_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnected in done:
+                    break
+                if published not in done:
+                    await self.send_events(send, [b': keep-alive\n\n'])
+                    continue
+
+                # Skip notifications the replay already sent
+                notification_ids = [notification_id for notification_id in published.result() if notification_id > last_id]
+                published = None
+                if notification_ids:
+                    events, _ = await sync_to_async(get_notification_events)(user.id, notification_ids=notification_ids)
+                    await self.send_events(send, events)
+        finally:
+            subscription.close()
+            for future in (published, disconnected):
+                if future is not None:
+                    future.cancel()
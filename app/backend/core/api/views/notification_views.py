@@ -2,14 +2,16 @@ from rest_framework import viewsets, permissions, status, views
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 
-from core.models import Notification
+from core.models import Notification, ArchivedNotification, RegisteredUser
 from core.api.serializers.notification_serializers import (
     NotificationSerializer, NotificationCreateSerializer, NotificationUpdateSerializer,
-    AdminWarningSerializer
+    AdminWarningSerializer, ArchivedNotificationSerializer
 )
 from core.permissions import IsOwner
-from core.utils import format_response, paginate_results
+from core.utils import format_response, paginate_request
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -28,8 +30,22 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated()]
     
     def get_queryset(self):
-        """Return user's notifications"""
-        return Notification.objects.filter(user=self.request.user)
+        """Return user's notifications, joined with what the compact serializer shows"""
+        return Notification.objects.filter(user=self.request.user).select_related(
+            'user', 'related_task__creator'
+        )
+    
+    def get_serializer_context(self):
+        """
+        Pass the comma-separated `fields` and `expand` query parameters to
+        the serializer, e.g. ?expand=related_task&fields=id,content,related_task
+        """
+        context = super().get_serializer_context()
+        for param in ('fields', 'expand'):
+            value = self.request.query_params.get(param)
+            if value:
+                context[param] = [name.strip() for name in value.split(',') if name.strip()]
+        return context
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -39,6 +55,12 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return NotificationUpdateSerializer
         return NotificationSerializer
     
+    def get_unread_count(self):
+        """Read the user's unread notification counter (one primary key lookup)"""
+        return RegisteredUser.objects.values_list(
+            'unread_notification_count', flat=True
+        ).get(id=self.request.user.id)
+    
     def create(self, request, *args, **kwargs):
         """Handle POST requests to create a notification"""
         # Check if user has admin permission
@@ -71,12 +93,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
         else:
             notifications = self.get_queryset()
         
-        # Get page and limit parameters
-        page = int(request.query_params.get('page', 1))
-        limit = int(request.query_params.get('limit', 20))
-        
-        # Paginate results
-        paginated = paginate_results(notifications.order_by('-timestamp'), page=page, items_per_page=limit)
+        # Paginate results (page/limit, or cursor for keyset paging)
+        paginated = paginate_request(
+            request, notifications.order_by('-timestamp'), cursor_ordering=('-timestamp', '-id')
+        )
         
         # Serialize notifications
         serializer = self.get_serializer(paginated['data'], many=True)
@@ -86,7 +106,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
             data={
                 'notifications': serializer.data,
                 'pagination': paginated['pagination'],
-                'unread_count': self.get_queryset().filter(is_read=False).count()
+                'unread_count': self.get_unread_count()
             }
         ))
     
@@ -123,18 +143,64 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'], url_path='mark-all-read')
     def mark_all_as_read(self, request):
         """Custom action to mark all notifications as read"""
-        # Get unread notifications
-        unread_notifications = self.get_queryset().filter(is_read=False)
+        marked_count = Notification.mark_all_as_read(request.user)
         
-        # Mark all as read
-        for notification in unread_notifications:
-            notification.mark_as_read()
+        return Response(format_response(
+            status='success',
+            message=f'{marked_count} notifications marked as read.'
+        ))
+    
+    @action(detail=False, methods=['get'], url_path='archive')
+    def archive(self, request):
+        """
+        List the user's archived notifications, newest first
+        
+        Read notifications older than the retention period are moved here
+        by `manage.py archive_notifications`. Supports the same paging,
+        `fields` and `expand` parameters as the list.
+        """
+        notifications = ArchivedNotification.objects.filter(user=request.user).select_related(
+            'user', 'related_task__creator'
+        ).order_by('-timestamp')
+        
+        paginated = paginate_request(request, notifications, cursor_ordering=('-timestamp', '-id'))
+        serializer = ArchivedNotificationSerializer(
+            paginated['data'], many=True, context=self.get_serializer_context()
+        )
         
         return Response(format_response(
             status='success',
-            message=f'{unread_notifications.count()} notifications marked as read.'
+            data={
+                'notifications': serializer.data,
+                'pagination': paginated['pagination']
+            }
         ))
     
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        """
+        Return the number of unread notifications
+        
+        Responses carry an ETag derived from the count, so polling clients
+        sending If-None-Match get 304 Not Modified until it changes.
+        """
+        unread_count = self.get_unread_count()
+        etag = f'"unread-{request.user.id}-{unread_count}"'
+        
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(format_response(
+                status='success',
+                data={'unread_count': unread_count}
+            ))
+        
+        response['ETag'] = etag
+        # Clients must revalidate, and shared caches must not serve another user's count
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
     @action(detail=False, methods=['post'], url_path='send-warning', permission_classes=[permissions.IsAuthenticated])
     def send_warning(self, request):
         """
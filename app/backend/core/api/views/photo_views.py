@@ -1,12 +1,12 @@
 from rest_framework import viewsets, permissions, status, views
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import FormParser
 from django.shortcuts import get_object_or_404
-from django.conf import settings
 
-from core.models import Photo, Task
+from core.models import Photo, Task, MediaStatus
 from core.api.serializers.photo_serializers import PhotoSerializer, PhotoCreateSerializer
 from core.permissions import IsTaskCreator
+from core.upload_handlers import PhotoMultiPartParser, PhotoUploadHandler
 from core.utils import format_response
 
 
@@ -14,7 +14,7 @@ class PhotoViewSet(viewsets.ModelViewSet):
     """ViewSet for managing photos"""
     queryset = Photo.objects.all()
     serializer_class = PhotoSerializer
-    parser_classes = (MultiPartParser, FormParser)
+    parser_classes = (PhotoMultiPartParser, FormParser)
     
     def get_permissions(self):
         """
@@ -28,17 +28,26 @@ class PhotoViewSet(viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         """Handle POST requests to upload a photo"""
+        upload_error = PhotoUploadHandler.get_error(request)
+        if upload_error:
+            status_code, message = upload_error
+            return Response(format_response(
+                status='error',
+                message=message
+            ), status=status_code)
+        
         serializer = PhotoCreateSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         photo = serializer.save()
         
-        # Return response with the created photo
+        # Return response with the created photo; 202 while its variants are queued
         response_serializer = PhotoSerializer(photo, context={'request': request})
+        pending = photo.status == MediaStatus.PENDING
         return Response(format_response(
             status='success',
             message='Photo uploaded successfully.',
             data=response_serializer.data
-        ), status=status.HTTP_201_CREATED)
+        ), status=status.HTTP_202_ACCEPTED if pending else status.HTTP_201_CREATED)
     
     def destroy(self, request, *args, **kwargs):
         """Handle DELETE requests to delete a photo"""
@@ -56,7 +65,7 @@ class PhotoViewSet(viewsets.ModelViewSet):
 class TaskPhotoView(views.APIView):
     """View for managing photos for a specific task"""
     permission_classes = [permissions.IsAuthenticated]
-    parser_classes = (MultiPartParser, FormParser)
+    parser_classes = (PhotoMultiPartParser, FormParser)
     
     def get(self, request, task_id):
         """Handle GET requests to retrieve photos for a task"""
@@ -89,6 +98,15 @@ class TaskPhotoView(views.APIView):
                 message='Only the task creator can upload photos.'
             ), status=status.HTTP_403_FORBIDDEN)
         
+        # Type and size are checked while the file streams in
+        upload_error = PhotoUploadHandler.get_error(request)
+        if upload_error:
+            status_code, message = upload_error
+            return Response(format_response(
+                status='error',
+                message=message
+            ), status=status_code)
+        
         # Check if photo file is provided
         if 'photo' not in request.FILES:
             return Response(format_response(
@@ -96,26 +114,7 @@ class TaskPhotoView(views.APIView):
                 message='No photo file provided.'
             ), status=status.HTTP_400_BAD_REQUEST)
         
-        # Validate file type and size
         image_file = request.FILES.get('photo')
-        content_type = getattr(image_file, 'content_type', '') or ''
-        if not content_type.startswith('image/'):
-            return Response(format_response(
-                status='error',
-                message='Unsupported media type. Only image uploads are allowed.'
-            ), status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
-
-        try:
-            max_mb = int(getattr(settings, 'MAX_PHOTO_UPLOAD_MB', 10))
-        except Exception:
-            max_mb = 10
-        max_bytes = max_mb * 1024 * 1024
-        size = getattr(image_file, 'size', None)
-        if isinstance(size, int) and size > max_bytes:
-            return Response(format_response(
-                status='error',
-                message=f'File too large. Maximum allowed size is {max_mb}MB.'
-            ), status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
 
         # Upload photo
         try:
@@ -124,9 +123,10 @@ class TaskPhotoView(views.APIView):
                 image_file=image_file
             )
             
-            # Return response with the created photo
+            # Return response with the created photo; 202 while its variants are queued
             serializer = PhotoSerializer(photo, context={'request': request})
             absolute_url = request.build_absolute_uri(photo.get_url())
+            pending = photo.status == MediaStatus.PENDING
             return Response(format_response(
                 status='success',
                 message='Photo attached successfully.',
@@ -134,9 +134,10 @@ class TaskPhotoView(views.APIView):
                     'task_id': task.id,
                     'photo_id': photo.id,
                     'photo_url': absolute_url,
+                    'status': photo.status,
                     'uploaded_at': photo.uploaded_at.isoformat()
                 }
-            ), status=status.HTTP_201_CREATED)
+            ), status=status.HTTP_202_ACCEPTED if pending else status.HTTP_201_CREATED)
         except Exception as e:
             return Response(format_response(
                 status='error',
@@ -1,13 +1,14 @@
 from rest_framework import viewsets, permissions, status, views
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch
 
 from core.models import Review, Task, RegisteredUser
 from core.api.serializers.review_serializers import (
     ReviewSerializer, ReviewCreateSerializer, ReviewUpdateSerializer
 )
 from core.permissions import IsOwner
-from core.utils import format_response, paginate_results
+from core.utils import format_response, paginate_request, paginate_results
 
 
 class ReviewViewSet(viewsets.ModelViewSet):
@@ -195,7 +196,10 @@ class UserReviewsView(views.APIView):
         user = get_object_or_404(RegisteredUser, id=user_id)
         
         # Get reviews received by the user
-        reviews = Review.objects.filter(reviewee=user)
+        reviews = Review.objects.filter(reviewee=user).prefetch_related(
+            Prefetch('reviewer', queryset=RegisteredUser.objects.with_profile_stats()),
+            Prefetch('reviewee', queryset=RegisteredUser.objects.with_profile_stats()),
+        )
         
         # Get role filter parameter
         role = request.query_params.get('role', None)
@@ -210,10 +214,6 @@ class UserReviewsView(views.APIView):
                 # This includes cases where user was assignee or volunteer
                 reviews = reviews.exclude(task__creator=user)
         
-        # Get page and limit parameters
-        page = int(request.query_params.get('page', 1))
-        limit = int(request.query_params.get('limit', 20))
-        
         # Check if sorting requested
         sort = request.query_params.get('sort', 'createdAt')
         order = request.query_params.get('order', 'desc')
@@ -230,8 +230,12 @@ class UserReviewsView(views.APIView):
             else:
                 reviews = reviews.order_by('score')
         
-        # Paginate results
-        paginated = paginate_results(reviews, page=page, items_per_page=limit)
+        # Paginate results (page/limit, or cursor for keyset paging on the same sort)
+        sort_field = 'score' if sort == 'score' else 'timestamp'
+        prefix = '-' if order == 'desc' else ''
+        paginated = paginate_request(
+            request, reviews, cursor_ordering=(f'{prefix}{sort_field}', f'{prefix}id')
+        )
         
         # Serialize reviews
         serializer = ReviewSerializer(paginated['data'], many=True)
@@ -1,16 +1,19 @@
 from rest_framework import viewsets, permissions, status, views
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.db.models import Count
 
-from core.models import Task, TaskStatus, TaskCategory
+from core.models import Task, TaskStatus, TaskCategory, Search, Notification
 from core.api.serializers.task_serializers import (
     TaskSerializer, TaskCreateSerializer, TaskUpdateSerializer, TaskStatusUpdateSerializer
 )
+from core.services.notification_service import NotificationService
 from core.permissions import IsTaskCreator, IsTaskParticipant
-from core.utils import format_response, paginate_results
+from core.utils import format_response, paginate_request
 
 
 class TaskViewSet(viewsets.ModelViewSet):
@@ -68,27 +71,60 @@ class TaskViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(tags__name=tag_param)
         
         # Filter by search term
+        # search_mode=fulltext|prefix uses the indexed search vector and ranks
+        # results by relevance; the default substring search is kept as is
         search_param = self.request.query_params.get('search')
         if search_param:
-            queryset = queryset.filter(
-                Q(title__icontains=search_param) | 
-                Q(description__icontains=search_param)
-            )
+            search_mode = self.request.query_params.get('search_mode', Search.SEARCH_MODE_CONTAINS)
+            queryset = Search.filter_tasks_by_keyword(queryset, search_param, search_mode)
+            if Search.uses_search_vector(search_mode):
+                queryset = queryset.order_by('-search_rank', 'deadline')
+        
+        # Filter by distance: near=lat,lon&radius_km=, nearest first
+        near_param = self.request.query_params.get('near')
+        if near_param:
+            latitude, longitude, radius_km = self._parse_near_params(near_param)
+            queryset = queryset.nearby(latitude, longitude, radius_km).order_by('distance_km', 'deadline')
         
         # Exclude expired tasks by default, unless specifically requested
         show_expired = self.request.query_params.get('show_expired', 'false').lower() == 'true'
         if not show_expired:
-            # Check for and mark expired tasks
-            now = timezone.now()
-            expired_tasks = queryset.filter(status=TaskStatus.POSTED, deadline__lt=now)
-            for task in expired_tasks:
-                task.check_expiry()
-            
-            # Exclude expired tasks
-            queryset = queryset.exclude(status=TaskStatus.EXPIRED)
+            # Exclude expired tasks, including overdue POSTED tasks the
+            # expiry sweeper (manage.py expire_tasks) has not reached yet.
+            # Listing never writes; expiry itself happens in the sweeper.
+            queryset = queryset.exclude(status=TaskStatus.EXPIRED).exclude(
+                status=TaskStatus.POSTED,
+                deadline__lt=timezone.now()
+            )
+        
+        # Read actions serialize with TaskSerializer; load its relations up front
+        if self.action in ['list', 'retrieve']:
+            queryset = queryset.with_serializer_relations(self.request.user)
         
         return queryset
     
+    def _parse_near_params(self, near_param):
+        """Validate the near/radius_km query parameters"""
+        try:
+            latitude, longitude = [float(value) for value in near_param.split(',')]
+        except ValueError:
+            raise ValidationError({'near': 'Expected coordinates as "lat,lon".'})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({'near': 'Coordinates are out of range.'})
+        
+        try:
+            radius_km = float(self.request.query_params.get(
+                'radius_km', settings.TASK_NEARBY_DEFAULT_RADIUS_KM
+            ))
+        except ValueError:
+            raise ValidationError({'radius_km': 'Expected a number.'})
+        if not 0 < radius_km <= settings.TASK_NEARBY_MAX_RADIUS_KM:
+            raise ValidationError({
+                'radius_km': f'Must be between 0 and {settings.TASK_NEARBY_MAX_RADIUS_KM:g}.'
+            })
+        
+        return latitude, longitude, radius_km
+    
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
         if self.action == 'create':
@@ -105,6 +141,9 @@ class TaskViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         task = serializer.save()
         
+        # Let nearby users know about the new task (queued in deferred mode)
+        NotificationService.request_task_created_notification(task)
+        
         # Return response with the created task
         response_serializer = TaskSerializer(task, context={'request': request})
         return Response(format_response(
@@ -136,15 +175,8 @@ class TaskViewSet(viewsets.ModelViewSet):
         # Cancel task instead of deleting
         instance.cancel_task()
         
-        # Send notification to assignee if one exists
-        if instance.assignee:
-            from core.models import Notification, NotificationType
-            Notification.send_notification(
-                user=instance.assignee,
-                content=f"Task '{instance.title}' has been cancelled by the creator.",
-                notification_type=NotificationType.TASK_CANCELLED,
-                related_task=instance
-            )
+        # Send notification to the assignees
+        Notification.send_task_cancelled_notification(instance)
         
         return Response(format_response(
             status='success',
@@ -222,7 +254,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         
         # Define what makes a task "popular"
         # Current definition: Open tasks with highest urgency and most recently created
-        popular_tasks = Task.objects.filter(
+        popular_tasks = Task.objects.with_serializer_relations(request.user).filter(
             status=TaskStatus.POSTED  # Only show open tasks
         ).order_by('-urgency_level', '-created_at')[:limit]
         
@@ -249,7 +281,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         ).values_list('following_id', flat=True)
         
         # Get tasks created by followed users (only open tasks)
-        followed_tasks = Task.objects.filter(
+        followed_tasks = Task.objects.with_serializer_relations(request.user).filter(
             creator_id__in=following_ids,
             status=TaskStatus.POSTED  # Only show open tasks
         ).order_by('-created_at')[:limit]
@@ -272,24 +304,21 @@ class UserTasksView(views.APIView):
         # If 'status' parameter is 'active', get tasks that are not completed, cancelled or expired
         status_param = request.query_params.get('status')
         
+        user_tasks = Task.objects.with_serializer_relations(request.user)
         if status_param == 'active':
-            tasks = Task.objects.filter(
+            tasks = user_tasks.filter(
                 creator_id=user_id,
                 status__in=[TaskStatus.POSTED, TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS]
             )
         else:
-            tasks = Task.objects.filter(creator_id=user_id)
+            tasks = user_tasks.filter(creator_id=user_id)
             
             # Apply additional filtering if status parameter provided
             if status_param:
                 tasks = tasks.filter(status=status_param)
         
-        # Get page and limit parameters
-        page = int(request.query_params.get('page', 1))
-        limit = int(request.query_params.get('limit', 20))
-        
-        # Paginate results
-        paginated = paginate_results(tasks, page=page, items_per_page=limit)
+        # Paginate results (page/limit, or cursor for keyset paging)
+        paginated = paginate_request(request, tasks, cursor_ordering=('deadline', 'id'))
         
         # Serialize tasks
         serializer = TaskSerializer(paginated['data'], many=True, context={'request': request})
@@ -315,23 +344,15 @@ class CompleteTaskView(views.APIView):
         # Check if user is the creator
         self.check_object_permissions(request, task)
         
-        # Check if task can be completed
-        if task.status not in [TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS]:
+        # Complete task and notify the creator and assignees, if its
+        # stored status still allows it
+        if not task.confirm_completion(
+                notify=True, from_statuses=[TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS]):
             return Response(format_response(
                 status='error',
                 message=f"Cannot complete task with status '{dict(TaskStatus.choices)[task.status]}'."
             ), status=status.HTTP_400_BAD_REQUEST)
         
-        # Complete task
-        task.confirm_completion()
-        
-        # Send notifications
-        from core.models import Notification, NotificationType
-        
-        # Notify assignee
-        if task.assignee:
-            Notification.send_task_completed_notification(task)
-        
         return Response(format_response(
             status='success',
             message='Task marked as completed.',
@@ -1,10 +1,9 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import FormParser
 from django.conf import settings
-from django.db.models import Q
-from core.models import RegisteredUser, UserFollows
+from core.models import RegisteredUser, UserFollows, Search, MediaStatus
 from core.api.serializers.user_serializers import (
     UserSerializer, UserUpdateSerializer, PasswordChangeSerializer
 )
@@ -12,8 +11,8 @@ from core.api.serializers.follow_serializers import (
     FollowUserSerializer, FollowerSerializer, FollowingSerializer
 )
 from core.permissions import IsOwner
+from core.upload_handlers import PhotoMultiPartParser, PhotoUploadHandler
 from core.utils import format_response
-import os
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -26,14 +25,19 @@ class UserViewSet(viewsets.ModelViewSet):
         """Return appropriate queryset based on filters"""
         queryset = RegisteredUser.objects.all()
         
-        # Filter by search term (name, surname, or full name)
+        # Profiles are serialized with UserSerializer; annotate its counters
+        if self.action in ['list', 'retrieve']:
+            queryset = RegisteredUser.objects.with_profile_stats(self.request.user)
+        
+        # Filter by search term (name, surname, or username)
+        # search_mode=fuzzy ranks typo-tolerant trigram matches; searches on
+        # the list are capped at settings.USER_SEARCH_MAX_RESULTS users
         search_param = self.request.query_params.get('search')
         if search_param:
-            queryset = queryset.filter(
-                Q(name__icontains=search_param) | 
-                Q(surname__icontains=search_param) |
-                Q(username__icontains=search_param)
-            )
+            search_mode = self.request.query_params.get('search_mode', Search.SEARCH_MODE_CONTAINS)
+            queryset = Search.filter_users_by_keyword(queryset, search_param, search_mode)
+            if self.action == 'list':
+                queryset = queryset[:settings.USER_SEARCH_MAX_RESULTS]
         
         return queryset
     
@@ -114,11 +118,20 @@ class UserViewSet(viewsets.ModelViewSet):
             data=serializer.errors
         ), status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=True, methods=['post'], url_path='upload-photo', parser_classes=[MultiPartParser, FormParser])
+    @action(detail=True, methods=['post'], url_path='upload-photo', parser_classes=[PhotoMultiPartParser, FormParser])
     def upload_photo(self, request, pk=None):
         """Upload profile photo for the user"""
         user = self.get_object()
         
+        # Type and size are checked while the file streams in
+        upload_error = PhotoUploadHandler.get_error(request)
+        if upload_error:
+            status_code, message = upload_error
+            return Response(format_response(
+                status='error',
+                message=message
+            ), status=status_code)
+        
         # Check if photo file is provided
         if 'photo' not in request.FILES:
             return Response(format_response(
@@ -126,49 +139,22 @@ class UserViewSet(viewsets.ModelViewSet):
                 message='No photo file provided.'
             ), status=status.HTTP_400_BAD_REQUEST)
         
-        # Validate file type and size
         image_file = request.FILES.get('photo')
-        content_type = getattr(image_file, 'content_type', '') or ''
-        if not content_type.startswith('image/'):
-            return Response(format_response(
-                status='error',
-                message='Unsupported media type. Only image uploads are allowed.'
-            ), status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
         
-        try:
-            max_mb = int(getattr(settings, 'MAX_PHOTO_UPLOAD_MB', 10))
-        except Exception:
-            max_mb = 10
-        max_bytes = max_mb * 1024 * 1024
-        size = getattr(image_file, 'size', None)
-        if isinstance(size, int) and size > max_bytes:
-            return Response(format_response(
-                status='error',
-                message=f'File too large. Maximum allowed size is {max_mb}MB.'
-            ), status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
-        
-        # Delete old profile photo if exists
-        if user.profile_photo:
-            old_photo_path = user.profile_photo.path
-            if os.path.isfile(old_photo_path):
-                try:
-                    os.remove(old_photo_path)
-                except Exception:
-                    pass
+        # Replace the old profile photo and request the new resized variants
+        user.set_profile_photo(image_file)
         
-        # Save new profile photo
-        user.profile_photo = image_file
-        user.save()
-        
-        # Return response with the uploaded photo URL
+        # Return response with the uploaded photo URL; 202 while its variants are queued
         serializer = UserSerializer(user, context={'request': request})
+        pending = user.profile_photo_status == MediaStatus.PENDING
         return Response(format_response(
             status='success',
             message='Profile photo uploaded successfully.',
             data={
-                'profile_photo': serializer.data.get('profile_photo')
+                'profile_photo': serializer.data.get('profile_photo'),
+                'profile_photo_status': user.profile_photo_status
             }
-        ), status=status.HTTP_200_OK)
+        ), status=status.HTTP_202_ACCEPTED if pending else status.HTTP_200_OK)
     
     @action(detail=True, methods=['delete'], url_path='delete-photo')
     def delete_photo(self, request, pk=None):
@@ -181,17 +167,8 @@ class UserViewSet(viewsets.ModelViewSet):
                 message='No profile photo to delete.'
             ), status=status.HTTP_404_NOT_FOUND)
         
-        # Delete the photo file
-        photo_path = user.profile_photo.path
-        if os.path.isfile(photo_path):
-            try:
-                os.remove(photo_path)
-            except Exception:
-                pass
-        
-        # Clear the profile_photo field
-        user.profile_photo = None
-        user.save()
+        # Release the photo and its variants and clear the profile_photo field
+        user.delete_profile_photo()
         
         return Response(format_response(
             status='success',
@@ -0,0 +1,50 @@
+import datetime
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import ArchivedNotification
+
+
+class Command(BaseCommand):
+    """Django command to archive old read notifications, once or as a periodic worker"""
+    help = 'Move read notifications older than the retention period into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.NOTIFICATION_RETENTION_DAYS,
+            help='Archive read notifications older than this many days',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.NOTIFICATION_ARCHIVE_BATCH_SIZE,
+            help='Notifications moved per transaction',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and archive periodically instead of exiting after one run',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=settings.NOTIFICATION_ARCHIVE_INTERVAL,
+            help='Seconds to wait between runs when running with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+            archived_count = ArchivedNotification.archive_read_notifications(
+                cutoff, batch_size=options['batch_size']
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f'Archived {archived_count} notification(s).')
+            )
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
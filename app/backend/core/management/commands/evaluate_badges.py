@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from core.services.badge_service import BadgeService
+
+
+class Command(BaseCommand):
+    """Django command to re-evaluate user-level badges in batches"""
+    help = 'Evaluate and award user-level badges for all users, or for the given user IDs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'user_ids',
+            nargs='*',
+            type=int,
+            help='Only evaluate these users',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BadgeService.EVALUATION_BATCH_SIZE,
+            help='Number of users evaluated per batch',
+        )
+
+    def handle(self, *args, **options):
+        if options['user_ids']:
+            awarded = BadgeService.evaluate_users(options['user_ids'])
+            user_count = len(options['user_ids'])
+            awarded_count = sum(len(badge_types) for badge_types in awarded.values())
+        else:
+            user_count, awarded_count = BadgeService.evaluate_all_users(options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Evaluated {user_count} user(s), awarded {awarded_count} badge(s).')
+        )
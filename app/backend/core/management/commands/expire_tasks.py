@@ -0,0 +1,33 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.models import Task
+
+
+class Command(BaseCommand):
+    """Django command to expire overdue tasks, once or as a periodic worker"""
+    help = 'Mark POSTED tasks whose deadline has passed as EXPIRED'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and sweep periodically instead of exiting after one sweep',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'TASK_EXPIRY_SWEEP_INTERVAL', 60),
+            help='Seconds to wait between sweeps when running with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            expired_count = Task.expire_overdue_tasks()
+            self.stdout.write(
+                self.style.SUCCESS(f'Expired {expired_count} task(s).')
+            )
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from core.models import Photo, RegisteredUser
+
+
+class Command(BaseCommand):
+    """Django command to generate resized variants of already uploaded photos"""
+    help = 'Generate the thumb/card/full variants of task and profile photos that lack them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate the variants of every photo, not only the missing ones',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of photos loaded per query',
+        )
+
+    def iterate(self, queryset, batch_size):
+        """Yield the rows of a queryset in ID order, one batch per query"""
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1].id
+
+    def handle(self, *args, **options):
+        photos = Photo.objects.exclude(url='')
+        users = RegisteredUser.objects.exclude(profile_photo='').exclude(profile_photo__isnull=True)
+        if not options['force']:
+            photos = photos.filter(variants={})
+            users = users.filter(profile_photo_variants={})
+
+        photo_count = 0
+        for photo in self.iterate(photos, options['batch_size']):
+            photo.generate_variants()
+            photo_count += 1
+
+        user_count = 0
+        for user in self.iterate(users, options['batch_size']):
+            user.generate_profile_photo_variants()
+            user_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Generated variants for {photo_count} task photo(s) and {user_count} profile photo(s).'
+            )
+        )
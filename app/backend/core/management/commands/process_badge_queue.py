@@ -0,0 +1,45 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.services.badge_service import BadgeService
+
+
+class Command(BaseCommand):
+    """Django command to evaluate queued badge checks, once or as a worker"""
+    help = 'Evaluate badge checks queued while BADGE_EVALUATION_MODE is "deferred"'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll the queue instead of exiting once it is drained',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'BADGE_QUEUE_POLL_INTERVAL', 5),
+            help='Seconds to wait when the queue is empty while running with --loop',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BadgeService.QUEUE_BATCH_SIZE,
+            help='Number of queued checks claimed per batch',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            processed = BadgeService.process_queue(options['batch_size'])
+            while processed:
+                total += processed
+                processed = BadgeService.process_queue(options['batch_size'])
+
+            if total or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Processed {total} queued badge check(s).')
+                )
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,45 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.services.notification_service import NotificationService
+
+
+class Command(BaseCommand):
+    """Django command to send queued task notifications, once or as a worker"""
+    help = 'Send new-task notifications queued while NOTIFICATION_FANOUT_MODE is "deferred"'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll the queue instead of exiting once it is drained',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'NOTIFICATION_QUEUE_POLL_INTERVAL', 2),
+            help='Seconds to wait when the queue is empty while running with --loop',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=NotificationService.QUEUE_BATCH_SIZE,
+            help='Number of queued requests claimed per batch',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            processed = NotificationService.process_queue(options['batch_size'])
+            while processed:
+                total += processed
+                processed = NotificationService.process_queue(options['batch_size'])
+
+            if total or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Processed {total} queued notification request(s).')
+                )
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from core.models import RegisteredUser, UserStats
+
+
+class Command(BaseCommand):
+    """Django command to recompute per-user statistics from scratch"""
+    help = 'Rebuild the UserStats counters of all users, or of the given user IDs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'user_ids',
+            nargs='*',
+            type=int,
+            help='Only rebuild these users',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=UserStats.REBUILD_BATCH_SIZE,
+            help='Number of users rebuilt per batch',
+        )
+
+    def handle(self, *args, **options):
+        if options['user_ids']:
+            user_ids = list(
+                RegisteredUser.objects.filter(id__in=options['user_ids']).values_list('id', flat=True)
+            )
+            UserStats.rebuild(user_ids)
+            user_count = len(user_ids)
+        else:
+            user_count = UserStats.rebuild_all(options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt statistics for {user_count} user(s).')
+        )
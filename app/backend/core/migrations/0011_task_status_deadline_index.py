@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_alter_notification_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('TASK_CREATED', 'Task Created'), ('VOLUNTEER_APPLIED', 'Volunteer Applied'), ('TASK_ASSIGNED', 'Task Assigned'), ('TASK_COMPLETED', 'Task Completed'), ('TASK_CANCELLED', 'Task Cancelled'), ('NEW_REVIEW', 'New Review'), ('BADGE_EARNED', 'Badge Earned'), ('COMMENT_ADDED', 'Comment Added'), ('ADMIN_WARNING', 'Admin Warning'), ('SYSTEM_NOTIFICATION', 'System Notification')], default='SYSTEM_NOTIFICATION', max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+        ),
+    ]
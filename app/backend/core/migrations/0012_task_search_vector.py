@@ -0,0 +1,63 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:58
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# The trigger keeps search_vector in sync on every INSERT and on any UPDATE
+# that touches title or description, including queryset.update() calls.
+# Keep the text search configuration in sync with Search.SEARCH_CONFIG.
+CREATE_SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION core_task_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector ON core_task
+    FOR EACH ROW EXECUTE FUNCTION core_task_search_vector_update();
+
+UPDATE core_task SET search_vector =
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B');
+
+CREATE INDEX core_task_search_vector_gin ON core_task USING gin (search_vector);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP INDEX IF EXISTS core_task_search_vector_gin;
+DROP TRIGGER IF EXISTS core_task_search_vector_trigger ON core_task;
+DROP FUNCTION IF EXISTS core_task_search_vector_update();
+"""
+
+
+def create_search_vector_trigger(apps, schema_editor):
+    """Install the trigger and GIN index (PostgreSQL only)"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SEARCH_VECTOR_SQL)
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    """Remove the trigger and GIN index (PostgreSQL only)"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_task_status_deadline_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector_trigger, drop_search_vector_trigger),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+
+# Trigram indexes behind Search.SEARCH_MODE_FUZZY. The `%` similarity
+# operator used by the fuzzy user search is served by these GIN indexes.
+TRIGRAM_INDEXED_COLUMNS = ['name', 'surname', 'username']
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Enable pg_trgm and index the user name columns (PostgreSQL only)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    # Some PostgreSQL builds ship without the contrib extensions; the fuzzy
+    # search then falls back to substring matching (see Search.trigram_search_available)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_INDEXED_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS core_user_{column}_trgm '
+            f'ON core_registereduser USING gin ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """Remove the trigram indexes (PostgreSQL only); the extension is left installed"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for column in TRIGRAM_INDEXED_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS core_user_{column}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_task_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
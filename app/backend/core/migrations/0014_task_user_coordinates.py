@@ -0,0 +1,126 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:20
+
+import csv
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of GeocodingService.geocode and encode_geohash as of this
+# migration, so later changes to the service cannot change what it does
+NORMALIZE_TABLE = str.maketrans('İIıŞşĞğÜüÖöÇç', 'iiissgguuoocc')
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 7
+
+
+def normalize(text):
+    """Normalize a place name for gazetteer lookups"""
+    return ' '.join(text.translate(NORMALIZE_TABLE).lower().split())
+
+
+def load_gazetteer():
+    """Map normalized place names in the gazetteer file to (latitude, longitude)"""
+    gazetteer = {}
+    with open(settings.GEOCODER_GAZETTEER_PATH, encoding='utf-8') as gazetteer_file:
+        for row in csv.DictReader(gazetteer_file):
+            gazetteer[normalize(row['name'])] = (float(row['latitude']), float(row['longitude']))
+    return gazetteer
+
+
+def geocode(gazetteer, location):
+    """Resolve location text to coordinates, trying the full text then each comma-separated part"""
+    for candidate in [location] + location.split(','):
+        coordinates = gazetteer.get(normalize(candidate))
+        if coordinates is not None:
+            return coordinates
+    return None
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode coordinates as a geohash string of the given precision"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even_bit = True
+
+    while len(geohash) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        value, value_range = (longitude, lon_range) if even_bit else (latitude, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits = bits << 1
+            value_range[1] = mid
+        even_bit = not even_bit
+
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+
+def geocode_existing_locations(apps, schema_editor):
+    """Fill coordinates for tasks and users saved before geocoding existed"""
+    Task = apps.get_model('core', 'Task')
+    RegisteredUser = apps.get_model('core', 'RegisteredUser')
+    gazetteer = load_gazetteer()
+
+    tasks = []
+    for task in Task.objects.exclude(location='').only('id', 'location').iterator():
+        coordinates = geocode(gazetteer, task.location)
+        if coordinates is not None:
+            task.latitude, task.longitude = coordinates
+            task.geohash = encode_geohash(*coordinates)
+            tasks.append(task)
+    Task.objects.bulk_update(tasks, ['latitude', 'longitude', 'geohash'], batch_size=500)
+
+    users = []
+    for user in RegisteredUser.objects.exclude(location='').only('id', 'location').iterator():
+        coordinates = geocode(gazetteer, user.location)
+        if coordinates is not None:
+            user.latitude, user.longitude = coordinates
+            users.append(user)
+    RegisteredUser.objects.bulk_update(users, ['latitude', 'longitude'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_user_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registereduser',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='registereduser',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(geocode_existing_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-17 00:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_task_user_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BadgeEvaluationRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigger', models.CharField(choices=[('VOLUNTEER_ACCEPTED', 'Volunteer Accepted'), ('TASK_CREATED', 'Task Created'), ('TASK_COMPLETED', 'Task Completed'), ('REVIEW_RECEIVED', 'Review Received'), ('FOLLOWER_GAINED', 'Follower Gained')], max_length=30)),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='badge_evaluation_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_badge_evaluation_request'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.registereduser')),
+                ('accepted_volunteer_count', models.IntegerField(default=0)),
+                ('distinct_requester_count', models.IntegerField(default=0)),
+                ('distinct_category_count', models.IntegerField(default=0)),
+                ('created_task_count', models.IntegerField(default=0)),
+                ('follower_count', models.IntegerField(default=0)),
+                ('review_count', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('reliability_count', models.IntegerField(default=0)),
+                ('reliability_sum', models.FloatField(default=0.0)),
+                ('task_completion_count', models.IntegerField(default=0)),
+                ('task_completion_sum', models.FloatField(default=0.0)),
+                ('communication_count', models.IntegerField(default=0)),
+                ('communication_sum', models.FloatField(default=0.0)),
+                ('safety_and_respect_count', models.IntegerField(default=0)),
+                ('safety_and_respect_sum', models.FloatField(default=0.0)),
+                ('great_communication_count', models.IntegerField(default=0)),
+                ('perfect_review_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'User stats',
+            },
+        ),
+    ]
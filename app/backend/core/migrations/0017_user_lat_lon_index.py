@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_user_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registereduser',
+            index=models.Index(fields=['latitude', 'longitude'], name='user_lat_lon_idx'),
+        ),
+    ]
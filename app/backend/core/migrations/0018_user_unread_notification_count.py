@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_unread_notification_counts(apps, schema_editor):
+    """Count the unread notifications users received before the counter existed"""
+    Notification = apps.get_model('core', 'Notification')
+    RegisteredUser = apps.get_model('core', 'RegisteredUser')
+
+    counts = Notification.objects.filter(is_read=False).values('user_id').annotate(
+        unread=Count('id')
+    ).order_by()
+
+    users = [
+        RegisteredUser(id=row['user_id'], unread_notification_count=row['unread'])
+        for row in counts
+    ]
+    RegisteredUser.objects.bulk_update(users, ['unread_notification_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_user_lat_lon_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registereduser',
+            name='unread_notification_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_unread_notification_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.25 on 2026-10-17 01:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_user_unread_notification_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('timestamp', models.DateTimeField()),
+                ('type', models.CharField(choices=[('TASK_CREATED', 'Task Created'), ('VOLUNTEER_APPLIED', 'Volunteer Applied'), ('TASK_ASSIGNED', 'Task Assigned'), ('TASK_COMPLETED', 'Task Completed'), ('TASK_CANCELLED', 'Task Cancelled'), ('NEW_REVIEW', 'New Review'), ('BADGE_EARNED', 'Badge Earned'), ('COMMENT_ADDED', 'Comment Added'), ('ADMIN_WARNING', 'Admin Warning'), ('SYSTEM_NOTIFICATION', 'System Notification')], default='SYSTEM_NOTIFICATION', max_length=30)),
+                ('is_read', models.BooleanField(default=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-timestamp'], name='notif_user_read_ts_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivednotification',
+            name='related_task',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to='core.task'),
+        ),
+        migrations.AddField(
+            model_name='archivednotification',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivednotification',
+            index=models.Index(fields=['user', '-timestamp'], name='archived_notif_user_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-17 03:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_media_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskNotificationRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_requests', to='core.task')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -1,7 +1,7 @@
 from .user import RegisteredUser, Administrator, Guest
 from .task import Task, TaskCategory, TaskStatus
 from .volunteer import Volunteer, VolunteerStatus
-from .notification import Notification, NotificationType
+from .notification import Notification, NotificationType, ArchivedNotification, TaskNotificationRequest
 from .review import Review
 from .bookmark import Bookmark, BookmarkTag
 from .tag import Tag
@@ -11,7 +11,10 @@ from .comment import Comment
 from .search import Search
 from .report import TaskReport, UserReport, ReportType, ReportStatus
 from .user_follows import UserFollows
-from .badge import Badge, BadgeType, UserBadge
+from .badge import Badge, BadgeType, UserBadge, BadgeEvaluationTrigger, BadgeEvaluationRequest
+from .user_stats import UserStats
+from .media_job import MediaJob, MediaJobKind, MediaStatus
+from .media_blob import MediaBlob
 
 __all__ = [
     'RegisteredUser',
@@ -24,6 +27,8 @@ __all__ = [
     'VolunteerStatus',
     'Notification',
     'NotificationType',
+    'ArchivedNotification',
+    'TaskNotificationRequest',
     'Review',
     'Bookmark',
     'BookmarkTag',
@@ -40,4 +45,11 @@ __all__ = [
     'Badge',
     'BadgeType',
     'UserBadge',
+    'BadgeEvaluationTrigger',
+    'BadgeEvaluationRequest',
+    'UserStats',
+    'MediaJob',
+    'MediaJobKind',
+    'MediaStatus',
+    'MediaBlob',
 ]
\ No newline at end of file
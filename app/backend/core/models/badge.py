@@ -74,3 +74,34 @@ class UserBadge(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.badge.name}"
+
+
+class BadgeEvaluationTrigger(models.TextChoices):
+    """Enumeration for events that make a user's badges worth re-checking"""
+    VOLUNTEER_ACCEPTED = 'VOLUNTEER_ACCEPTED', 'Volunteer Accepted'
+    TASK_CREATED = 'TASK_CREATED', 'Task Created'
+    TASK_COMPLETED = 'TASK_COMPLETED', 'Task Completed'
+    REVIEW_RECEIVED = 'REVIEW_RECEIVED', 'Review Received'
+    FOLLOWER_GAINED = 'FOLLOWER_GAINED', 'Follower Gained'
+
+
+class BadgeEvaluationRequest(models.Model):
+    """Queued badge check, recorded by signals and processed by the badge worker"""
+    user = models.ForeignKey(
+        'RegisteredUser',
+        on_delete=models.CASCADE,
+        related_name='badge_evaluation_requests'
+    )
+    trigger = models.CharField(
+        max_length=30,
+        choices=BadgeEvaluationTrigger.choices
+    )
+    # ID of the Volunteer or Task the trigger refers to, if any
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.trigger} ({self.object_id})"
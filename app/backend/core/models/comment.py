@@ -47,7 +47,7 @@ class Comment(models.Model):
     def set_content(self, content):
         """Set comment content"""
         self.content = content
-        self.save()
+        self.save(update_fields=['content'])
     
     # Business logic methods
     @classmethod
@@ -74,5 +74,5 @@ class Comment(models.Model):
     def edit_comment(self, new_content):
         """Edit comment content"""
         self.content = new_content
-        self.save()
+        self.save(update_fields=['content'])
         return True
\ No newline at end of file
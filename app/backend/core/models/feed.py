@@ -1,5 +1,8 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
+from core.services.geocoding import GeocodingService
 from .task import Task
 
 
@@ -9,6 +12,34 @@ class Feed:
     of tasks based on user's preferences and location
     """
     
+    # Relative weight of each ranking signal; every signal is scaled to 0..1
+    RANKING_WEIGHTS = {
+        'urgency': 1.0,
+        'deadline': 1.5,
+        'category_affinity': 1.0,
+        'followed_creator': 2.0,
+        'locality': 1.5,
+    }
+    
+    # Hours after which a deadline counts as half as pressing
+    DEADLINE_HALF_LIFE_HOURS = 24
+    
+    # Tasks further than this from the user get no locality boost
+    LOCALITY_RADIUS_KM = 10
+    
+    MAX_URGENCY_LEVEL = 5
+    
+    # Task fields that affect rankings; saves touching only other fields
+    # keep cached feeds
+    RANKED_TASK_FIELDS = frozenset([
+        'status', 'category', 'urgency_level', 'deadline', 'creator', 'creator_id',
+        'location', 'latitude', 'longitude',
+    ])
+    
+    # Ranked feeds are cached per user under a shared generation number;
+    # bumping the generation invalidates every cached feed at once
+    CACHE_GENERATION_KEY = 'feed:generation'
+    
     def __init__(self, user):
         """Initialize feed with user"""
         self.user = user
@@ -109,9 +140,157 @@ class Feed:
         return [bookmark.task for bookmark in bookmarks]
     
     def get_followed_users_tasks(self):
+        """Get open tasks from users that the current user follows"""
+        from .user_follows import UserFollows
+        following_ids = UserFollows.objects.filter(
+            follower=self.user
+        ).values_list('following_id', flat=True)
+        
+        return Task.objects.filter(
+            creator_id__in=following_ids,
+            status='POSTED',
+            deadline__gt=timezone.now()
+        ).order_by('deadline')
+    
+    def get_category_affinity(self):
         """
-        Get tasks from users that the current user follows
-        This would require a UserFollows model to be implemented
+        Score categories by the user's volunteer history
+        
+        Returns:
+            dict mapping category to a 0..1 share of the user's most
+            volunteered category
         """
-        # Placeholder implementation
-        return []
\ No newline at end of file
+        from .volunteer import Volunteer
+        counts = {
+            row['task__category']: row['count']
+            for row in Volunteer.objects.filter(user=self.user).values(
+                'task__category'
+            ).annotate(count=models.Count('id')).order_by()
+        }
+        if not counts:
+            return {}
+        
+        top_count = max(counts.values())
+        return {category: count / top_count for category, count in counts.items()}
+    
+    def rank_tasks(self):
+        """
+        Rank the user's candidate tasks
+        
+        Candidates are open tasks the user neither created nor volunteered
+        for, capped at settings.FEED_CANDIDATE_LIMIT by deadline. Each one
+        is scored by a weighted blend of urgency, deadline proximity,
+        category affinity, followed creators and locality.
+        
+        Returns:
+            List of task IDs, best first
+        """
+        from .user_follows import UserFollows
+        now = timezone.now()
+        
+        candidates = Task.objects.filter(
+            status='POSTED',
+            deadline__gt=now
+        ).exclude(
+            creator=self.user
+        ).exclude(
+            volunteers__user=self.user
+        ).order_by('deadline', 'id').values(
+            'id', 'category', 'urgency_level', 'deadline', 'creator_id', 'latitude', 'longitude'
+        )[:settings.FEED_CANDIDATE_LIMIT]
+        
+        affinity = self.get_category_affinity()
+        following_ids = set(
+            UserFollows.objects.filter(follower=self.user).values_list('following_id', flat=True)
+        )
+        has_location = self.user.latitude is not None and self.user.longitude is not None
+        weights = self.RANKING_WEIGHTS
+        
+        scored = []
+        for task in candidates:
+            hours_left = (task['deadline'] - now).total_seconds() / 3600
+            score = (
+                weights['urgency'] * min(max(task['urgency_level'], 0), self.MAX_URGENCY_LEVEL) / self.MAX_URGENCY_LEVEL +
+                weights['deadline'] * self.DEADLINE_HALF_LIFE_HOURS / (self.DEADLINE_HALF_LIFE_HOURS + hours_left) +
+                weights['category_affinity'] * affinity.get(task['category'], 0.0)
+            )
+            if task['creator_id'] in following_ids:
+                score += weights['followed_creator']
+            if has_location and task['latitude'] is not None:
+                distance = GeocodingService.distance_km(
+                    self.user.latitude, self.user.longitude, task['latitude'], task['longitude']
+                )
+                score += weights['locality'] * max(0.0, 1 - distance / self.LOCALITY_RADIUS_KM)
+            
+            # Candidates come in deadline order, so ties keep the earlier deadline
+            scored.append((-score, len(scored), task['id']))
+        
+        scored.sort()
+        return [task_id for _, _, task_id in scored]
+    
+    def get_cache_key(self):
+        """Cache key of this user's ranked feed in the current generation"""
+        generation = cache.get_or_set(self.CACHE_GENERATION_KEY, 1, timeout=None)
+        return f'feed:{generation}:{self.user.id}'
+    
+    def get_ranked_task_ids(self):
+        """Return the ranked task IDs, from cache when possible"""
+        cache_key = self.get_cache_key()
+        task_ids = cache.get(cache_key)
+        if task_ids is None:
+            task_ids = self.rank_tasks()
+            cache.set(cache_key, task_ids, timeout=settings.FEED_CACHE_TTL)
+        return task_ids
+    
+    def load_ranked_feed(self, page=1, items_per_page=20):
+        """
+        Load a page of the personalized, ranked feed
+        
+        The ranking is cached per user (settings.FEED_CACHE_TTL); a warm
+        page only loads the tasks on that page. Tasks that stopped being
+        POSTED since the ranking was cached are left out, as invalidations
+        from other processes do not reach a per-process cache.
+        
+        Args:
+            page: Page number (1-based)
+            items_per_page: Number of items per page
+            
+        Returns:
+            dict with the page's Task objects ('data') and pagination metadata
+        """
+        page = max(1, page)
+        task_ids = self.get_ranked_task_ids()
+        
+        start = (page - 1) * items_per_page
+        page_ids = task_ids[start:start + items_per_page]
+        tasks_by_id = Task.objects.with_serializer_relations(self.user).filter(
+            status='POSTED'
+        ).in_bulk(page_ids)
+        
+        total_count = len(task_ids)
+        total_pages = (total_count + items_per_page - 1) // items_per_page
+        
+        return {
+            'data': [tasks_by_id[task_id] for task_id in page_ids if task_id in tasks_by_id],
+            'pagination': {
+                'total_records': total_count,
+                'current_page': page,
+                'total_pages': total_pages,
+                'next_page': page + 1 if page < total_pages else None,
+                'prev_page': page - 1 if page > 1 else None
+            }
+        }
+    
+    def invalidate(self):
+        """Drop this user's cached feed"""
+        cache.delete(self.get_cache_key())
+    
+    @classmethod
+    def invalidate_all(cls):
+        """Drop every cached feed by moving to a new cache generation"""
+        if not cache.add(cls.CACHE_GENERATION_KEY, 2, timeout=None):
+            try:
+                cache.incr(cls.CACHE_GENERATION_KEY)
+            except ValueError:
+                # Evicted between add() and incr()
+                cache.set(cls.CACHE_GENERATION_KEY, 2, timeout=None)
\ No newline at end of file
@@ -0,0 +1,57 @@
+from django.db import models
+from django.db.models import F
+
+
+class MediaBlob(models.Model):
+    """
+    Reference count of a file kept by ContentAddressedStorage (core/storage.py)
+
+    Every saved upload or variant with the same SHA-256 digest shares one
+    file and one row. The row outlives its last reference (with a count of
+    0) so that releasing and re-adding a blob always contend on the same
+    row lock.
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    reference_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest} ({self.reference_count} reference(s))"
+
+    @classmethod
+    def add_reference(cls, digest, size):
+        """
+        Count one more file name pointing at a blob, creating its row if needed
+
+        The row stays locked until the end of the caller's transaction, so
+        a concurrent release cannot remove the file meanwhile.
+        """
+        cls.objects.bulk_create([cls(digest=digest, size=size)], ignore_conflicts=True)
+        cls.objects.filter(digest=digest).update(reference_count=F('reference_count') + 1)
+
+    @classmethod
+    def release(cls, digest):
+        """
+        Drop one reference to a blob
+
+        Must run inside a transaction. When this returns 0 the caller
+        removes the file once the transaction commits, after checking the
+        blob is still unreferenced under the row lock.
+
+        Returns:
+            int: References left (0 for a blob without a row)
+        """
+        blob = cls.objects.select_for_update().filter(digest=digest).first()
+        if blob is None or blob.reference_count <= 1:
+            if blob is not None:
+                cls.objects.filter(digest=digest).update(reference_count=0)
+            return 0
+
+        cls.objects.filter(digest=digest).update(reference_count=F('reference_count') - 1)
+        return blob.reference_count - 1
+
+    @classmethod
+    def get_reference_count(cls, digest):
+        """Number of stored names pointing at a blob"""
+        return cls.objects.filter(digest=digest).values_list('reference_count', flat=True).first() or 0
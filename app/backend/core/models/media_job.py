@@ -0,0 +1,38 @@
+from django.db import models
+from django.utils import timezone
+
+
+class MediaStatus(models.TextChoices):
+    """Processing state of an uploaded image"""
+    PENDING = 'PENDING', 'Pending'
+    READY = 'READY', 'Ready'
+    FAILED = 'FAILED', 'Failed'
+
+
+class MediaJobKind(models.TextChoices):
+    """Enumeration for the images a media job processes"""
+    TASK_PHOTO = 'TASK_PHOTO', 'Task photo'
+    PROFILE_PHOTO = 'PROFILE_PHOTO', 'Profile photo'
+
+
+class MediaJob(models.Model):
+    """Queued image processing, recorded by uploads and processed by the media worker"""
+    kind = models.CharField(
+        max_length=20,
+        choices=MediaJobKind.choices
+    )
+    # ID of the Photo or RegisteredUser the job refers to
+    object_id = models.PositiveIntegerField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Failed jobs are retried once this time has passed
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['run_after', 'id'], name='media_job_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} (attempt {self.attempts + 1})"
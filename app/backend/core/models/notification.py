@@ -1,4 +1,5 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 
 
 class NotificationType(models.TextChoices):
@@ -40,10 +41,26 @@ class Notification(models.Model):
         related_name='notifications'
     )
     
+    # Rows inserted per bulk INSERT when fanning out a notification
+    BULK_BATCH_SIZE = 500
+    
+    class Meta:
+        indexes = [
+            # Per-user lists, optionally unread only, newest first
+            models.Index(fields=['user', 'is_read', '-timestamp'], name='notif_user_read_ts_idx'),
+        ]
+    
     def __str__(self):
         """Return string representation of notification"""
         return f"{self.type} - {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored read status so unread counters can follow changes"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+    
     # Getters
     def get_content(self):
         """Get notification content"""
@@ -73,23 +90,87 @@ class Notification(models.Model):
     def set_content(self, content):
         """Set notification content"""
         self.content = content
-        self.save()
+        self.save(update_fields=['content'])
     
     def set_type(self, notification_type):
         """Set notification type"""
         self.type = notification_type
-        self.save()
+        self.save(update_fields=['type'])
     
     def set_is_read(self, is_read):
-        """Set notification read status"""
+        """
+        Set notification read status
+        
+        The row is only updated if its stored status differs, and the
+        recipient's unread counter moves by the rows actually changed, so
+        concurrent requests marking the same notification cannot drift it.
+        
+        Returns:
+            bool: Whether the stored status changed
+        """
+        from .user import RegisteredUser
+        
+        with transaction.atomic(savepoint=False):
+            changed = Notification.objects.filter(pk=self.pk, is_read=not is_read).update(is_read=is_read)
+            if changed:
+                RegisteredUser.apply_unread_notification_changes({self.user_id: -changed if is_read else changed})
         self.is_read = is_read
-        self.save()
+        self._loaded_is_read = is_read
+        return bool(changed)
     
     # Business logic methods
     def mark_as_read(self):
         """Mark notification as read"""
-        self.is_read = True
-        self.save()
+        return self.set_is_read(True)
+    
+    @classmethod
+    def mark_all_as_read(cls, user):
+        """
+        Mark all of a user's notifications as read with one UPDATE
+        
+        Returns:
+            int: Number of notifications that were unread
+        """
+        from .user import RegisteredUser
+        
+        with transaction.atomic(savepoint=False):
+            marked_count = cls.objects.filter(user=user, is_read=False).update(is_read=True)
+            RegisteredUser.apply_unread_notification_changes({user.id: -marked_count})
+        return marked_count
+    
+    @classmethod
+    def create_bulk(cls, notifications):
+        """
+        Insert unsaved notifications with bulk_create
+        
+        bulk_create skips the post_save signal, so the recipients' unread
+        counters are updated here, with one UPDATE per distinct change, and
+        the notifications are published to open streams.
+        
+        Returns:
+            list of the created notifications
+        """
+        from .user import RegisteredUser
+        
+        unread_deltas = {}
+        for notification in notifications:
+            if not notification.is_read:
+                unread_deltas[notification.user_id] = unread_deltas.get(notification.user_id, 0) + 1
+        
+        with transaction.atomic(savepoint=False):
+            created = cls.objects.bulk_create(notifications)
+            RegisteredUser.apply_unread_notification_changes(unread_deltas)
+            cls.publish(created)
+        return created
+    
+    @classmethod
+    def publish(cls, notifications):
+        """Push created notifications to their recipients' open streams once the transaction commits"""
+        from core.services.notification_broker import NotificationBroker
+        
+        events = [(notification.user_id, notification.id) for notification in notifications]
+        if events:
+            transaction.on_commit(lambda: NotificationBroker.publish(events))
     
     @classmethod
     def send_notification(cls, user, content, notification_type, related_task=None):
@@ -104,11 +185,108 @@ class Notification(models.Model):
         return notification
     
     @classmethod
-    def send_task_created_notification(cls, task):
-        """Send notification for task creation to relevant users"""
-        # This would typically notify users who might be interested in this task
-        # The implementation would depend on business logic
-        pass
+    def get_recipient_batches(cls, recipients, batch_size=BULK_BATCH_SIZE):
+        """
+        Split recipients into batches of distinct user IDs
+        
+        A queryset is read in ID order one batch at a time (keyset
+        pagination), so a large audience is never loaded at once.
+        
+        Args:
+            recipients: RegisteredUser queryset, or iterable of users or user IDs
+            batch_size: Maximum number of IDs per batch
+            
+        Yields:
+            list of user IDs
+        """
+        if isinstance(recipients, models.QuerySet):
+            user_ids = recipients.order_by('pk').values_list('pk', flat=True)
+            last_id = None
+            while True:
+                remaining = user_ids if last_id is None else user_ids.filter(pk__gt=last_id)
+                batch = list(remaining[:batch_size])
+                if not batch:
+                    return
+                yield batch
+                last_id = batch[-1]
+        
+        seen = set()
+        batch = []
+        for recipient in recipients:
+            user_id = getattr(recipient, 'pk', recipient)
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    @classmethod
+    def send_bulk(cls, recipients, content, notification_type, related_task=None, batch_size=BULK_BATCH_SIZE):
+        """
+        Send the same notification to many users
+        
+        The content is rendered once and rows are written with one bulk
+        INSERT (and one unread counter UPDATE) per batch instead of one
+        query per recipient.
+        
+        Args:
+            recipients: RegisteredUser queryset, or iterable of users or user IDs
+            content: Notification content shared by every recipient
+            notification_type: NotificationType of the notifications
+            related_task: Related task (optional)
+            batch_size: Rows inserted per INSERT
+            
+        Returns:
+            int: Number of notifications created
+        """
+        sent_count = 0
+        for user_ids in cls.get_recipient_batches(recipients, batch_size):
+            cls.create_bulk([
+                cls(
+                    user_id=user_id,
+                    content=content,
+                    type=notification_type,
+                    related_task=related_task
+                )
+                for user_id in user_ids
+            ])
+            sent_count += len(user_ids)
+        return sent_count
+    
+    @classmethod
+    def send_task_created_notification(cls, task, radius_km=None):
+        """
+        Notify the users living near a new task
+        
+        Args:
+            task: The created task
+            radius_km: Notification radius (defaults to
+                settings.TASK_CREATED_NOTIFICATION_RADIUS_KM; 0 disables)
+            
+        Returns:
+            int: Number of notifications created
+        """
+        from .user import RegisteredUser
+        
+        if radius_km is None:
+            radius_km = settings.TASK_CREATED_NOTIFICATION_RADIUS_KM
+        if not radius_km or task.latitude is None or task.longitude is None:
+            return 0
+        
+        recipients = RegisteredUser.objects.nearby(
+            task.latitude, task.longitude, radius_km
+        ).filter(is_active=True).exclude(id=task.creator_id)
+        
+        return cls.send_bulk(
+            recipients,
+            content=f"A new task was posted near you: {task.title}",
+            notification_type=NotificationType.TASK_CREATED,
+            related_task=task
+        )
     
     @classmethod
     def send_volunteer_applied_notification(cls, volunteer):
@@ -137,35 +315,53 @@ class Notification(models.Model):
         )
     
     @classmethod
-    def send_task_completed_notification(cls, task):
-        """Send notification when a task is marked as completed"""
+    def get_task_completed_notifications(cls, task, assignee_ids):
+        """
+        Build (unsaved) completion notifications for a task
+        
+        Args:
+            task: The completed task
+            assignee_ids: IDs of the assignees to notify
+            
+        Returns:
+            list of Notification for the creator and each assignee
+        """
         # Notify task creator
-        creator_content = f"Your task '{task.title}' has been marked as completed."
-        cls.send_notification(
-            user=task.creator,
-            content=creator_content,
-            notification_type=NotificationType.TASK_COMPLETED,
+        notifications = [cls(
+            user_id=task.creator_id,
+            content=f"Your task '{task.title}' has been marked as completed.",
+            type=NotificationType.TASK_COMPLETED,
             related_task=task
-        )
+        )]
         
-        # Notify the assignee if exists
-        if task.assignee:
-            assignee_content = f"Task '{task.title}' has been marked as completed."
-            cls.send_notification(
-                user=task.assignee,
+        # Notify the assignees
+        assignee_content = f"Task '{task.title}' has been marked as completed."
+        for assignee_id in assignee_ids:
+            notifications.append(cls(
+                user_id=assignee_id,
                 content=assignee_content,
-                notification_type=NotificationType.TASK_COMPLETED,
+                type=NotificationType.TASK_COMPLETED,
                 related_task=task
-            )
+            ))
+        return notifications
+    
+    @classmethod
+    def send_task_completed_notification(cls, task):
+        """Send notification when a task is marked as completed"""
+        assignee_ids = [task.assignee_id] if task.assignee_id else []
+        cls.create_bulk(cls.get_task_completed_notifications(task, assignee_ids))
+    
+    @classmethod
+    def get_badge_earned_content(cls, badge):
+        """Get the message shown when a user earns a badge"""
+        return f"🎉 Congratulations! You've earned the '{badge.name}' badge! {badge.description}"
     
     @classmethod
     def send_badge_earned_notification(cls, user, badge):
         """Send notification when a user earns a badge"""
-        content = f"🎉 Congratulations! You've earned the '{badge.name}' badge! {badge.description}"
-        
         return cls.send_notification(
             user=user,
-            content=content,
+            content=cls.get_badge_earned_content(badge),
             notification_type=NotificationType.BADGE_EARNED,
             related_task=None
         )
@@ -186,16 +382,27 @@ class Notification(models.Model):
                 related_task=task
             )
         
-        # Notify task assignee if exists and they didn't write the comment
-        if task.assignee and task.assignee != commenter and task.assignee != task.creator:
+        # Notify the assignees who didn't write the comment
+        assignee_ids = task.get_assignee_ids() - {commenter.id, task.creator_id}
+        if assignee_ids:
             content = f"{commenter.username} commented on task '{task.title}': {comment.content[:50]}{'...' if len(comment.content) > 50 else ''}"
-            cls.send_notification(
-                user=task.assignee,
+            cls.send_bulk(
+                sorted(assignee_ids),
                 content=content,
                 notification_type=NotificationType.COMMENT_ADDED,
                 related_task=task
             )
     
+    @classmethod
+    def send_task_cancelled_notification(cls, task):
+        """Send notification to every assignee when the creator cancels a task"""
+        return cls.send_bulk(
+            sorted(task.get_assignee_ids() - {task.creator_id}),
+            content=f"Task '{task.title}' has been cancelled by the creator.",
+            notification_type=NotificationType.TASK_CANCELLED,
+            related_task=task
+        )
+    
     @classmethod
     def send_admin_warning(cls, user, message, admin_user=None):
         """Send an administrative warning to a user"""
@@ -207,4 +414,111 @@ class Notification(models.Model):
             content=content,
             notification_type=NotificationType.ADMIN_WARNING,
             related_task=None
-        )
\ No newline at end of file
+        )
+
+
+class ArchivedNotification(models.Model):
+    """
+    Read notifications moved out of the Notification table after the
+    retention period (see `archive_read_notifications`)
+    
+    Rows keep the ID they had as a Notification.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    content = models.TextField()
+    timestamp = models.DateTimeField()
+    type = models.CharField(
+        max_length=30,
+        choices=NotificationType.choices,
+        default=NotificationType.SYSTEM_NOTIFICATION
+    )
+    is_read = models.BooleanField(default=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    # Foreign Keys
+    user = models.ForeignKey(
+        'RegisteredUser',
+        on_delete=models.CASCADE,
+        related_name='archived_notifications'
+    )
+    related_task = models.ForeignKey(
+        'Task',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='archived_notifications'
+    )
+    
+    # Notifications moved per transaction
+    ARCHIVE_BATCH_SIZE = 1000
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='archived_notif_user_ts_idx'),
+        ]
+    
+    def __str__(self):
+        """Return string representation of archived notification"""
+        return f"{self.type} - {self.timestamp.strftime('%Y-%m-%d %H:%M')} (archived)"
+    
+    @classmethod
+    def archive_read_notifications(cls, older_than, batch_size=ARCHIVE_BATCH_SIZE):
+        """
+        Move read notifications older than a cutoff into the archive
+        
+        Each batch is copied and deleted in its own short transaction,
+        skipping rows other transactions have locked, so users are never
+        blocked for long. Unread notifications are kept whatever their age.
+        
+        Args:
+            older_than: Cutoff datetime; older read notifications are moved
+            batch_size: Notifications moved per transaction
+            
+        Returns:
+            int: Number of notifications archived
+        """
+        archived_count = 0
+        while True:
+            with transaction.atomic():
+                notifications = list(
+                    Notification.objects.select_for_update(skip_locked=True).filter(
+                        is_read=True,
+                        timestamp__lt=older_than
+                    ).order_by('id')[:batch_size]
+                )
+                if not notifications:
+                    return archived_count
+                
+                # Already archived rows (from an interrupted run) are ignored
+                cls.objects.bulk_create([
+                    cls(
+                        id=notification.id,
+                        content=notification.content,
+                        timestamp=notification.timestamp,
+                        type=notification.type,
+                        is_read=notification.is_read,
+                        user_id=notification.user_id,
+                        related_task_id=notification.related_task_id
+                    )
+                    for notification in notifications
+                ], ignore_conflicts=True)
+                Notification.objects.filter(id__in=[notification.id for notification in notifications]).delete()
+            
+            archived_count += len(notifications)
+
+
+
+class TaskNotificationRequest(models.Model):
+    """Queued nearby-user fan-out of a new task, processed by the notification worker"""
+    task = models.ForeignKey(
+        'Task',
+        on_delete=models.CASCADE,
+        related_name='notification_requests'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"Task {self.task_id} created"
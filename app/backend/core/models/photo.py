@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from .media_job import MediaStatus
 import os
 import uuid
 
@@ -16,6 +17,14 @@ def task_photo_path(instance, filename):
 class Photo(models.Model):
     """Model for task photos"""
     url = models.ImageField(upload_to=task_photo_path)
+    # Resized, EXIF-free copies (see ImageService.generate_variants)
+    variants = models.JSONField(default=dict, blank=True)
+    # PENDING while the media worker has not generated the variants yet
+    status = models.CharField(
+        max_length=10,
+        choices=MediaStatus.choices,
+        default=MediaStatus.READY
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     # Foreign Key
@@ -46,21 +55,45 @@ class Photo(models.Model):
         """Get upload timestamp"""
         return self.uploaded_at
     
+    def get_variants(self):
+        """Get the variant manifest"""
+        return self.variants
+    
+    def get_status(self):
+        """Get the processing status"""
+        return self.status
+    
     # Business logic methods
     @classmethod
     def upload_photo(cls, task, image_file):
-        """Upload a new photo for a task"""
-        photo = cls(task=task, url=image_file)
-        photo.save()
+        """
+        Upload a new photo for a task and request its variants
+        
+        With MEDIA_PROCESSING_MODE "deferred" the photo stays PENDING until
+        the media worker has generated them.
+        """
+        from core.services.media_service import MediaService
+        
+        photo = cls(task=task, url=image_file, status=MediaStatus.PENDING)
+        # The stored file's reference is counted in the same transaction
+        with transaction.atomic():
+            photo.save()
+        MediaService.request_processing(photo)
         return photo
     
-    def delete_photo(self):
-        """Delete this photo"""
-        # Delete the actual file
-        if self.url:
-            if os.path.isfile(self.url.path):
-                os.remove(self.url.path)
+    def generate_variants(self, saved_names=None):
+        """(Re)generate the resized variants of the photo"""
+        from core.services.image_service import ImageService
         
-        # Delete the database record
-        self.delete()
+        old_variants = self.variants
+        with transaction.atomic():
+            self.variants = ImageService.generate_variants(self.url, saved_names) if self.url else {}
+            self.status = MediaStatus.READY if self.variants or not self.url else MediaStatus.FAILED
+            self.save(update_fields=['variants', 'status'])
+            ImageService.delete_variants(old_variants)
+    
+    def delete_photo(self):
+        """Delete this photo; its files are released by the post_delete signal"""
+        with transaction.atomic():
+            self.delete()
         return True
\ No newline at end of file
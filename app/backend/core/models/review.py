@@ -1,11 +1,19 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Avg
 
 
 class Review(models.Model):
     """Model for user reviews with detailed ratings"""
     
+    # Fields behind the reviewee's rating, statistics and review badges
+    RATING_FIELDS = (
+        'score',
+        'reliability',
+        'task_completion',
+        'communication_requester_to_volunteer',
+        'safety_and_respect',
+    )
+    
     # Common fields
     comment = models.TextField(blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
@@ -92,6 +100,21 @@ class Review(models.Model):
     def __str__(self):
         return f"Review by {self.reviewer.username} for {self.reviewee.username} ({self.score}/5)"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the stored ratings so edits can be applied as deltas
+        
+        Read from the loaded values only: a deferred rating field would
+        otherwise be fetched here. Without all of them the snapshot is None
+        and a later save recounts the reviewee's totals instead.
+        """
+        instance = super().from_db(db, field_names, values)
+        ratings = {field: instance.__dict__.get(field) for field in cls.RATING_FIELDS}
+        loaded = all(field in instance.__dict__ for field in cls.RATING_FIELDS)
+        instance._loaded_ratings = ratings if loaded else None
+        return instance
+    
     def save(self, *args, **kwargs):
         """Calculate overall score before saving"""
         # If score was explicitly set, use it (for backward compatibility)
@@ -146,6 +169,10 @@ class Review(models.Model):
     def get_task(self):
         return self.task
     
+    def get_ratings(self):
+        """Get the overall score and requester -> volunteer ratings"""
+        return {field: getattr(self, field) for field in self.RATING_FIELDS}
+    
     def is_volunteer_to_requester_review(self):
         """Check if this is a volunteer reviewing a requester"""
         return self.accuracy_of_request is not None
@@ -262,11 +289,12 @@ class Review(models.Model):
         return review
     
     def update_user_rating(self):
-        """Update the reviewee's overall rating based on all reviews"""
-        reviewee = self.reviewee
-        avg_rating = Review.objects.filter(
-            reviewee=reviewee
-        ).aggregate(Avg('score'))['score__avg'] or 0.0
+        """
+        Refresh the reviewee's overall rating
         
-        reviewee.set_rating(avg_rating)
-        return avg_rating
\ No newline at end of file
+        The review signals keep the reviewee's review totals in UserStats
+        and the rating derived from them current, so this only reloads it.
+        """
+        reviewee = self.reviewee
+        reviewee.refresh_from_db(fields=['rating'])
+        return reviewee.rating
\ No newline at end of file
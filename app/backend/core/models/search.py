@@ -1,7 +1,13 @@
-from django.db.models import Q
+import re
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from .task import Task, TaskCategory
 from .user import RegisteredUser
+from core.services.geocoding import GeocodingService
 
 
 class Search:
@@ -10,13 +16,105 @@ class Search:
     for searching tasks and users
     """
     
+    # Text search configuration of the Task.search_vector trigger (migration 0012)
+    SEARCH_CONFIG = 'english'
+    
+    # Keyword search modes:
+    # - contains: substring match on title/description (no index, legacy default)
+    # - fulltext: ranked match against Task.search_vector (GIN indexed)
+    # - prefix: like fulltext, but every word also matches as a prefix (type-ahead)
+    SEARCH_MODE_CONTAINS = 'contains'
+    SEARCH_MODE_FULLTEXT = 'fulltext'
+    SEARCH_MODE_PREFIX = 'prefix'
+    SEARCH_MODES = [SEARCH_MODE_CONTAINS, SEARCH_MODE_FULLTEXT, SEARCH_MODE_PREFIX]
+    
+    # User search modes:
+    # - contains: substring match on name/surname/username (legacy default)
+    # - fuzzy: pg_trgm similarity match, ranked by closeness (GIN indexed, migration 0013)
+    SEARCH_MODE_FUZZY = 'fuzzy'
+    USER_SEARCH_MODES = [SEARCH_MODE_CONTAINS, SEARCH_MODE_FUZZY]
+    USER_SEARCH_FIELDS = ['name', 'surname', 'username']
+    
+    # Whether pg_trgm is installed; looked up once per process
+    _trigram_available = None
+    
+    @staticmethod
+    def uses_search_vector(search_mode):
+        """
+        Check if a search mode is served by the tsvector index
+        
+        Full-text modes need PostgreSQL; on other databases (e.g. SQLite
+        test runs) they fall back to the substring search.
+        """
+        return (
+            search_mode in [Search.SEARCH_MODE_FULLTEXT, Search.SEARCH_MODE_PREFIX]
+            and connection.vendor == 'postgresql'
+        )
+    
+    @staticmethod
+    def build_search_query(keyword, search_mode=SEARCH_MODE_FULLTEXT):
+        """
+        Build the SearchQuery for a keyword
+        
+        Args:
+            keyword: Search term
+            search_mode: 'fulltext' or 'prefix'
+            
+        Returns:
+            SearchQuery, or None if the keyword has no searchable words
+        """
+        if search_mode == Search.SEARCH_MODE_PREFIX:
+            # Only word characters reach the raw tsquery, so user input cannot
+            # inject tsquery operators
+            words = re.findall(r'\w+', keyword)
+            if not words:
+                return None
+            return SearchQuery(
+                ' & '.join(f'{word}:*' for word in words),
+                config=Search.SEARCH_CONFIG,
+                search_type='raw'
+            )
+        return SearchQuery(keyword, config=Search.SEARCH_CONFIG)
+    
     @staticmethod
-    def search_by_keyword(keyword):
+    def filter_tasks_by_keyword(queryset, keyword, search_mode=SEARCH_MODE_CONTAINS):
+        """
+        Filter a task queryset by keyword in title or description
+        
+        Full-text modes also annotate each task with `search_rank`.
+        
+        Args:
+            queryset: Task QuerySet to filter
+            keyword: Search term
+            search_mode: One of Search.SEARCH_MODES
+            
+        Returns:
+            Filtered QuerySet of Task objects
+        """
+        if Search.uses_search_vector(search_mode):
+            query = Search.build_search_query(keyword, search_mode)
+            if query is None:
+                return queryset.annotate(
+                    search_rank=Value(0.0, output_field=FloatField())
+                ).none()
+            return queryset.filter(search_vector=query).annotate(
+                search_rank=SearchRank(F('search_vector'), query)
+            )
+        
+        return queryset.filter(
+            Q(title__icontains=keyword) | 
+            Q(description__icontains=keyword)
+        )
+    
+    @staticmethod
+    def search_by_keyword(keyword, search_mode=SEARCH_MODE_CONTAINS):
         """
         Search tasks by keyword in title or description
         
         Args:
             keyword: Search term
+            search_mode: One of Search.SEARCH_MODES; full-text modes
+                return the best matches first
             
         Returns:
             QuerySet of matching Task objects
@@ -24,12 +122,16 @@ class Search:
         if not keyword:
             return Task.objects.none()
         
-        return Task.objects.filter(
-            Q(title__icontains=keyword) | 
-            Q(description__icontains=keyword)
+        query = Search.filter_tasks_by_keyword(
+            Task.objects.all(), keyword, search_mode
         ).filter(
             deadline__gt=timezone.now()
         )
+        
+        if Search.uses_search_vector(search_mode):
+            query = query.order_by('-search_rank', 'deadline')
+        
+        return query
     
     @staticmethod
     def search_by_location(location):
@@ -93,12 +195,68 @@ class Search:
         return query
     
     @staticmethod
-    def search_users(keyword):
+    def trigram_search_available():
+        """
+        Check if the fuzzy user search can use pg_trgm
+        
+        Returns False on databases other than PostgreSQL and on PostgreSQL
+        servers where the extension is not installed.
+        """
+        if connection.vendor != 'postgresql':
+            return False
+        
+        if Search._trigram_available is None:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                Search._trigram_available = cursor.fetchone() is not None
+        
+        return Search._trigram_available
+    
+    @staticmethod
+    def filter_users_by_keyword(queryset, keyword, search_mode=SEARCH_MODE_CONTAINS):
+        """
+        Filter a user queryset by keyword in name, surname, or username
+        
+        Results are ordered best match first. The fuzzy mode also annotates
+        each user with `search_similarity`; without pg_trgm it falls back
+        to the substring search.
+        
+        Args:
+            queryset: RegisteredUser QuerySet to filter
+            keyword: Search term
+            search_mode: One of Search.USER_SEARCH_MODES
+            
+        Returns:
+            Filtered QuerySet of RegisteredUser objects
+        """
+        if search_mode == Search.SEARCH_MODE_FUZZY and Search.trigram_search_available():
+            matches = Q()
+            for field in Search.USER_SEARCH_FIELDS:
+                matches |= Q(**{f'{field}__trigram_similar': keyword})
+            
+            return queryset.filter(matches).annotate(
+                search_similarity=Greatest(*[
+                    TrigramSimilarity(field, keyword)
+                    for field in Search.USER_SEARCH_FIELDS
+                ])
+            ).order_by('-search_similarity', 'id')
+        
+        return queryset.filter(
+            Q(name__icontains=keyword) | 
+            Q(surname__icontains=keyword) | 
+            Q(username__icontains=keyword)
+        ).order_by('id')
+    
+    @staticmethod
+    def search_users(keyword, search_mode=SEARCH_MODE_CONTAINS, limit=None):
         """
         Search users by name, surname, or username
         
         Args:
             keyword: Search term
+            search_mode: One of Search.USER_SEARCH_MODES
+            limit: Maximum number of results, defaults to
+                settings.USER_SEARCH_MAX_RESULTS
             
         Returns:
             QuerySet of matching RegisteredUser objects
@@ -106,11 +264,12 @@ class Search:
         if not keyword:
             return RegisteredUser.objects.none()
         
-        return RegisteredUser.objects.filter(
-            Q(name__icontains=keyword) | 
-            Q(surname__icontains=keyword) | 
-            Q(username__icontains=keyword)
-        )
+        if limit is None:
+            limit = settings.USER_SEARCH_MAX_RESULTS
+        
+        return Search.filter_users_by_keyword(
+            RegisteredUser.objects.all(), keyword, search_mode
+        )[:limit]
     
     @staticmethod
     def filter_by_rating(min_rating):
@@ -145,29 +304,41 @@ class Search:
         ).order_by(order_by)
     
     @staticmethod
-    def sort_by_proximity(location):
+    def sort_by_proximity(location, radius_km=None):
         """
         Sort tasks by proximity to a location
-        This is a placeholder as real geo-sorting would require
-        geocoding and distance calculations
+        
+        The location is resolved with the offline geocoder; tasks within
+        `radius_km` are returned nearest first with `distance_km` annotated.
+        Locations the gazetteer does not know fall back to a text match.
         
         Args:
             location: Reference location
+            radius_km: Search radius, defaults to
+                settings.TASK_NEARBY_DEFAULT_RADIUS_KM
             
         Returns:
             QuerySet of Task objects
         """
-        # In a real implementation, this would use geocoding and geospatial queries
-        # For now, just return tasks that contain the location string
-        return Task.objects.filter(
-            location__icontains=location
-        ).filter(
+        coordinates = GeocodingService.geocode(location)
+        if coordinates is None:
+            return Task.objects.filter(
+                location__icontains=location
+            ).filter(
+                deadline__gt=timezone.now()
+            )
+        
+        if radius_km is None:
+            radius_km = settings.TASK_NEARBY_DEFAULT_RADIUS_KM
+        
+        return Task.objects.nearby(*coordinates, radius_km).filter(
             deadline__gt=timezone.now()
-        )
+        ).order_by('distance_km', 'deadline')
     
     @staticmethod
     def complex_search(keywords=None, location=None, category=None, 
-                      tags=None, min_rating=None, sort_by='deadline'):
+                      tags=None, min_rating=None, sort_by='deadline',
+                      search_mode=SEARCH_MODE_CONTAINS):
         """
         Combined search with multiple criteria
         
@@ -177,7 +348,8 @@ class Search:
             category: TaskCategory value
             tags: List of tag names
             min_rating: Minimum creator rating
-            sort_by: Field to sort by ('deadline', 'rating', 'location')
+            sort_by: Field to sort by ('deadline', 'rating', 'location', 'relevance')
+            search_mode: How keywords are matched, one of Search.SEARCH_MODES
             
         Returns:
             QuerySet of matching Task objects
@@ -190,10 +362,7 @@ class Search:
         
         # Apply filters one by one
         if keywords:
-            query = query.filter(
-                Q(title__icontains=keywords) | 
-                Q(description__icontains=keywords)
-            )
+            query = Search.filter_tasks_by_keyword(query, keywords, search_mode)
             
         if location:
             query = query.filter(location__icontains=location)
@@ -211,16 +380,24 @@ class Search:
         # Apply sorting
         if sort_by == 'rating':
             query = query.order_by('-creator__rating', 'deadline')
-        elif sort_by == 'location':
-            # Simplified location sorting
-            if location:
-                # Prioritize exact matches first
-                query = sorted(
-                    query,
-                    key=lambda t: 0 if t.location.lower() == location.lower() else 1
+        elif sort_by == 'relevance' and keywords and Search.uses_search_vector(search_mode):
+            query = query.order_by('-search_rank', 'deadline')
+        elif sort_by == 'location' and location:
+            coordinates = GeocodingService.geocode(location)
+            if coordinates is not None:
+                # Nearest first; tasks without coordinates go last
+                query = query.with_distance(*coordinates).order_by(
+                    F('distance_km').asc(nulls_last=True), 'deadline'
                 )
             else:
-                query = query.order_by('deadline')
+                # Prioritize exact matches first
+                query = query.annotate(
+                    exact_location=Case(
+                        When(location__iexact=location, then=Value(0)),
+                        default=Value(1),
+                        output_field=IntegerField()
+                    )
+                ).order_by('exact_location', 'deadline')
         else:  # Default: deadline
             query = query.order_by('deadline')
             
@@ -1,5 +1,8 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
+from core.services.geocoding import GeocodingService
 
 
 class TaskCategory(models.TextChoices):
@@ -22,6 +25,52 @@ class TaskStatus(models.TextChoices):
     EXPIRED = 'EXPIRED', 'Expired'
 
 
+class TaskQuerySet(models.QuerySet):
+    """Custom queryset for tasks"""
+    
+    def with_serializer_relations(self, viewer=None):
+        """
+        Load everything TaskSerializer reads in a fixed number of queries
+        
+        Creator and legacy assignee are prefetched with their profile stats
+        annotated for `viewer`, assignees and photos are prefetched (photos
+        ordered by id so the first one is the primary photo), so serializing
+        a page costs the same regardless of its size.
+        """
+        from .photo import Photo
+        from .user import RegisteredUser
+        return self.prefetch_related(
+            models.Prefetch('creator', queryset=RegisteredUser.objects.with_profile_stats(viewer)),
+            models.Prefetch('assignee', queryset=RegisteredUser.objects.with_profile_stats(viewer)),
+            'assignees',
+            models.Prefetch('photos', queryset=Photo.objects.order_by('id')),
+        )
+    
+    def with_distance(self, latitude, longitude):
+        """
+        Annotate `distance_km` from a point, computed in the database
+        
+        Uses the haversine formula; tasks without coordinates get NULL.
+        """
+        return self.annotate(distance_km=GeocodingService.distance_expression(latitude, longitude))
+    
+    def nearby(self, latitude, longitude, radius_km):
+        """
+        Filter tasks within `radius_km` of a point and annotate `distance_km`
+        
+        Candidates are narrowed with the indexed geohash column first, then
+        the exact distance is filtered in the database, so callers can
+        order by `distance_km` and paginate.
+        """
+        in_cells = models.Q()
+        for cell in GeocodingService.geohash_cells_for_radius(latitude, longitude, radius_km):
+            in_cells |= models.Q(geohash__startswith=cell)
+        
+        return self.filter(in_cells).with_distance(
+            latitude, longitude
+        ).filter(distance_km__lte=radius_km)
+
+
 class Task(models.Model):
     """Model for assistance tasks"""
     title = models.CharField(max_length=255)
@@ -44,6 +93,14 @@ class Task(models.Model):
     is_recurring = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted title/description tsvector, maintained by a database trigger
+    # on PostgreSQL and backed by a GIN index (see migration 0012)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    # Coordinates resolved from `location` by the offline geocoder on save;
+    # the geohash is the grid cell index behind radius queries
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
     
     # Foreign Keys
     creator = models.ForeignKey(
@@ -65,9 +122,50 @@ class Task(models.Model):
         related_name='assigned_tasks_multiple'
     )
     
+    objects = TaskQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Serves the expiry sweep and the "still open" filter on task lists
+            models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+        ]
+    
     def __str__(self):
         """Return string representation of task"""
         return self.title
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the stored ranked fields so cached feeds are only dropped when they change"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_ranking = instance.get_ranking_values()
+        return instance
+    
+    def get_ranking_values(self):
+        """Loaded values of the fields ranked feeds depend on (see Feed.RANKED_TASK_FIELDS)"""
+        from .feed import Feed
+        
+        attnames = {self._meta.get_field(name).attname for name in Feed.RANKED_TASK_FIELDS}
+        # Read from __dict__ so deferred fields are not fetched
+        return {attname: self.__dict__[attname] for attname in attnames if attname in self.__dict__}
+    
+    def save(self, *args, **kwargs):
+        """Save the task, geocoding its location when it is being written"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'location' in update_fields:
+            self.update_coordinates()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude', 'geohash'}
+        super().save(*args, **kwargs)
+    
+    def update_coordinates(self):
+        """Resolve latitude, longitude and geohash from the location text"""
+        coordinates = GeocodingService.geocode(self.location)
+        if coordinates is None:
+            self.latitude, self.longitude, self.geohash = None, None, ''
+        else:
+            self.latitude, self.longitude = coordinates
+            self.geohash = GeocodingService.encode_geohash(*coordinates)
 
     # Getters
     def get_task_id(self):
@@ -126,6 +224,13 @@ class Task(models.Model):
         """Get all task assignees"""
         return self.assignees.all()
     
+    def get_assignee_ids(self):
+        """Get the IDs of all assignees, including the main assignee (backward compatibility)"""
+        assignee_ids = set(self.assignees.values_list('id', flat=True))
+        if self.assignee_id:
+            assignee_ids.add(self.assignee_id)
+        return assignee_ids
+    
     def get_assigned_volunteers(self):
         """Get all accepted volunteers for this task"""
         from .volunteer import Volunteer, VolunteerStatus
@@ -143,57 +248,57 @@ class Task(models.Model):
     def set_title(self, title):
         """Set task title"""
         self.title = title
-        self.save()
+        self.save(update_fields=['title', 'updated_at'])
     
     def set_description(self, description):
         """Set task description"""
         self.description = description
-        self.save()
+        self.save(update_fields=['description', 'updated_at'])
     
     def set_category(self, category):
         """Set task category"""
         self.category = category
-        self.save()
+        self.save(update_fields=['category', 'updated_at'])
     
     def set_location(self, location):
         """Set task location"""
         self.location = location
-        self.save()
+        self.save(update_fields=['location', 'updated_at'])
     
     def set_deadline(self, deadline):
         """Set task deadline"""
         self.deadline = deadline
-        self.save()
+        self.save(update_fields=['deadline', 'updated_at'])
     
     def set_requirements(self, requirements):
         """Set task requirements"""
         self.requirements = requirements
-        self.save()
+        self.save(update_fields=['requirements', 'updated_at'])
     
     def set_urgency_level(self, level):
         """Set task urgency level"""
         self.urgency_level = level
-        self.save()
+        self.save(update_fields=['urgency_level', 'updated_at'])
     
     def set_volunteer_number(self, number):
         """Set required number of volunteers"""
         self.volunteer_number = number
-        self.save()
+        self.save(update_fields=['volunteer_number', 'updated_at'])
     
     def set_status(self, status):
         """Set task status"""
         self.status = status
-        self.save()
+        self.save(update_fields=['status', 'updated_at'])
     
     def set_recurring(self, is_recurring):
         """Set whether task is recurring"""
         self.is_recurring = is_recurring
-        self.save()
+        self.save(update_fields=['is_recurring', 'updated_at'])
     
     def set_assignee(self, assignee):
         """Set task assignee (for backward compatibility)"""
         self.assignee = assignee
-        self.save()
+        self.save(update_fields=['assignee', 'updated_at'])
     
     def add_assignee(self, assignee):
         """Add an assignee to the task"""
@@ -201,7 +306,7 @@ class Task(models.Model):
         # Also set the single assignee field for backward compatibility
         if not self.assignee:
             self.assignee = assignee
-            self.save()
+            self.save(update_fields=['assignee', 'updated_at'])
         
         # Update status based on assignee count
         self.update_status_based_on_assignees()
@@ -213,7 +318,7 @@ class Task(models.Model):
         if self.assignee == assignee:
             remaining_assignees = self.assignees.all()
             self.assignee = remaining_assignees.first() if remaining_assignees.exists() else None
-            self.save()
+            self.save(update_fields=['assignee', 'updated_at'])
         
         # Update status based on assignee count
         self.update_status_based_on_assignees()
@@ -222,7 +327,7 @@ class Task(models.Model):
         """Clear all assignees"""
         self.assignees.clear()
         self.assignee = None
-        self.save()
+        self.save(update_fields=['assignee', 'updated_at'])
         
         # Update status based on assignee count
         self.update_status_based_on_assignees()
@@ -247,22 +352,50 @@ class Task(models.Model):
     def cancel_task(self):
         """Cancel the task"""
         self.status = TaskStatus.CANCELLED
-        self.save()
+        self.save(update_fields=['status', 'updated_at'])
         return True
     
-    def confirm_completion(self):
-        """Mark task as completed"""
-        self.status = TaskStatus.COMPLETED
-        self.save()
+    def confirm_completion(self, notify=False, from_statuses=None):
+        """
+        Mark task as completed
+        
+        Runs as one transaction: the status change, a single UPDATE adding
+        one to every assignee's completed task count and, with notify, one
+        bulk insert of the completion notifications. The stored status is
+        checked under a row lock first, so concurrent requests complete the
+        task (and count it) only once.
         
-        # Update all assignees' completed task count
-        assignees = self.get_assignees()
-        for assignee in assignees:
-            assignee.increment_completed_task_count()
+        Args:
+            notify: Also notify the creator and every assignee
+            from_statuses: Statuses the task may be completed from (any but COMPLETED by default)
+            
+        Returns:
+            bool: Whether the task was completed; if not, `status` holds the stored status
+        """
+        from .user import RegisteredUser
+        from .notification import Notification
         
-        # Also update the main assignee if set (backward compatibility)
-        if self.assignee and self.assignee not in assignees:
-            self.assignee.increment_completed_task_count()
+        with transaction.atomic():
+            current_status = Task.objects.select_for_update().values_list(
+                'status', flat=True
+            ).get(id=self.id)
+            if current_status == TaskStatus.COMPLETED or (
+                    from_statuses is not None and current_status not in from_statuses):
+                self.status = current_status
+                return False
+            
+            self.status = TaskStatus.COMPLETED
+            self.save(update_fields=['status', 'updated_at'])
+            
+            assignee_ids = self.get_assignee_ids()
+            RegisteredUser.objects.filter(id__in=assignee_ids).update(
+                completed_task_count=F('completed_task_count') + 1
+            )
+            
+            if notify:
+                Notification.create_bulk(
+                    Notification.get_task_completed_notifications(self, sorted(assignee_ids))
+                )
         
         return True
     
@@ -276,10 +409,36 @@ class Task(models.Model):
         """Check if task has expired"""
         if self.deadline < timezone.now() and self.status == TaskStatus.POSTED:
             self.status = TaskStatus.EXPIRED
-            self.save()
+            self.save(update_fields=['status', 'updated_at'])
             return True
         return False
     
+    @classmethod
+    def expire_overdue_tasks(cls, now=None):
+        """
+        Expire every POSTED task whose deadline has passed
+        
+        Runs as a single set-based UPDATE instead of one save() per task,
+        so post_save signals are not fired for the expired rows; cached
+        feeds are invalidated here instead.
+        
+        Args:
+            now: Reference time (defaults to timezone.now())
+            
+        Returns:
+            int: Number of tasks that were expired
+        """
+        from .feed import Feed
+        now = now or timezone.now()
+        expired_count = cls.objects.filter(
+            status=TaskStatus.POSTED,
+            deadline__lt=now
+        ).update(status=TaskStatus.EXPIRED, updated_at=now)
+        
+        if expired_count:
+            Feed.invalidate_all()
+        return expired_count
+    
     def update_status_based_on_assignees(self):
         """Update task status based on assignee count"""
         current_assignee_count = self.assignees.count()
@@ -288,13 +447,13 @@ class Task(models.Model):
         if current_assignee_count < 1:
             if self.status == TaskStatus.ASSIGNED:
                 self.status = TaskStatus.POSTED
-                self.save()
+                self.save(update_fields=['status', 'updated_at'])
                 return True
         # If we have at least one assignee, status should be ASSIGNED
         elif current_assignee_count >= 1:
             if self.status == TaskStatus.POSTED:
                 self.status = TaskStatus.ASSIGNED
-                self.save()
+                self.save(update_fields=['status', 'updated_at'])
                 return True
 
         return False
\ No newline at end of file
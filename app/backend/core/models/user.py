@@ -1,5 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Prefetch, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from core.services.geocoding import GeocodingService
+from .media_job import MediaStatus
 import os
 import uuid
 
@@ -14,9 +18,93 @@ def user_profile_photo_path(instance, filename):
     return os.path.join('profile_photos', str(instance.id), filename)
 
 
+class UserQuerySet(models.QuerySet):
+    """Custom queryset for user profiles"""
+    
+    # Number of most recent badges shown on a serialized profile
+    PROFILE_BADGE_LIMIT = 10
+    
+    def with_profile_stats(self, viewer=None):
+        """
+        Annotate the counters UserSerializer shows and prefetch recent badges
+        
+        Adds followers_count, following_count, badges_count and
+        viewer_is_following (whether `viewer` follows each user) as
+        correlated subqueries, and prefetches earned badges newest first into
+        `profile_badges`. A user can hold each badge type at most once, so
+        the prefetch is bounded by the number of badge types.
+        
+        Args:
+            viewer: User whose follow relationship is checked (optional)
+            
+        Returns:
+            Annotated QuerySet of RegisteredUser objects
+        """
+        from .user_follows import UserFollows
+        from .badge import UserBadge
+        
+        def count_of(queryset, field):
+            """Correlated COUNT(*) of `queryset` rows pointing at the outer user"""
+            counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field)
+            return Coalesce(
+                Subquery(counts.annotate(total=Count('*')).values('total'), output_field=models.IntegerField()),
+                0
+            )
+        
+        if viewer is not None and viewer.is_authenticated:
+            viewer_is_following = Exists(
+                UserFollows.objects.filter(follower_id=viewer.pk, following=OuterRef('pk'))
+            )
+        else:
+            viewer_is_following = Value(False, output_field=models.BooleanField())
+        
+        return self.annotate(
+            followers_count=count_of(UserFollows.objects.all(), 'following'),
+            following_count=count_of(UserFollows.objects.all(), 'follower'),
+            badges_count=count_of(UserBadge.objects.all(), 'user'),
+            viewer_is_following=viewer_is_following,
+        ).prefetch_related(
+            Prefetch(
+                'earned_badges',
+                queryset=UserBadge.objects.select_related('badge').order_by('-earned_at'),
+                to_attr='profile_badges'
+            )
+        )
+    
+    def nearby(self, latitude, longitude, radius_km):
+        """
+        Filter users within `radius_km` of a point and annotate `distance_km`
+        
+        Candidates are narrowed to the circle's bounding box with the
+        indexed coordinates first, then the exact distance is filtered in
+        the database. Users without coordinates are excluded.
+        """
+        lat_delta, lon_delta = GeocodingService.bounding_box_deltas(latitude, radius_km)
+        queryset = self.filter(latitude__range=(latitude - lat_delta, latitude + lat_delta))
+        # A box crossing the antimeridian is left to the exact distance filter
+        if -180.0 <= longitude - lon_delta and longitude + lon_delta <= 180.0:
+            queryset = queryset.filter(longitude__range=(longitude - lon_delta, longitude + lon_delta))
+        
+        return queryset.annotate(
+            distance_km=GeocodingService.distance_expression(latitude, longitude)
+        ).filter(distance_km__lte=radius_km)
+
+
 class UserManager(BaseUserManager):
     """Manager for user profiles"""
     
+    def get_queryset(self):
+        """Return the custom user queryset"""
+        return UserQuerySet(self.model, using=self._db)
+    
+    def with_profile_stats(self, viewer=None):
+        """Shortcut for UserQuerySet.with_profile_stats"""
+        return self.get_queryset().with_profile_stats(viewer)
+    
+    def nearby(self, latitude, longitude, radius_km):
+        """Shortcut for UserQuerySet.nearby"""
+        return self.get_queryset().nearby(latitude, longitude, radius_km)
+    
     def create_user(self, email, name, surname, username, phone_number, password=None, is_staff=False, **extra_fields):
         """Create a new user profile"""
         if not email:
@@ -60,19 +148,37 @@ class RegisteredUser(AbstractBaseUser, PermissionsMixin):
     """Database model for users in the system"""
     class Meta:
         app_label = 'core'
+        indexes = [
+            # Bounding-box prefilter of UserQuerySet.nearby
+            models.Index(fields=['latitude', 'longitude'], name='user_lat_lon_idx'),
+        ]
     email = models.EmailField(max_length=255, unique=True)
     name = models.CharField(max_length=255)
     surname = models.CharField(max_length=255)
     username = models.CharField(max_length=255, unique=True)
     phone_number = models.CharField(max_length=20)
     location = models.CharField(max_length=255, blank=True)
+    # Coordinates resolved from `location` by the offline geocoder on save
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    # Average received review score, derived from the review totals in UserStats
     rating = models.FloatField(default=0.0)
     completed_task_count = models.IntegerField(default=0)
+    # Number of unread notifications, kept in step by Notification
+    unread_notification_count = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     reset_token = models.CharField(max_length=100, null=True, blank=True)
     reset_token_expiry = models.DateTimeField(null=True, blank=True)
     profile_photo = models.ImageField(upload_to=user_profile_photo_path, null=True, blank=True)
+    # Resized, EXIF-free copies of the profile photo (see ImageService.generate_variants)
+    profile_photo_variants = models.JSONField(default=dict, blank=True)
+    # PENDING while the media worker has not generated the variants yet
+    profile_photo_status = models.CharField(
+        max_length=10,
+        choices=MediaStatus.choices,
+        default=MediaStatus.READY
+    )
     
     objects = UserManager()
     
@@ -98,6 +204,20 @@ class RegisteredUser(AbstractBaseUser, PermissionsMixin):
         """Return string representation of user"""
         return self.email
     
+    def save(self, *args, **kwargs):
+        """Save the user, geocoding their location when it is being written"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'location' in update_fields:
+            self.update_coordinates()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude'}
+        super().save(*args, **kwargs)
+    
+    def update_coordinates(self):
+        """Resolve latitude and longitude from the location text"""
+        coordinates = GeocodingService.geocode(self.location)
+        self.latitude, self.longitude = coordinates if coordinates is not None else (None, None)
+    
     # Getters
     def get_name(self):
         """Get user's name"""
@@ -131,51 +251,154 @@ class RegisteredUser(AbstractBaseUser, PermissionsMixin):
         """Get user's completed task count"""
         return self.completed_task_count
     
+    def get_unread_notification_count(self):
+        """Get user's number of unread notifications"""
+        return self.unread_notification_count
+    
     # Setters
     def set_name(self, name):
         """Set user's name"""
         self.name = name
-        self.save()
+        self.save(update_fields=['name'])
     
     def set_surname(self, surname):
         """Set user's surname"""
         self.surname = surname
-        self.save()
+        self.save(update_fields=['surname'])
     
     def set_username(self, username):
         """Set user's username"""
         self.username = username
-        self.save()
+        self.save(update_fields=['username'])
     
     def set_email(self, email):
         """Set user's email"""
         self.email = email
-        self.save()
+        self.save(update_fields=['email'])
     
     def set_phone_number(self, phone_number):
         """Set user's phone number"""
         self.phone_number = phone_number
-        self.save()
+        self.save(update_fields=['phone_number'])
     
     def set_location(self, location):
         """Set user's location"""
         self.location = location
-        self.save()
+        self.save(update_fields=['location'])
     
     def set_rating(self, rating):
         """Set user's rating"""
         self.rating = rating
-        self.save()
+        self.save(update_fields=['rating'])
+    
+    @classmethod
+    def recalculate_rating(cls, user_id):
+        """
+        Re-derive a user's rating from their review totals in UserStats
+        
+        Runs as a single UPDATE reading the current totals, so concurrent
+        reviews of the same user cannot leave a stale rating behind. A user
+        without a stats row gets it built first.
+        """
+        from .user_stats import UserStats
+        
+        average = UserStats.objects.filter(user_id=OuterRef('id')).annotate(
+            average_score=Case(
+                When(review_count__gt=0, then=F('score_sum') / F('review_count')),
+                default=Value(0.0),
+                output_field=models.FloatField()
+            )
+        ).values('average_score')[:1]
+        updated = cls.objects.filter(id=user_id).filter(
+            Exists(UserStats.objects.filter(user_id=OuterRef('id')))
+        ).update(rating=Subquery(average))
+        if not updated:
+            stats = UserStats.get_for_users([user_id])[user_id]
+            cls.objects.filter(id=user_id).update(rating=stats.get_average_score())
+    
+    @classmethod
+    def apply_unread_notification_changes(cls, deltas):
+        """
+        Atomically add to the unread notification counters of several users
+        
+        Users sharing the same change are updated by one UPDATE.
+        
+        Args:
+            deltas: dict mapping user ID to the change of their unread count
+        """
+        user_ids_by_delta = {}
+        for user_id, delta in deltas.items():
+            if delta:
+                user_ids_by_delta.setdefault(delta, []).append(user_id)
+        for delta, user_ids in user_ids_by_delta.items():
+            cls.objects.filter(id__in=user_ids).update(
+                unread_notification_count=F('unread_notification_count') + delta
+            )
+    
+    @classmethod
+    def recalculate_unread_notification_count(cls, user_id):
+        """Recount a user's unread notifications"""
+        from .notification import Notification
+        
+        cls.objects.filter(id=user_id).update(
+            unread_notification_count=Notification.objects.filter(user_id=user_id, is_read=False).count()
+        )
+    
+    def set_profile_photo(self, image_file):
+        """Store a new profile photo and request its variants"""
+        from core.services.media_service import MediaService
+        
+        with transaction.atomic():
+            # Release the previous photo; its variants go once the new ones exist
+            if self.profile_photo:
+                self.profile_photo.delete(save=False)
+            self.profile_photo = image_file
+            self.profile_photo_status = MediaStatus.PENDING
+            self.save()
+        MediaService.request_processing(self)
+    
+    def delete_profile_photo(self):
+        """Release the profile photo and its variants and clear the field"""
+        with transaction.atomic():
+            if self.profile_photo:
+                self.profile_photo.delete(save=False)
+            self.delete_profile_photo_variants()
+            self.save(update_fields=['profile_photo', 'profile_photo_variants', 'profile_photo_status'])
+    
+    def generate_profile_photo_variants(self, saved_names=None):
+        """(Re)generate the resized variants of the profile photo"""
+        from core.services.image_service import ImageService
+        
+        old_variants = self.profile_photo_variants
+        with transaction.atomic():
+            self.profile_photo_variants = (
+                ImageService.generate_variants(self.profile_photo, saved_names) if self.profile_photo else {}
+            )
+            self.profile_photo_status = (
+                MediaStatus.READY if self.profile_photo_variants or not self.profile_photo else MediaStatus.FAILED
+            )
+            self.save(update_fields=['profile_photo_variants', 'profile_photo_status'])
+            ImageService.delete_variants(old_variants)
+    
+    def delete_profile_photo_variants(self):
+        """Remove the profile photo variant files; the caller saves the cleared manifest"""
+        from core.services.image_service import ImageService
+        
+        ImageService.delete_variants(self.profile_photo_variants)
+        self.profile_photo_variants = {}
+        self.profile_photo_status = MediaStatus.READY
     
     def set_completed_task_count(self, count):
         """Set user's completed task count"""
         self.completed_task_count = count
-        self.save()
+        self.save(update_fields=['completed_task_count'])
     
     def increment_completed_task_count(self):
         """Increment user's completed task count by 1"""
-        self.completed_task_count += 1
-        self.save()
+        RegisteredUser.objects.filter(id=self.id).update(
+            completed_task_count=F('completed_task_count') + 1
+        )
+        self.refresh_from_db(fields=['completed_task_count'])
     
     # Business logic methods as per class diagram
     def login(self, email, password):
@@ -0,0 +1,336 @@
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+
+
+class UserStats(models.Model):
+    """
+    Running per-user counters behind badge checks and ratings
+
+    Rows are kept current by signal handlers (core/signals.py) applying
+    F() increments as volunteer records, tasks, reviews and follows change.
+    A missing row means the counters were never built for that user; it is
+    computed from scratch on first read. Changes the counters do not follow
+    (e.g. editing the category of a task with accepted volunteers) are
+    fixed by `manage.py rebuild_user_stats`.
+    """
+    user = models.OneToOneField(
+        'RegisteredUser',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+
+    # Accepted volunteering
+    accepted_volunteer_count = models.IntegerField(default=0)
+    distinct_requester_count = models.IntegerField(default=0)
+    distinct_category_count = models.IntegerField(default=0)
+
+    # Created tasks and followers
+    created_task_count = models.IntegerField(default=0)
+    follower_count = models.IntegerField(default=0)
+
+    # Received reviews; each criterion counts only reviews that rated it
+    review_count = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    reliability_count = models.IntegerField(default=0)
+    reliability_sum = models.FloatField(default=0.0)
+    task_completion_count = models.IntegerField(default=0)
+    task_completion_sum = models.FloatField(default=0.0)
+    communication_count = models.IntegerField(default=0)
+    communication_sum = models.FloatField(default=0.0)
+    safety_and_respect_count = models.IntegerField(default=0)
+    safety_and_respect_sum = models.FloatField(default=0.0)
+    great_communication_count = models.IntegerField(default=0)
+    perfect_review_count = models.IntegerField(default=0)
+
+    # Review rating fields mapped to their counter prefix
+    REVIEW_CRITERIA = {
+        'reliability': 'reliability',
+        'task_completion': 'task_completion',
+        'communication_requester_to_volunteer': 'communication',
+        'safety_and_respect': 'safety_and_respect',
+    }
+
+    # Communication rating that counts as great
+    GREAT_COMMUNICATION_SCORE = 4.5
+
+    # Users recomputed together by rebuild_all
+    REBUILD_BATCH_SIZE = 1000
+
+    class Meta:
+        verbose_name_plural = 'User stats'
+
+    def __str__(self):
+        return f"Stats for user {self.user_id}"
+
+    # Getters
+    def get_average_score(self):
+        """Average overall score of received reviews (0.0 without reviews)"""
+        return self.score_sum / self.review_count if self.review_count else 0.0
+
+    def get_average(self, criterion):
+        """
+        Average of one review criterion, or None if nobody rated it
+
+        Args:
+            criterion: Review rating field, e.g. 'safety_and_respect'
+        """
+        prefix = self.REVIEW_CRITERIA[criterion]
+        count = getattr(self, f'{prefix}_count')
+        return getattr(self, f'{prefix}_sum') / count if count else None
+
+    # Reading
+    @classmethod
+    def get_for_users(cls, user_ids):
+        """
+        Load the stats rows of several users, building any that are missing
+
+        Returns:
+            dict mapping user ID to UserStats
+        """
+        stats = cls.objects.in_bulk(list(user_ids))
+        missing = [user_id for user_id in user_ids if user_id not in stats]
+        if missing:
+            stats.update(cls.rebuild(missing))
+        return stats
+
+    @classmethod
+    def get_for_user(cls, user):
+        """Load a user's stats row, building it if missing"""
+        return cls.get_for_users([user.id])[user.id]
+
+    # Incremental updates
+    @classmethod
+    def apply_deltas(cls, user_id, deltas):
+        """
+        Atomically add deltas to a user's counters
+
+        Users without a row are skipped; their row is built from scratch,
+        including this change, when it is first read.
+
+        Args:
+            user_id: ID of the user
+            deltas: dict mapping counter field to the amount to add
+        """
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if updates:
+            cls.objects.filter(user_id=user_id).update(**updates)
+
+    @classmethod
+    def record_volunteering(cls, volunteer, sign):
+        """
+        Count a volunteer record entering (+1) or leaving (-1) ACCEPTED
+
+        Args:
+            volunteer: Volunteer whose status changed
+            sign: 1 when it became accepted, -1 when it stopped being accepted
+        """
+        cls.record_task_volunteering(volunteer.task_id, [(volunteer.id, volunteer.user_id)], sign)
+
+    @classmethod
+    def record_task_volunteering(cls, task_id, volunteers, sign):
+        """
+        Count volunteer records of one task entering (+1) or leaving (-1) ACCEPTED
+
+        Runs after their status was stored. The distinct requester and
+        category counters change only for users with no other accepted
+        volunteering sharing the task's creator or category. Uses one query
+        per check and one UPDATE per distinct change, whatever the number
+        of volunteers.
+
+        Args:
+            task_id: ID of the task the volunteer records belong to
+            volunteers: (volunteer ID, user ID) pairs whose status changed
+            sign: 1 when they became accepted, -1 when they stopped being accepted
+        """
+        from .volunteer import Volunteer, VolunteerStatus
+        from .task import Task
+
+        volunteer_ids = [volunteer_id for volunteer_id, _ in volunteers]
+        user_ids = [user_id for _, user_id in volunteers]
+        shares_requester = shares_category = set(user_ids)
+
+        task = Task.objects.filter(id=task_id).values('creator_id', 'category').first()
+        if task is not None:
+            other_accepted = Volunteer.objects.filter(
+                user_id__in=user_ids,
+                status=VolunteerStatus.ACCEPTED
+            ).exclude(id__in=volunteer_ids).values_list('user_id', flat=True).distinct().order_by()
+            shares_requester = set(other_accepted.filter(task__creator_id=task['creator_id']))
+            shares_category = set(other_accepted.filter(task__category=task['category']))
+
+        user_ids_by_deltas = {}
+        for user_id in user_ids:
+            deltas = (
+                ('accepted_volunteer_count', sign),
+                ('distinct_requester_count', 0 if user_id in shares_requester else sign),
+                ('distinct_category_count', 0 if user_id in shares_category else sign),
+            )
+            user_ids_by_deltas.setdefault(deltas, []).append(user_id)
+
+        for deltas, grouped_user_ids in user_ids_by_deltas.items():
+            updates = {field: F(field) + delta for field, delta in deltas if delta}
+            cls.objects.filter(user_id__in=grouped_user_ids).update(**updates)
+
+    @classmethod
+    def get_review_deltas(cls, ratings, sign):
+        """
+        Counter changes for adding (+1) or removing (-1) one review
+
+        Args:
+            ratings: dict of the review's score and rating fields
+            sign: 1 to add the review, -1 to remove it
+        """
+        deltas = {
+            'review_count': sign,
+            'score_sum': sign * (ratings['score'] or 0.0),
+        }
+        for criterion, prefix in cls.REVIEW_CRITERIA.items():
+            value = ratings[criterion]
+            if value is not None:
+                deltas[f'{prefix}_count'] = sign
+                deltas[f'{prefix}_sum'] = sign * value
+
+        communication = ratings['communication_requester_to_volunteer']
+        if communication is not None and communication >= cls.GREAT_COMMUNICATION_SCORE:
+            deltas['great_communication_count'] = sign
+        if all(ratings[criterion] == 5.0 for criterion in cls.REVIEW_CRITERIA):
+            deltas['perfect_review_count'] = sign
+        return deltas
+
+    @classmethod
+    def record_review_change(cls, user_id, old_ratings, new_ratings):
+        """
+        Apply a review being added, edited or removed to the reviewee's counters
+
+        Args:
+            user_id: ID of the reviewee
+            old_ratings: Stored ratings before the change (None if added)
+            new_ratings: Ratings after the change (None if removed)
+        """
+        deltas = {}
+        for ratings, sign in ((old_ratings, -1), (new_ratings, 1)):
+            if ratings is not None:
+                for field, delta in cls.get_review_deltas(ratings, sign).items():
+                    deltas[field] = deltas.get(field, 0) + delta
+        cls.apply_deltas(user_id, deltas)
+
+    # Rebuilding
+    @classmethod
+    def compute(cls, user_ids):
+        """
+        Compute counters from scratch with one grouped query per source table
+
+        Returns:
+            dict mapping user ID to unsaved UserStats
+        """
+        from .volunteer import Volunteer, VolunteerStatus
+        from .task import Task
+        from .review import Review
+        from .user_follows import UserFollows
+
+        stats = {user_id: cls(user_id=user_id) for user_id in user_ids}
+
+        volunteering = Volunteer.objects.filter(
+            user_id__in=user_ids,
+            status=VolunteerStatus.ACCEPTED
+        ).values('user_id').annotate(
+            accepted_volunteer_count=Count('id'),
+            distinct_requester_count=Count('task__creator', distinct=True),
+            distinct_category_count=Count('task__category', distinct=True)
+        ).order_by()
+        for row in volunteering:
+            user_stats = stats[row.pop('user_id')]
+            for field, value in row.items():
+                setattr(user_stats, field, value)
+
+        created_tasks = Task.objects.filter(
+            creator_id__in=user_ids
+        ).values('creator_id').annotate(created_task_count=Count('id')).order_by()
+        for row in created_tasks:
+            stats[row['creator_id']].created_task_count = row['created_task_count']
+
+        followers = UserFollows.objects.filter(
+            following_id__in=user_ids
+        ).values('following_id').annotate(follower_count=Count('id')).order_by()
+        for row in followers:
+            stats[row['following_id']].follower_count = row['follower_count']
+
+        review_aggregates = {
+            'review_count': Count('id'),
+            'score_sum': Sum('score'),
+            'great_communication_count': Count('id', filter=Q(
+                communication_requester_to_volunteer__gte=cls.GREAT_COMMUNICATION_SCORE
+            )),
+            'perfect_review_count': Count('id', filter=Q(
+                **{criterion: 5.0 for criterion in cls.REVIEW_CRITERIA}
+            )),
+        }
+        for criterion, prefix in cls.REVIEW_CRITERIA.items():
+            review_aggregates[f'{prefix}_count'] = Count(criterion)
+            review_aggregates[f'{prefix}_sum'] = Sum(criterion)
+
+        reviews = Review.objects.filter(
+            reviewee_id__in=user_ids
+        ).values('reviewee_id').annotate(**review_aggregates).order_by()
+        for row in reviews:
+            user_stats = stats[row.pop('reviewee_id')]
+            for field, value in row.items():
+                setattr(user_stats, field, value or 0)
+
+        return stats
+
+    @classmethod
+    def rebuild(cls, user_ids):
+        """
+        Recompute and store the rows of the given users
+
+        Existing rows are locked before the counters are computed and are
+        updated in place, so a delta applied concurrently waits for the new
+        values instead of being overwritten by them. Rows are never deleted.
+
+        Returns:
+            dict mapping user ID to the stored UserStats
+        """
+        fields = [field.attname for field in cls._meta.fields if not field.primary_key]
+        with transaction.atomic():
+            existing = set(
+                cls.objects.select_for_update().filter(user_id__in=user_ids).order_by('user_id').values_list(
+                    'user_id', flat=True
+                )
+            )
+            stats = cls.compute(user_ids)
+            cls.objects.bulk_update([stats[user_id] for user_id in existing], fields)
+            # A row built concurrently by another request is just as fresh
+            cls.objects.bulk_create(
+                [user_stats for user_id, user_stats in stats.items() if user_id not in existing],
+                ignore_conflicts=True
+            )
+        return stats
+
+    @classmethod
+    def rebuild_all(cls, batch_size=REBUILD_BATCH_SIZE):
+        """
+        Recompute the rows of every user, batch by batch
+
+        Returns:
+            int: Number of users rebuilt
+        """
+        from .user import RegisteredUser
+
+        user_count = 0
+        last_id = 0
+        while True:
+            user_ids = list(
+                RegisteredUser.objects.filter(id__gt=last_id).order_by('id').values_list(
+                    'id', flat=True
+                )[:batch_size]
+            )
+            if not user_ids:
+                break
+
+            cls.rebuild(user_ids)
+            user_count += len(user_ids)
+            last_id = user_ids[-1]
+
+        return user_count
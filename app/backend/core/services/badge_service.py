@@ -2,12 +2,16 @@
 Badge evaluation service for checking and awarding badges to users.
 This service contains all the business logic for determining when badges should be awarded.
 """
-from django.db.models import Count, Q, Avg, F, Min
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, Q, Avg, F, Min, Value, When, CharField
+from django.db.models.functions import StrIndex, Substr, Trim
 from django.utils import timezone
 from datetime import timedelta, time
 from core.models import (
     Badge, BadgeType, UserBadge, RegisteredUser, Volunteer, 
-    VolunteerStatus, Task, TaskStatus, Review, UserFollows
+    VolunteerStatus, Task, TaskStatus, Review, UserFollows,
+    BadgeEvaluationRequest, BadgeEvaluationTrigger, UserStats
 )
 
 
@@ -26,15 +30,51 @@ class BadgeService:
         # Ramadan and Sacrifice holidays are variable, would need additional logic
     ]
     
+    # Badges that depend only on a user's history, in evaluation order
+    USER_LEVEL_BADGES = [
+        BadgeType.NEIGHBORHOOD_HERO,
+        BadgeType.JACK_OF_ALL_TRADES,
+        BadgeType.PLATE_NOT_EMPTY,
+        BadgeType.PEOPLE_TRUST_YOU,
+        BadgeType.CARING_CONTRIBUTOR,
+        BadgeType.HELP_AND_TRAVEL,
+        BadgeType.JUST_PERFECT,
+        BadgeType.RISING_HELPER,
+        BadgeType.GENTLE_COMMUNICATOR,
+        BadgeType.MODEL_CITIZEN,
+        BadgeType.RELIABLE_NEIGHBOUR,
+    ]
+    
+    # Users evaluated together by evaluate_all_users
+    EVALUATION_BATCH_SIZE = 1000
+    
+    # Queued evaluation requests claimed per worker iteration
+    QUEUE_BATCH_SIZE = 500
+    
+    # settings.BADGE_EVALUATION_MODE values
+    MODE_SYNC = 'sync'
+    MODE_DEFERRED = 'deferred'
+    
+    @staticmethod
+    def lock_users(user_ids):
+        """Lock the rows of the given users until the end of the transaction"""
+        list(
+            RegisteredUser.objects.select_for_update().filter(id__in=user_ids).order_by('id').values_list(
+                'id', flat=True
+            )
+        )
+    
     @staticmethod
     def award_badge(user, badge_type):
         """Award a badge to a user if they don't already have it"""
         try:
             badge = Badge.objects.get(badge_type=badge_type)
-            user_badge, created = UserBadge.objects.get_or_create(
-                user=user,
-                badge=badge
-            )
+            with transaction.atomic():
+                BadgeService.lock_users([user.id])
+                user_badge, created = UserBadge.objects.get_or_create(
+                    user=user,
+                    badge=badge
+                )
             
             # Send notification if badge was newly awarded
             if created:
@@ -48,10 +88,7 @@ class BadgeService:
     @staticmethod
     def check_neighborhood_hero(user):
         """Check if user volunteered for more than 10 different neighbors"""
-        unique_requesters = Volunteer.objects.filter(
-            user=user,
-            status=VolunteerStatus.ACCEPTED
-        ).values('task__creator').distinct().count()
+        unique_requesters = UserStats.get_for_user(user).distinct_requester_count
         
         if unique_requesters > 10:
             return BadgeService.award_badge(user, BadgeType.NEIGHBORHOOD_HERO)
@@ -60,10 +97,7 @@ class BadgeService:
     @staticmethod
     def check_jack_of_all_trades(user):
         """Check if user volunteered in more than 5 different categories"""
-        categories_count = Volunteer.objects.filter(
-            user=user,
-            status=VolunteerStatus.ACCEPTED
-        ).values('task__category').distinct().count()
+        categories_count = UserStats.get_for_user(user).distinct_category_count
         
         if categories_count > 5:
             return BadgeService.award_badge(user, BadgeType.JACK_OF_ALL_TRADES)
@@ -89,11 +123,9 @@ class BadgeService:
     @staticmethod
     def check_plate_not_empty(user):
         """Check if user both created requests and volunteered"""
-        has_created_tasks = Task.objects.filter(creator=user).exists()
-        has_volunteered = Volunteer.objects.filter(
-            user=user,
-            status=VolunteerStatus.ACCEPTED
-        ).exists()
+        stats = UserStats.get_for_user(user)
+        has_created_tasks = stats.created_task_count > 0
+        has_volunteered = stats.accepted_volunteer_count > 0
         
         if has_created_tasks and has_volunteered:
             return BadgeService.award_badge(user, BadgeType.PLATE_NOT_EMPTY)
@@ -102,7 +134,7 @@ class BadgeService:
     @staticmethod
     def check_people_trust_you(user):
         """Check if user has more than 10 followers"""
-        follower_count = UserFollows.objects.filter(following=user).count()
+        follower_count = UserStats.get_for_user(user).follower_count
         
         if follower_count > 10:
             return BadgeService.award_badge(user, BadgeType.PEOPLE_TRUST_YOU)
@@ -111,10 +143,7 @@ class BadgeService:
     @staticmethod
     def check_caring_contributor(user):
         """Check if user volunteered for more than 10 requests"""
-        volunteer_count = Volunteer.objects.filter(
-            user=user,
-            status=VolunteerStatus.ACCEPTED
-        ).count()
+        volunteer_count = UserStats.get_for_user(user).accepted_volunteer_count
         
         if volunteer_count > 10:
             return BadgeService.award_badge(user, BadgeType.CARING_CONTRIBUTOR)
@@ -144,18 +173,7 @@ class BadgeService:
     @staticmethod
     def check_just_perfect(user):
         """Check if user received 3 reviews with perfect scores (5.0) on all criteria"""
-        perfect_reviews = Review.objects.filter(
-            reviewee=user,
-            reliability=5.0,
-            task_completion=5.0,
-            communication_requester_to_volunteer=5.0,
-            safety_and_respect=5.0
-        ).exclude(
-            Q(reliability__isnull=True) | 
-            Q(task_completion__isnull=True) | 
-            Q(communication_requester_to_volunteer__isnull=True) | 
-            Q(safety_and_respect__isnull=True)
-        ).count()
+        perfect_reviews = UserStats.get_for_user(user).perfect_review_count
         
         if perfect_reviews >= 3:
             return BadgeService.award_badge(user, BadgeType.JUST_PERFECT)
@@ -195,25 +213,16 @@ class BadgeService:
     @staticmethod
     def check_rising_helper(user):
         """Check if user received 5+ positive feedback ratings (>= 4.0 average)"""
-        avg_score = Review.objects.filter(reviewee=user).aggregate(
-            avg=Avg('score')
-        )['avg']
+        stats = UserStats.get_for_user(user)
         
-        review_count = Review.objects.filter(reviewee=user).count()
-        
-        if review_count >= 5 and avg_score and avg_score >= 4.0:
+        if stats.review_count >= 5 and stats.get_average_score() >= 4.0:
             return BadgeService.award_badge(user, BadgeType.RISING_HELPER)
         return False
     
     @staticmethod
     def check_gentle_communicator(user):
         """Check if user received 5 great communication reviews (>= 4.5)"""
-        great_communication_count = Review.objects.filter(
-            reviewee=user,
-            communication_requester_to_volunteer__gte=4.5
-        ).exclude(
-            communication_requester_to_volunteer__isnull=True
-        ).count()
+        great_communication_count = UserStats.get_for_user(user).great_communication_count
         
         if great_communication_count >= 5:
             return BadgeService.award_badge(user, BadgeType.GENTLE_COMMUNICATOR)
@@ -251,11 +260,7 @@ class BadgeService:
     @staticmethod
     def check_model_citizen(user):
         """Check if user achieved >= 4.5 safety and respect rating"""
-        avg_safety = Review.objects.filter(
-            reviewee=user
-        ).exclude(
-            safety_and_respect__isnull=True
-        ).aggregate(avg=Avg('safety_and_respect'))['avg']
+        avg_safety = UserStats.get_for_user(user).get_average('safety_and_respect')
         
         if avg_safety and avg_safety >= 4.5:
             return BadgeService.award_badge(user, BadgeType.MODEL_CITIZEN)
@@ -264,11 +269,7 @@ class BadgeService:
     @staticmethod
     def check_reliable_neighbour(user):
         """Check if user achieved reliability rating higher than 4.5"""
-        avg_reliability = Review.objects.filter(
-            reviewee=user
-        ).exclude(
-            reliability__isnull=True
-        ).aggregate(avg=Avg('reliability'))['avg']
+        avg_reliability = UserStats.get_for_user(user).get_average('reliability')
         
         if avg_reliability and avg_reliability > 4.5:
             return BadgeService.award_badge(user, BadgeType.RELIABLE_NEIGHBOUR)
@@ -323,43 +324,184 @@ class BadgeService:
     @staticmethod
     def check_all_badges_for_user(user):
         """Check all applicable badges for a user"""
-        badges_awarded = []
-        
-        # User-level badges (not task/volunteer specific)
-        if BadgeService.check_neighborhood_hero(user):
-            badges_awarded.append(BadgeType.NEIGHBORHOOD_HERO)
-        
-        if BadgeService.check_jack_of_all_trades(user):
-            badges_awarded.append(BadgeType.JACK_OF_ALL_TRADES)
-        
-        if BadgeService.check_plate_not_empty(user):
-            badges_awarded.append(BadgeType.PLATE_NOT_EMPTY)
-        
-        if BadgeService.check_people_trust_you(user):
-            badges_awarded.append(BadgeType.PEOPLE_TRUST_YOU)
+        return BadgeService.evaluate_users([user.id]).get(user.id, [])
+    
+    @staticmethod
+    def get_badges_by_type():
+        """Load all badge definitions keyed by badge type"""
+        return {badge.badge_type: badge for badge in Badge.objects.all()}
+    
+    @staticmethod
+    def compute_user_level_badges(user_ids):
+        """
+        Evaluate every user-level badge criterion for a batch of users
         
-        if BadgeService.check_caring_contributor(user):
-            badges_awarded.append(BadgeType.CARING_CONTRIBUTOR)
+        Reads the users' UserStats rows in one query; only the
+        completed-cities criterion still needs a grouped aggregate query.
         
-        if BadgeService.check_help_and_travel(user):
-            badges_awarded.append(BadgeType.HELP_AND_TRAVEL)
+        Args:
+            user_ids: IDs of the users to evaluate
+            
+        Returns:
+            dict mapping user ID to the set of badge types they qualify for
+        """
+        eligible = {user_id: set() for user_id in user_ids}
+        
+        for user_id, stats in UserStats.get_for_users(user_ids).items():
+            badges = eligible[user_id]
+            if stats.distinct_requester_count > 10:
+                badges.add(BadgeType.NEIGHBORHOOD_HERO)
+            if stats.distinct_category_count > 5:
+                badges.add(BadgeType.JACK_OF_ALL_TRADES)
+            if stats.created_task_count > 0 and stats.accepted_volunteer_count > 0:
+                badges.add(BadgeType.PLATE_NOT_EMPTY)
+            if stats.follower_count > 10:
+                badges.add(BadgeType.PEOPLE_TRUST_YOU)
+            if stats.accepted_volunteer_count > 10:
+                badges.add(BadgeType.CARING_CONTRIBUTOR)
+            if stats.perfect_review_count >= 3:
+                badges.add(BadgeType.JUST_PERFECT)
+            if stats.review_count >= 5 and stats.get_average_score() >= 4.0:
+                badges.add(BadgeType.RISING_HELPER)
+            if stats.great_communication_count >= 5:
+                badges.add(BadgeType.GENTLE_COMMUNICATOR)
+            avg_safety = stats.get_average('safety_and_respect')
+            if avg_safety and avg_safety >= 4.5:
+                badges.add(BadgeType.MODEL_CITIZEN)
+            avg_reliability = stats.get_average('reliability')
+            if avg_reliability and avg_reliability > 4.5:
+                badges.add(BadgeType.RELIABLE_NEIGHBOUR)
+        
+        # City is the part of the location before the first comma, as in
+        # check_help_and_travel (portable rather than PostgreSQL's SPLIT_PART)
+        city = Trim(Case(
+            When(
+                task__location__contains=',',
+                then=Substr('task__location', 1, StrIndex('task__location', Value(',')) - 1)
+            ),
+            default=F('task__location'),
+            output_field=CharField()
+        ))
+        travelled = Volunteer.objects.filter(
+            user_id__in=user_ids,
+            status=VolunteerStatus.ACCEPTED,
+            task__status=TaskStatus.COMPLETED
+        ).exclude(task__location='').values('user_id').annotate(
+            completed_cities=Count(city, distinct=True)
+        ).filter(completed_cities__gte=2).values_list('user_id', flat=True).order_by()
         
-        if BadgeService.check_just_perfect(user):
-            badges_awarded.append(BadgeType.JUST_PERFECT)
+        for user_id in travelled:
+            eligible[user_id].add(BadgeType.HELP_AND_TRAVEL)
         
-        if BadgeService.check_rising_helper(user):
-            badges_awarded.append(BadgeType.RISING_HELPER)
+        return eligible
+    
+    @staticmethod
+    def award_badges_bulk(eligible, badges_by_type=None):
+        """
+        Award badges to many users at once
         
-        if BadgeService.check_gentle_communicator(user):
-            badges_awarded.append(BadgeType.GENTLE_COMMUNICATOR)
+        Badges users already hold are skipped, new ones are inserted with a
+        single bulk_create, and one notification is created per new badge.
         
-        if BadgeService.check_model_citizen(user):
-            badges_awarded.append(BadgeType.MODEL_CITIZEN)
+        Args:
+            eligible: dict mapping user ID to badge types to award
+            badges_by_type: Badge rows keyed by type (loaded if not given)
+            
+        Returns:
+            dict mapping user ID to the list of newly awarded badge types
+        """
+        from core.models import Notification, NotificationType
+        
+        if badges_by_type is None:
+            badges_by_type = BadgeService.get_badges_by_type()
+        
+        user_ids = [user_id for user_id, badge_types in eligible.items() if badge_types]
+        if not user_ids:
+            return {}
+        
+        with transaction.atomic(savepoint=False):
+            # Awards for a user are serialized on the user's row, see award_badge
+            BadgeService.lock_users(user_ids)
+            already_awarded = set(
+                UserBadge.objects.filter(user_id__in=user_ids).values_list('user_id', 'badge_id')
+            )
+            
+            new_user_badges = []
+            for user_id in user_ids:
+                for badge_type in BadgeService.USER_LEVEL_BADGES:
+                    badge = badges_by_type.get(badge_type)
+                    if (badge is None or badge_type not in eligible[user_id]
+                            or (user_id, badge.id) in already_awarded):
+                        continue
+                    new_user_badges.append(UserBadge(user_id=user_id, badge=badge))
+            if not new_user_badges:
+                return {}
+            
+            UserBadge.objects.bulk_create(new_user_badges, ignore_conflicts=True)
+            # Only rows this call inserted are announced: any award that got
+            # in first was already in the read above, under the same lock
+            inserted = set(
+                UserBadge.objects.filter(user_id__in=user_ids).values_list('user_id', 'badge_id')
+            ) - already_awarded
+            
+            notifications = []
+            awarded = {}
+            for user_badge in new_user_badges:
+                if (user_badge.user_id, user_badge.badge_id) not in inserted:
+                    continue
+                notifications.append(Notification(
+                    user_id=user_badge.user_id,
+                    content=Notification.get_badge_earned_content(user_badge.badge),
+                    type=NotificationType.BADGE_EARNED
+                ))
+                awarded.setdefault(user_badge.user_id, []).append(user_badge.badge.badge_type)
+            Notification.create_bulk(notifications)
+        
+        return awarded
+    
+    @staticmethod
+    def evaluate_users(user_ids, badges_by_type=None):
+        """
+        Evaluate and award user-level badges for a batch of users
         
-        if BadgeService.check_reliable_neighbour(user):
-            badges_awarded.append(BadgeType.RELIABLE_NEIGHBOUR)
+        Args:
+            user_ids: IDs of the users to evaluate
+            badges_by_type: Badge rows keyed by type (loaded if not given)
+            
+        Returns:
+            dict mapping user ID to the list of newly awarded badge types
+        """
+        eligible = BadgeService.compute_user_level_badges(user_ids)
+        return BadgeService.award_badges_bulk(eligible, badges_by_type)
+    
+    @staticmethod
+    def evaluate_all_users(batch_size=EVALUATION_BATCH_SIZE):
+        """
+        Evaluate user-level badges for every user, batch by batch
+        
+        Returns:
+            tuple of (users evaluated, badges awarded)
+        """
+        badges_by_type = BadgeService.get_badges_by_type()
+        user_count = 0
+        awarded_count = 0
+        last_id = 0
+        
+        while True:
+            user_ids = list(
+                RegisteredUser.objects.filter(id__gt=last_id).order_by('id').values_list(
+                    'id', flat=True
+                )[:batch_size]
+            )
+            if not user_ids:
+                break
+            
+            awarded = BadgeService.evaluate_users(user_ids, badges_by_type)
+            user_count += len(user_ids)
+            awarded_count += sum(len(badge_types) for badge_types in awarded.values())
+            last_id = user_ids[-1]
         
-        return badges_awarded
+        return user_count, awarded_count
     
     @staticmethod
     def check_volunteer_badges(user, volunteer_record):
@@ -405,3 +547,106 @@ class BadgeService:
             badges_awarded.append(BadgeType.FULL_GALLERY)
         
         return badges_awarded
+    
+    @staticmethod
+    def request_evaluation(user_id, trigger, object_id=None):
+        """
+        Ask for a user's badges to be re-checked after an event
+        
+        In deferred mode only a queue row is written, once the current
+        transaction commits; the badge worker (manage.py process_badge_queue)
+        evaluates it later. In sync mode (the default, used by tests) the
+        badges are evaluated immediately.
+        
+        Args:
+            user_id: ID of the user whose badges may change
+            trigger: BadgeEvaluationTrigger value
+            object_id: ID of the Volunteer or Task the trigger refers to
+        """
+        BadgeService.request_evaluations([
+            BadgeEvaluationRequest(user_id=user_id, trigger=trigger, object_id=object_id)
+        ])
+    
+    @staticmethod
+    def request_evaluations(requests):
+        """
+        Ask for several badge checks at once, like request_evaluation
+        
+        Args:
+            requests: Unsaved BadgeEvaluationRequest objects
+        """
+        if not requests:
+            return
+        
+        if settings.BADGE_EVALUATION_MODE == BadgeService.MODE_DEFERRED:
+            transaction.on_commit(lambda: BadgeEvaluationRequest.objects.bulk_create(requests))
+        else:
+            BadgeService.process_requests(requests)
+    
+    @staticmethod
+    def process_requests(requests):
+        """
+        Evaluate a batch of badge evaluation requests
+        
+        Requests are deduplicated first: each volunteer record and task is
+        checked once, and user-level badges are evaluated once per user in
+        a single batch.
+        
+        Args:
+            requests: BadgeEvaluationRequest objects (saved or not)
+        """
+        object_ids = {trigger: set() for trigger in BadgeEvaluationTrigger.values}
+        user_level_ids = set()
+        for request in requests:
+            if request.object_id is not None:
+                object_ids[request.trigger].add(request.object_id)
+            if request.trigger != BadgeEvaluationTrigger.TASK_CREATED:
+                user_level_ids.add(request.user_id)
+        
+        # Event badges of accepted volunteer records
+        volunteers = Volunteer.objects.filter(
+            id__in=object_ids[BadgeEvaluationTrigger.VOLUNTEER_ACCEPTED],
+            status=VolunteerStatus.ACCEPTED
+        ).select_related('user', 'task')
+        for volunteer in volunteers:
+            BadgeService.check_volunteer_badges(volunteer.user, volunteer)
+        
+        # Completion badges of every accepted volunteer on completed tasks
+        completed_volunteers = Volunteer.objects.filter(
+            task_id__in=object_ids[BadgeEvaluationTrigger.TASK_COMPLETED],
+            task__status=TaskStatus.COMPLETED,
+            status=VolunteerStatus.ACCEPTED
+        ).select_related('user', 'task')
+        for volunteer in completed_volunteers:
+            BadgeService.check_task_completion_badges(volunteer.user, volunteer.task)
+        
+        # Creation badges of new tasks
+        created_tasks = Task.objects.filter(
+            id__in=object_ids[BadgeEvaluationTrigger.TASK_CREATED]
+        ).select_related('creator')
+        for task in created_tasks:
+            BadgeService.check_task_creation_badges(task.creator, task)
+        
+        if user_level_ids:
+            BadgeService.evaluate_users(sorted(user_level_ids))
+    
+    @staticmethod
+    def process_queue(batch_size=QUEUE_BATCH_SIZE):
+        """
+        Claim, evaluate and remove one batch of queued requests
+        
+        Rows are locked with SKIP LOCKED so several workers can drain the
+        queue side by side.
+        
+        Returns:
+            int: Number of queued requests processed
+        """
+        with transaction.atomic():
+            requests = list(
+                BadgeEvaluationRequest.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size]
+            )
+            if requests:
+                BadgeService.process_requests(requests)
+                BadgeEvaluationRequest.objects.filter(id__in=[request.id for request in requests]).delete()
+        
+        return len(requests)
@@ -0,0 +1,193 @@
+"""
+Offline geocoding and geohash helpers.
+Locations are resolved against a bundled gazetteer file, so no network access is needed.
+"""
+import csv
+import math
+from django.conf import settings
+from django.db import models
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+
+class GeocodingService:
+    """Service class for turning location text into coordinates and grid cells"""
+
+    # Mean Earth radius used for distance calculations
+    EARTH_RADIUS_KM = 6371.0
+
+    # Precision of the stored geohash; 7 characters is a ~150m x 150m cell
+    GEOHASH_PRECISION = 7
+    GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+    # Fold Turkish letters to ASCII so "Kadikoy" and "Kadıköy" match
+    NORMALIZE_TABLE = str.maketrans('İIıŞşĞğÜüÖöÇç', 'iiissgguuoocc')
+
+    # Gazetteer entries keyed by normalized name, loaded on first use
+    _gazetteer = None
+
+    @staticmethod
+    def normalize(text):
+        """Normalize a place name for gazetteer lookups"""
+        return ' '.join(text.translate(GeocodingService.NORMALIZE_TABLE).lower().split())
+
+    @staticmethod
+    def load_gazetteer():
+        """
+        Load the gazetteer file (name,latitude,longitude rows)
+
+        Returns:
+            dict mapping normalized place names to (latitude, longitude)
+        """
+        if GeocodingService._gazetteer is None:
+            gazetteer = {}
+            with open(settings.GEOCODER_GAZETTEER_PATH, encoding='utf-8') as gazetteer_file:
+                for row in csv.DictReader(gazetteer_file):
+                    gazetteer[GeocodingService.normalize(row['name'])] = (
+                        float(row['latitude']),
+                        float(row['longitude'])
+                    )
+            GeocodingService._gazetteer = gazetteer
+        return GeocodingService._gazetteer
+
+    @staticmethod
+    def geocode(location):
+        """
+        Resolve free-form location text to coordinates
+
+        The full text is tried first, then each comma-separated part from
+        the most specific (e.g. "Kadıköy, İstanbul" resolves to Kadıköy).
+
+        Args:
+            location: Location text
+
+        Returns:
+            (latitude, longitude) tuple, or None if the place is unknown
+        """
+        if not location:
+            return None
+
+        gazetteer = GeocodingService.load_gazetteer()
+        candidates = [location] + location.split(',')
+        for candidate in candidates:
+            coordinates = gazetteer.get(GeocodingService.normalize(candidate))
+            if coordinates is not None:
+                return coordinates
+        return None
+
+    @staticmethod
+    def distance_km(latitude1, longitude1, latitude2, longitude2):
+        """Great-circle (haversine) distance between two points in km"""
+        half_dlat = math.radians(latitude2 - latitude1) / 2
+        half_dlon = math.radians(longitude2 - longitude1) / 2
+        haversine = (
+            math.sin(half_dlat) ** 2 +
+            math.cos(math.radians(latitude1)) * math.cos(math.radians(latitude2)) *
+            math.sin(half_dlon) ** 2
+        )
+        # Rounding can push near-antipodal values just past 1, outside asin's domain
+        return 2 * GeocodingService.EARTH_RADIUS_KM * math.asin(min(math.sqrt(haversine), 1.0))
+
+    @staticmethod
+    def distance_expression(latitude, longitude):
+        """
+        Database expression for the haversine distance in km from a point
+        to the `latitude`/`longitude` columns of the queried model
+
+        Rows without coordinates evaluate to NULL. The square root is capped
+        at 1 so rounding near antipodal points cannot make ASIN fail.
+        """
+        half_dlat = Radians(models.F('latitude') - latitude) / 2
+        half_dlon = Radians(models.F('longitude') - longitude) / 2
+        haversine = (
+            Power(Sin(half_dlat), 2) +
+            Cos(Radians(models.F('latitude'))) * Cos(Radians(models.Value(latitude))) *
+            Power(Sin(half_dlon), 2)
+        )
+        return models.ExpressionWrapper(
+            2 * GeocodingService.EARTH_RADIUS_KM * ASin(Least(Sqrt(haversine), models.Value(1.0))),
+            output_field=models.FloatField()
+        )
+
+    @staticmethod
+    def bounding_box_deltas(latitude, radius_km):
+        """Return the (latitude, longitude) half-extents in degrees of a circle's bounding box"""
+        km_per_degree = math.pi * GeocodingService.EARTH_RADIUS_KM / 180
+        lat_delta = radius_km / km_per_degree
+        lon_delta = radius_km / (km_per_degree * max(math.cos(math.radians(latitude)), 0.01))
+        return lat_delta, lon_delta
+
+    @staticmethod
+    def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+        """Encode coordinates as a geohash string of the given precision"""
+        lat_range = [-90.0, 90.0]
+        lon_range = [-180.0, 180.0]
+        geohash = []
+        bits = 0
+        bit_count = 0
+        even_bit = True
+
+        while len(geohash) < precision:
+            # Bits alternate between longitude and latitude, longitude first
+            value, value_range = (longitude, lon_range) if even_bit else (latitude, lat_range)
+            mid = (value_range[0] + value_range[1]) / 2
+            if value >= mid:
+                bits = (bits << 1) | 1
+                value_range[0] = mid
+            else:
+                bits = bits << 1
+                value_range[1] = mid
+            even_bit = not even_bit
+
+            bit_count += 1
+            if bit_count == 5:
+                geohash.append(GeocodingService.GEOHASH_BASE32[bits])
+                bits = 0
+                bit_count = 0
+
+        return ''.join(geohash)
+
+    @staticmethod
+    def geohash_cell_size_km(precision, latitude):
+        """Return the (height, width) in km of a geohash cell at a latitude"""
+        lon_bits = math.ceil(precision * 5 / 2)
+        lat_bits = precision * 5 - lon_bits
+        km_per_degree = math.pi * GeocodingService.EARTH_RADIUS_KM / 180
+        height = 180.0 / (2 ** lat_bits) * km_per_degree
+        width = 360.0 / (2 ** lon_bits) * km_per_degree * math.cos(math.radians(latitude))
+        return height, width
+
+    @staticmethod
+    def geohash_cells_for_radius(latitude, longitude, radius_km):
+        """
+        Find geohash prefixes whose cells cover a circle
+
+        Picks the finest precision whose cells are at least as large as the
+        radius, so the circle's bounding box touches at most 3x3 cells.
+
+        Args:
+            latitude: Center latitude
+            longitude: Center longitude
+            radius_km: Circle radius in km
+
+        Returns:
+            Sorted list of geohash prefixes
+        """
+        precision = GeocodingService.GEOHASH_PRECISION
+        while precision > 1:
+            height, width = GeocodingService.geohash_cell_size_km(precision, latitude)
+            if height >= radius_km and width >= radius_km:
+                break
+            precision -= 1
+
+        lat_delta, lon_delta = GeocodingService.bounding_box_deltas(latitude, radius_km)
+
+        # Sample the bounding box corners, edge midpoints and center
+        cells = set()
+        for lat in (latitude - lat_delta, latitude, latitude + lat_delta):
+            for lon in (longitude - lon_delta, longitude, longitude + lon_delta):
+                cells.add(GeocodingService.encode_geohash(
+                    min(max(lat, -90.0), 90.0),
+                    (lon + 180.0) % 360.0 - 180.0,
+                    precision
+                ))
+        return sorted(cells)
@@ -0,0 +1,134 @@
+"""
+Image variant generation.
+Uploaded task and profile photos are re-encoded into fixed-size variants
+without their EXIF metadata, so list views never link to full-size originals.
+"""
+import io
+import logging
+import os
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+class ImageService:
+    """Service class for creating, describing and removing image variants"""
+
+    # Variant name -> (max width, max height, crop to exactly that size)
+    VARIANTS = {
+        'thumb': (160, 160, True),
+        'card': (640, 480, False),
+        'full': (1600, 1600, False),
+    }
+
+    # Output format -> (Pillow format, file extension, save options)
+    FORMATS = {
+        'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+        'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    }
+
+    @staticmethod
+    def resize(image, width, height, crop):
+        """Scale an image down to fit (or, with crop, fill) a box; never upscales"""
+        if crop:
+            return ImageOps.fit(image, (min(width, image.width), min(height, image.height)), Image.LANCZOS)
+        resized = image.copy()
+        resized.thumbnail((width, height), Image.LANCZOS)
+        return resized
+
+    @staticmethod
+    def encode(image, image_format):
+        """
+        Encode an image in one of FORMATS
+
+        Metadata such as EXIF is not carried over. Transparency is kept in
+        WebP and flattened onto white for JPEG.
+        """
+        pil_format, _, options = ImageService.FORMATS[image_format]
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGBA')
+            if pil_format == 'JPEG':
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+
+        buffer = io.BytesIO()
+        image.save(buffer, pil_format, **options)
+        return buffer.getvalue()
+
+    @staticmethod
+    def generate_variants(field_file, saved_names=None):
+        """
+        Create every variant of a stored image
+
+        Variants are saved under a name derived from the original (e.g.
+        <name>_thumb.webp), which the content-addressed storage turns into
+        the digest of the variant; identical variants are stored once.
+
+        Args:
+            field_file: FieldFile of the original image
+            saved_names: List the storage names are appended to as they are
+                saved, so a caller can discard them if its transaction fails
+
+        Returns:
+            dict mapping variant name to {'width', 'height', and the storage
+            name per format}, or an empty dict if the image cannot be read
+        """
+        base_name = os.path.splitext(field_file.name)[0]
+        try:
+            with field_file.open('rb'):
+                image = ImageOps.exif_transpose(Image.open(field_file))
+                image.load()
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning('Could not read image %s; no variants generated', field_file.name, exc_info=True)
+            return {}
+
+        variants = {}
+        for variant, (width, height, crop) in ImageService.VARIANTS.items():
+            resized = ImageService.resize(image, width, height, crop)
+            variants[variant] = {'width': resized.width, 'height': resized.height}
+            for image_format, (_, extension, _) in ImageService.FORMATS.items():
+                variants[variant][image_format] = default_storage.save(
+                    f'{base_name}_{variant}.{extension}',
+                    ContentFile(ImageService.encode(resized, image_format))
+                )
+                if saved_names is not None:
+                    saved_names.append(variants[variant][image_format])
+        return variants
+
+    @staticmethod
+    def delete_variants(variants):
+        """Remove the files of a variant manifest from storage"""
+        for variant in variants.values():
+            for image_format in ImageService.FORMATS:
+                if variant.get(image_format):
+                    default_storage.delete(variant[image_format])
+
+    @staticmethod
+    def discard_files(names):
+        """Remove variant files saved in a transaction that was rolled back"""
+        discard = getattr(default_storage, 'discard', default_storage.delete)
+        for name in names:
+            discard(name)
+
+    @staticmethod
+    def get_variant_urls(variants, request=None):
+        """
+        Describe a variant manifest with URLs
+
+        Args:
+            variants: Manifest returned by generate_variants
+            request: Request used to build absolute URLs (optional)
+
+        Returns:
+            dict mapping variant name to {'width', 'height', and the URL per format}
+        """
+        urls = {}
+        for name, variant in variants.items():
+            urls[name] = {'width': variant['width'], 'height': variant['height']}
+            for image_format in ImageService.FORMATS:
+                url = default_storage.url(variant[image_format])
+                urls[name][image_format] = request.build_absolute_uri(url) if request else url
+        return urls
@@ -0,0 +1,143 @@
+"""
+Media processing queue.
+Uploads store the original and request their variants here. In deferred mode
+the work is queued as MediaJob rows and done by `manage.py process_media_queue`,
+so decoding and resizing never hold up a web worker.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from core.models import MediaJob, MediaJobKind, MediaStatus, Photo, RegisteredUser
+from core.services.image_service import ImageService
+
+logger = logging.getLogger(__name__)
+
+
+class MediaService:
+    """Service class for queueing and processing uploaded images"""
+
+    # settings.MEDIA_PROCESSING_MODE values
+    MODE_SYNC = 'sync'
+    MODE_DEFERRED = 'deferred'
+
+    # Jobs claimed per transaction by process_queue
+    QUEUE_BATCH_SIZE = 10
+
+    # A job failing this many times marks its image FAILED
+    MAX_ATTEMPTS = 3
+    # Delay before retrying a failed job, multiplied by its attempt count
+    RETRY_DELAY = timedelta(seconds=30)
+
+    # Job kind -> model holding the image
+    MODELS = {
+        MediaJobKind.TASK_PHOTO: Photo,
+        MediaJobKind.PROFILE_PHOTO: RegisteredUser,
+    }
+
+    @staticmethod
+    def is_deferred():
+        """Whether uploads are processed by the media worker"""
+        return settings.MEDIA_PROCESSING_MODE == MediaService.MODE_DEFERRED
+
+    @staticmethod
+    def request_processing(instance):
+        """
+        Ask for the variants of a freshly uploaded image
+
+        In deferred mode a job is queued once the current transaction
+        commits and the image stays PENDING. In sync mode (the default, used
+        by tests) the variants are generated immediately.
+
+        Args:
+            instance: Photo, or RegisteredUser with a new profile photo
+        """
+        if not MediaService.is_deferred():
+            MediaService.process(instance)
+            return
+
+        kind = MediaJobKind.TASK_PHOTO if isinstance(instance, Photo) else MediaJobKind.PROFILE_PHOTO
+        transaction.on_commit(lambda: MediaJob.objects.create(kind=kind, object_id=instance.id))
+
+    @staticmethod
+    def process(instance, saved_names=None):
+        """
+        Generate the variants of a Photo or of a user's profile photo
+
+        Args:
+            instance: Photo, or RegisteredUser with a profile photo
+            saved_names: List the stored variant names are appended to
+        """
+        if isinstance(instance, Photo):
+            instance.generate_variants(saved_names)
+        else:
+            instance.generate_profile_photo_variants(saved_names)
+
+    @staticmethod
+    def mark_failed(instance):
+        """Give up on an image whose job keeps failing"""
+        if isinstance(instance, Photo):
+            instance.status = MediaStatus.FAILED
+            instance.save(update_fields=['status'])
+        else:
+            instance.profile_photo_status = MediaStatus.FAILED
+            instance.save(update_fields=['profile_photo_status'])
+
+    @staticmethod
+    def process_job(job):
+        """
+        Run one claimed job
+
+        The job is deleted when it succeeds, when its image no longer exists
+        and after MAX_ATTEMPTS failures; otherwise it is rescheduled.
+
+        Returns:
+            bool: Whether the job succeeded
+        """
+        instance = MediaService.MODELS[job.kind].objects.filter(id=job.object_id).first()
+        if instance is None:
+            job.delete()
+            return False
+
+        saved_names = []
+        try:
+            with transaction.atomic():
+                MediaService.process(instance, saved_names)
+        except Exception:
+            logger.exception('Media job %s failed', job.id)
+            # The rollback dropped the references of the variants written so far
+            ImageService.discard_files(saved_names)
+            job.attempts += 1
+            if job.attempts < MediaService.MAX_ATTEMPTS:
+                job.run_after = timezone.now() + MediaService.RETRY_DELAY * job.attempts
+                job.save(update_fields=['attempts', 'run_after'])
+                return False
+            MediaService.mark_failed(instance)
+            job.delete()
+            return False
+
+        job.delete()
+        return True
+
+    @staticmethod
+    def process_queue(batch_size=QUEUE_BATCH_SIZE):
+        """
+        Claim and run one batch of due jobs
+
+        Rows are locked with SKIP LOCKED so several workers can drain the
+        queue side by side.
+
+        Returns:
+            int: Number of jobs claimed
+        """
+        with transaction.atomic():
+            jobs = list(
+                MediaJob.objects.select_for_update(skip_locked=True).filter(
+                    run_after__lte=timezone.now()
+                ).order_by('id')[:batch_size]
+            )
+            for job in jobs:
+                MediaService.process_job(job)
+
+        return len(jobs)
@@ -0,0 +1,225 @@
+"""
+Notification pub/sub.
+Created notifications are published to their recipient, and the notification
+stream (core/api/views/notification_stream_views.py) subscribes each connected
+user. The backend class is chosen by settings.NOTIFICATION_BROKER_BACKEND.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Queue of notification IDs published to one connected user"""
+
+    def __init__(self, broker, user_id, loop, max_size):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(max_size)
+
+    def push(self, notification_id):
+        """Queue a notification ID; safe to call from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, notification_id)
+        except RuntimeError:
+            pass  # The event loop serving the stream has shut down
+
+    def _put(self, notification_id):
+        """Queue on the event loop, dropping the oldest ID when full"""
+        # Clients catch up on dropped IDs by reconnecting with Last-Event-ID
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(notification_id)
+
+    async def get_batch(self):
+        """Wait for the next notification ID and return it with any already queued"""
+        notification_ids = [await self.queue.get()]
+        while not self.queue.empty():
+            notification_ids.append(self.queue.get_nowait())
+        return notification_ids
+
+    def close(self):
+        """Stop receiving notifications"""
+        self.broker.unsubscribe(self)
+
+
+class InMemoryNotificationBroker:
+    """
+    Broker delivering to the streams of the current process only
+
+    Enough for tests and for a single process serving both the API and the
+    streams.
+    """
+
+    # Notification IDs buffered per subscriber
+    QUEUE_SIZE = 100
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Subscribe to a user's notifications from the running event loop"""
+        subscription = Subscription(self, user_id, asyncio.get_running_loop(), self.QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription"""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def get_subscriber_count(self):
+        """Number of open subscriptions in this process"""
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def publish(self, events):
+        """
+        Publish created notifications to their recipients
+
+        Args:
+            events: (user ID, notification ID) pairs
+        """
+        for user_id, notification_id in events:
+            self.deliver(user_id, notification_id)
+
+    def deliver(self, user_id, notification_id):
+        """Push a notification ID to the user's subscriptions in this process"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.push(notification_id)
+
+
+class PostgresNotificationBroker(InMemoryNotificationBroker):
+    """
+    Broker relaying notifications between processes with LISTEN/NOTIFY
+
+    Publishing runs pg_notify on the Django connection; each process with
+    open streams keeps one extra connection LISTENing in a background thread
+    and delivers what it hears to its local subscriptions.
+    """
+
+    CHANNEL = 'notifications'
+
+    # NOTIFY payloads must be shorter than 8000 bytes
+    MAX_PAYLOAD_BYTES = 8000
+
+    # Seconds between checks of the listening connection, and before reconnecting
+    POLL_TIMEOUT = 5
+    RECONNECT_DELAY = 5
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, user_id):
+        """Subscribe, starting the listener thread on first use"""
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self.listen, name='notification-listener', daemon=True)
+                self._listener.start()
+        return super().subscribe(user_id)
+
+    @classmethod
+    def get_payloads(cls, events):
+        """
+        Encode events as JSON lists of [user ID, notification ID] pairs
+
+        Yields:
+            str payloads, each shorter than MAX_PAYLOAD_BYTES
+        """
+        pairs = []
+        size = 2  # The enclosing brackets
+        for user_id, notification_id in events:
+            pair = json.dumps([user_id, notification_id])
+            pair_size = len(pair) + (1 if pairs else 0)
+            if pairs and size + pair_size >= cls.MAX_PAYLOAD_BYTES:
+                yield '[' + ','.join(pairs) + ']'
+                pairs = []
+                size = 2
+                pair_size = len(pair)
+            pairs.append(pair)
+            size += pair_size
+        if pairs:
+            yield '[' + ','.join(pairs) + ']'
+
+    def publish(self, events):
+        """Notify every listening process, with one NOTIFY per payload of events"""
+        with connection.cursor() as cursor:
+            for payload in self.get_payloads(events):
+                cursor.execute('SELECT pg_notify(%s, %s)', [self.CHANNEL, payload])
+
+    def listen(self):
+        """Deliver notifications heard on the channel, reconnecting on errors"""
+        import psycopg2
+
+        while True:
+            listen_connection = None
+            try:
+                listen_connection = psycopg2.connect(**connection.get_connection_params())
+                listen_connection.autocommit = True
+                with listen_connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.CHANNEL}')
+
+                while True:
+                    if select.select([listen_connection], [], [], self.POLL_TIMEOUT) == ([], [], []):
+                        continue
+                    listen_connection.poll()
+                    while listen_connection.notifies:
+                        for user_id, notification_id in json.loads(listen_connection.notifies.pop(0).payload):
+                            self.deliver(user_id, notification_id)
+            except Exception:
+                logger.exception('Notification listener failed; reconnecting')
+                time.sleep(self.RECONNECT_DELAY)
+            finally:
+                if listen_connection is not None:
+                    listen_connection.close()
+
+
+class NotificationBroker:
+    """Service class giving access to the configured broker backend"""
+
+    _backend = None
+
+    @staticmethod
+    def get_backend():
+        """Return the process-wide broker, created on first use"""
+        if NotificationBroker._backend is None:
+            NotificationBroker._backend = import_string(settings.NOTIFICATION_BROKER_BACKEND)()
+        return NotificationBroker._backend
+
+    @staticmethod
+    def publish(events):
+        """
+        Publish created notifications
+
+        Failures are logged rather than raised: the notifications are
+        stored, and clients see them when they reconnect.
+
+        Args:
+            events: (user ID, notification ID) pairs
+        """
+        try:
+            NotificationBroker.get_backend().publish(events)
+        except Exception:
+            logger.exception('Could not publish %d notification(s)', len(events))
+
+    @staticmethod
+    def subscribe(user_id):
+        """Subscribe to a user's notifications from the running event loop"""
+        return NotificationBroker.get_backend().subscribe(user_id)
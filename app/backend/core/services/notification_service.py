@@ -0,0 +1,62 @@
+"""
+Notification fan-out queue.
+A new task notifies every user living near it. In deferred mode that fan-out
+is queued as TaskNotificationRequest rows and sent by
+`manage.py process_notification_queue`, so creating a task never waits on it.
+"""
+from django.conf import settings
+from django.db import transaction
+from core.models import Notification, TaskNotificationRequest, TaskStatus
+
+
+class NotificationService:
+    """Service class for queueing and sending notification fan-outs"""
+
+    # settings.NOTIFICATION_FANOUT_MODE values
+    MODE_SYNC = 'sync'
+    MODE_DEFERRED = 'deferred'
+
+    # Requests claimed per transaction by process_queue; each one may notify many users
+    QUEUE_BATCH_SIZE = 10
+
+    @staticmethod
+    def request_task_created_notification(task):
+        """
+        Notify the users living near a new task
+
+        In deferred mode a request is queued once the current transaction
+        commits. In sync mode (the default, used by tests) the notifications
+        are sent immediately.
+
+        Args:
+            task: The created task
+        """
+        if settings.NOTIFICATION_FANOUT_MODE != NotificationService.MODE_DEFERRED:
+            Notification.send_task_created_notification(task)
+            return
+
+        transaction.on_commit(lambda: TaskNotificationRequest.objects.create(task_id=task.id))
+
+    @staticmethod
+    def process_queue(batch_size=QUEUE_BATCH_SIZE):
+        """
+        Claim, send and remove one batch of queued fan-outs
+
+        Rows are locked with SKIP LOCKED so several workers can drain the
+        queue side by side. Tasks no longer open by the time their request
+        is claimed are dropped without notifying anyone.
+
+        Returns:
+            int: Number of queued requests processed
+        """
+        with transaction.atomic():
+            requests = list(
+                TaskNotificationRequest.objects.select_for_update(skip_locked=True, of=('self',))
+                .select_related('task').order_by('id')[:batch_size]
+            )
+            for request in requests:
+                if request.task.status == TaskStatus.POSTED:
+                    Notification.send_task_created_notification(request.task)
+            TaskNotificationRequest.objects.filter(id__in=[request.id for request in requests]).delete()
+
+        return len(requests)
@@ -0,0 +1,236 @@
+"""
+Volunteer acceptance service.
+Accepting and unassigning volunteers locks the task row first, so parallel
+requests cannot overfill a task, and applies every change with bulk queries.
+"""
+from django.db import transaction
+from core.models import (
+    Task, TaskStatus, Volunteer, VolunteerStatus, UserStats,
+    BadgeEvaluationRequest, BadgeEvaluationTrigger
+)
+from core.services.badge_service import BadgeService
+
+
+class VolunteerService:
+    """Service class for changing which volunteers are assigned to a task"""
+
+    @staticmethod
+    def lock_task(task):
+        """
+        Lock the task row until the end of the transaction
+
+        Refreshes the fields acceptance depends on from the locked row.
+
+        Args:
+            task: Task to lock; its volunteer_number, status and assignee are refreshed
+        """
+        locked = Task.objects.select_for_update().values(
+            'volunteer_number', 'status', 'assignee_id'
+        ).get(id=task.id)
+        task.volunteer_number = locked['volunteer_number']
+        task.status = locked['status']
+        task.assignee_id = locked['assignee_id']
+        return task
+
+    @staticmethod
+    def apply_changes(task, accepted=(), unassigned=(), reject_pending=False):
+        """
+        Apply volunteer status changes and sync the task's assignees
+
+        Uses one UPDATE per status change, one bulk change of the assignees
+        relation and at most one save of the task, whatever the number of
+        volunteers. Must run inside a transaction holding the task lock.
+
+        Args:
+            task: Locked task
+            accepted: (volunteer ID, user ID) pairs to mark ACCEPTED
+            unassigned: (volunteer ID, user ID) pairs to move from ACCEPTED back to PENDING
+            reject_pending: Also reject every other PENDING volunteer
+        """
+        accepted_ids = [volunteer_id for volunteer_id, _ in accepted]
+        accepted_user_ids = [user_id for _, user_id in accepted]
+        unassigned_ids = [volunteer_id for volunteer_id, _ in unassigned]
+        unassigned_user_ids = [user_id for _, user_id in unassigned]
+
+        if unassigned:
+            Volunteer.objects.filter(id__in=unassigned_ids).update(status=VolunteerStatus.PENDING)
+            task.assignees.remove(*unassigned_user_ids)
+        if accepted:
+            Volunteer.objects.filter(id__in=accepted_ids).update(status=VolunteerStatus.ACCEPTED)
+            task.assignees.add(*accepted_user_ids)
+        if reject_pending:
+            Volunteer.objects.filter(
+                task=task,
+                status=VolunteerStatus.PENDING
+            ).exclude(id__in=accepted_ids).update(status=VolunteerStatus.REJECTED)
+
+        # The single assignee field (backward compatibility) and the status
+        # follow the assignees
+        assignee_ids = sorted(task.assignees.values_list('id', flat=True))
+        update_fields = []
+        if task.assignee_id is None or task.assignee_id in unassigned_user_ids:
+            candidates = accepted_user_ids + assignee_ids
+            task.assignee_id = candidates[0] if candidates else None
+            update_fields.append('assignee')
+        if assignee_ids and task.status == TaskStatus.POSTED:
+            task.status = TaskStatus.ASSIGNED
+            update_fields.append('status')
+        elif not assignee_ids and task.status == TaskStatus.ASSIGNED:
+            task.status = TaskStatus.POSTED
+            update_fields.append('status')
+        if update_fields:
+            task.save(update_fields=update_fields + ['updated_at'])
+
+        # Bulk updates skip the volunteer signals: apply the counter changes
+        # and request the badge checks explicitly
+        if accepted:
+            UserStats.record_task_volunteering(task.id, accepted, 1)
+        if unassigned:
+            UserStats.record_task_volunteering(task.id, unassigned, -1)
+        BadgeService.request_evaluations([
+            BadgeEvaluationRequest(
+                user_id=user_id,
+                trigger=BadgeEvaluationTrigger.VOLUNTEER_ACCEPTED,
+                object_id=volunteer_id
+            )
+            for volunteer_id, user_id in accepted
+        ])
+
+    @staticmethod
+    def accept_volunteer(volunteer, check_capacity=True):
+        """
+        Accept one PENDING or REJECTED volunteer
+
+        Args:
+            volunteer: Volunteer to accept
+            check_capacity: Refuse when the task is full, and reject the
+                remaining PENDING volunteers once it becomes full
+
+        Returns:
+            bool: Whether the volunteer was accepted
+        """
+        task = volunteer.task
+        with transaction.atomic():
+            VolunteerService.lock_task(task)
+
+            current = Volunteer.objects.filter(id=volunteer.id).values('status', 'user_id').first()
+            if current is None or current['status'] not in [VolunteerStatus.PENDING, VolunteerStatus.REJECTED]:
+                return False
+
+            reject_pending = False
+            if check_capacity:
+                current_accepted = Volunteer.objects.filter(
+                    task=task,
+                    status=VolunteerStatus.ACCEPTED
+                ).count()
+                if current_accepted >= task.volunteer_number:
+                    return False  # Task is already at capacity
+                reject_pending = current_accepted + 1 >= task.volunteer_number
+
+            VolunteerService.apply_changes(
+                task,
+                accepted=[(volunteer.id, current['user_id'])],
+                reject_pending=reject_pending
+            )
+
+        volunteer.status = volunteer._loaded_status = VolunteerStatus.ACCEPTED
+        return True
+
+    @staticmethod
+    def accept_volunteers(task, volunteer_ids):
+        """
+        Accept several PENDING volunteers of a task at once
+
+        Returns:
+            tuple of (success, message)
+        """
+        if not volunteer_ids:
+            return False, "No volunteers provided"
+
+        with transaction.atomic():
+            VolunteerService.lock_task(task)
+
+            # Ensure task has a valid volunteer_number
+            if task.volunteer_number <= 0:
+                return False, f"Task volunteer_number is invalid: {task.volunteer_number}"
+
+            if len(volunteer_ids) > task.volunteer_number:
+                return False, f"Cannot accept {len(volunteer_ids)} volunteers. Task only needs {task.volunteer_number}."
+
+            # Get pending volunteers for this task
+            volunteers = list(Volunteer.objects.filter(
+                task=task,
+                id__in=volunteer_ids,
+                status=VolunteerStatus.PENDING
+            ).values_list('id', 'user_id'))
+
+            if len(volunteers) != len(volunteer_ids):
+                return False, "Some volunteers are not available or not pending"
+
+            # Check current capacity
+            current_accepted = Volunteer.objects.filter(
+                task=task,
+                status=VolunteerStatus.ACCEPTED
+            ).count()
+
+            if current_accepted + len(volunteer_ids) > task.volunteer_number:
+                return False, f"Adding {len(volunteer_ids)} volunteers would exceed capacity. Current: {current_accepted}, Requested: {len(volunteer_ids)}, Max: {task.volunteer_number}"
+
+            VolunteerService.apply_changes(task, accepted=volunteers)
+
+        return True, f"Successfully accepted {len(volunteers)} volunteers"
+
+    @staticmethod
+    def set_task_volunteers(task, volunteer_ids):
+        """
+        Make exactly the given volunteers the accepted ones
+
+        Selected PENDING or REJECTED volunteers are accepted and currently
+        accepted volunteers that are not selected go back to PENDING.
+
+        Returns:
+            tuple of (success, message)
+        """
+        if not volunteer_ids:
+            volunteer_ids = []
+
+        with transaction.atomic():
+            VolunteerService.lock_task(task)
+
+            # Ensure task has a valid volunteer_number
+            if task.volunteer_number <= 0:
+                return False, f"Task volunteer_number is invalid: {task.volunteer_number}"
+
+            if len(volunteer_ids) > task.volunteer_number:
+                return False, f"Cannot accept {len(volunteer_ids)} volunteers. Task only needs {task.volunteer_number}."
+
+            # All current volunteers (PENDING, ACCEPTED, and REJECTED)
+            volunteers = list(Volunteer.objects.filter(
+                task=task,
+                status__in=[VolunteerStatus.PENDING, VolunteerStatus.ACCEPTED, VolunteerStatus.REJECTED]
+            ).values_list('id', 'user_id', 'status'))
+
+            selected_ids = set(volunteer_ids)
+            selected = [volunteer for volunteer in volunteers if volunteer[0] in selected_ids]
+
+            # Validate that all requested volunteer IDs exist and are available
+            if len(selected) != len(volunteer_ids):
+                missing_count = len(volunteer_ids) - len(selected)
+                return False, f"{missing_count} volunteer(s) not available for assignment"
+
+            to_accept = [
+                (volunteer_id, user_id) for volunteer_id, user_id, status in selected
+                if status != VolunteerStatus.ACCEPTED
+            ]
+            to_unassign = [
+                (volunteer_id, user_id) for volunteer_id, user_id, status in volunteers
+                if status == VolunteerStatus.ACCEPTED and volunteer_id not in selected_ids
+            ]
+
+            VolunteerService.apply_changes(task, accepted=to_accept, unassigned=to_unassign)
+
+        message = f"Successfully updated volunteers. Accepted: {len(selected)}"
+        if to_unassign:
+            message += f", Unassigned: {len(to_unassign)}"
+
+        return True, message
@@ -1,68 +1,181 @@
 """
-Django signals for automatic badge checking and awarding.
+Django signals for maintaining per-user statistics and unread notification
+counters, for automatic badge checking and awarding, for invalidating
+cached feeds, and for releasing the stored files of deleted images.
+
+Badge checks go through BadgeService.request_evaluation, which either
+evaluates immediately or queues the check for the badge worker depending
+on settings.BADGE_EVALUATION_MODE. The statistics handlers are
+connected first so badge checks read up-to-date counters. Handlers skip
+saves whose update_fields leave the fields they depend on untouched.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from core.models import Volunteer, Task, Review, UserFollows, Comment
+from core.models import (
+    RegisteredUser, Volunteer, VolunteerStatus, Task, Review, UserFollows, Comment, Feed,
+    BadgeEvaluationTrigger, UserStats, Notification, Photo
+)
 from core.services.badge_service import BadgeService
+from core.services.image_service import ImageService
+
+
+def saved_any(update_fields, fields):
+    """Whether a save (with the given update_fields) may have written any of fields"""
+    return update_fields is None or not update_fields.isdisjoint(fields)
+
+
+@receiver(post_save, sender=RegisteredUser)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    """Start new users with an empty stats row"""
+    if created and not raw:
+        UserStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Volunteer)
+def update_volunteer_stats(sender, instance, created, **kwargs):
+    """Count volunteer records entering or leaving the ACCEPTED status"""
+    if not saved_any(kwargs.get('update_fields'), {'status'}):
+        return
+    if not created and not hasattr(instance, '_loaded_status'):
+        # Previous status unknown; recompute the counters instead
+        UserStats.rebuild([instance.user_id])
+        return
+    
+    was_accepted = getattr(instance, '_loaded_status', None) == VolunteerStatus.ACCEPTED
+    is_accepted = instance.status == VolunteerStatus.ACCEPTED
+    if is_accepted != was_accepted:
+        UserStats.record_volunteering(instance, 1 if is_accepted else -1)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Volunteer)
+def remove_volunteer_stats(sender, instance, **kwargs):
+    """Uncount deleted accepted volunteer records"""
+    if instance.status == VolunteerStatus.ACCEPTED:
+        UserStats.record_volunteering(instance, -1)
+
+
+@receiver(post_save, sender=Task)
+def add_created_task_stats(sender, instance, created, **kwargs):
+    """Count tasks created by each user"""
+    if created:
+        UserStats.apply_deltas(instance.creator_id, {'created_task_count': 1})
+
+
+@receiver(post_delete, sender=Task)
+def remove_created_task_stats(sender, instance, **kwargs):
+    """Uncount deleted tasks"""
+    UserStats.apply_deltas(instance.creator_id, {'created_task_count': -1})
+
+
+@receiver(post_save, sender=Review)
+def update_review_stats(sender, instance, created, **kwargs):
+    """Apply added or edited reviews to the reviewee's running totals and rating"""
+    if not created and not saved_any(kwargs.get('update_fields'), Review.RATING_FIELDS):
+        return
+    if not created and getattr(instance, '_loaded_ratings', None) is None:
+        # Previous ratings unknown; rebuild the totals from all reviews instead
+        UserStats.rebuild([instance.reviewee_id])
+        RegisteredUser.recalculate_rating(instance.reviewee_id)
+        return
+    
+    old_ratings = getattr(instance, '_loaded_ratings', None)
+    ratings = instance.get_ratings()
+    UserStats.record_review_change(instance.reviewee_id, old_ratings, ratings)
+    if old_ratings is None or ratings['score'] != old_ratings['score']:
+        RegisteredUser.recalculate_rating(instance.reviewee_id)
+    instance._loaded_ratings = ratings
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_stats(sender, instance, **kwargs):
+    """Remove deleted reviews from the reviewee's running totals and rating"""
+    UserStats.record_review_change(instance.reviewee_id, instance.get_ratings(), None)
+    RegisteredUser.recalculate_rating(instance.reviewee_id)
+
+
+@receiver(post_save, sender=UserFollows)
+def add_follower_stats(sender, instance, created, **kwargs):
+    """Count followers of each user"""
+    if created:
+        UserStats.apply_deltas(instance.following_id, {'follower_count': 1})
+
+
+@receiver(post_delete, sender=UserFollows)
+def remove_follower_stats(sender, instance, **kwargs):
+    """Uncount removed follows"""
+    UserStats.apply_deltas(instance.following_id, {'follower_count': -1})
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created, raw=False, **kwargs):
+    """Push new notifications to the recipient's open streams"""
+    if created and not raw:
+        Notification.publish([instance])
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_notification_count(sender, instance, created, **kwargs):
+    """Count notifications created unread or changing read status"""
+    if not created and not saved_any(kwargs.get('update_fields'), {'is_read'}):
+        return
+    if not created and not hasattr(instance, '_loaded_is_read'):
+        # Previous read status unknown; recount instead
+        RegisteredUser.recalculate_unread_notification_count(instance.user_id)
+        return
+    
+    was_unread = not created and not instance._loaded_is_read
+    is_unread = not instance.is_read
+    if is_unread != was_unread:
+        RegisteredUser.apply_unread_notification_changes({instance.user_id: 1 if is_unread else -1})
+    instance._loaded_is_read = instance.is_read
+
+
+@receiver(post_delete, sender=Notification)
+def remove_unread_notification_count(sender, instance, **kwargs):
+    """Uncount deleted unread notifications"""
+    if not instance.is_read:
+        RegisteredUser.apply_unread_notification_changes({instance.user_id: -1})
 
 
 @receiver(post_save, sender=Volunteer)
 def check_volunteer_badges(sender, instance, created, **kwargs):
-    """Check and award badges when a volunteer record is created or updated"""
-    if instance.status == 'ACCEPTED':
-        user = instance.user
-        
-        # Check volunteer-specific badges
-        BadgeService.check_volunteer_badges(user, instance)
-        
-        # Check user-level badges that might be affected
-        BadgeService.check_neighborhood_hero(user)
-        BadgeService.check_jack_of_all_trades(user)
-        BadgeService.check_caring_contributor(user)
-        BadgeService.check_help_and_travel(user)
-        BadgeService.check_plate_not_empty(user)
+    """Request a badge check when a volunteer record is accepted"""
+    if instance.status == 'ACCEPTED' and saved_any(kwargs.get('update_fields'), {'status'}):
+        BadgeService.request_evaluation(
+            instance.user_id, BadgeEvaluationTrigger.VOLUNTEER_ACCEPTED, instance.id
+        )
 
 
 @receiver(post_save, sender=Task)
 def check_task_badges(sender, instance, created, **kwargs):
-    """Check and award badges when a task is created or updated"""
-    user = instance.creator
-    
+    """Request badge checks when a task is created or completed"""
     # Check task creation badges
     if created:
-        BadgeService.check_task_creation_badges(user, instance)
+        BadgeService.request_evaluation(
+            instance.creator_id, BadgeEvaluationTrigger.TASK_CREATED, instance.id
+        )
     
-    # Check task completion badges
-    if instance.status == 'COMPLETED':
-        # Check for all accepted volunteers
-        volunteers = Volunteer.objects.filter(
-            task=instance,
-            status='ACCEPTED'
+    # Check task completion badges of all accepted volunteers
+    if instance.status == 'COMPLETED' and saved_any(kwargs.get('update_fields'), {'status'}):
+        BadgeService.request_evaluation(
+            instance.creator_id, BadgeEvaluationTrigger.TASK_COMPLETED, instance.id
         )
-        for volunteer in volunteers:
-            BadgeService.check_task_completion_badges(volunteer.user, instance)
 
 
 @receiver(post_save, sender=Review)
 def check_review_badges(sender, instance, created, **kwargs):
-    """Check and award badges when a review is created"""
-    user = instance.reviewee
-    
-    # Check review-related badges
-    BadgeService.check_just_perfect(user)
-    BadgeService.check_rising_helper(user)
-    BadgeService.check_gentle_communicator(user)
-    BadgeService.check_model_citizen(user)
-    BadgeService.check_reliable_neighbour(user)
+    """Request a badge check when a review is saved"""
+    if created or saved_any(kwargs.get('update_fields'), Review.RATING_FIELDS):
+        BadgeService.request_evaluation(instance.reviewee_id, BadgeEvaluationTrigger.REVIEW_RECEIVED)
 
 
 @receiver(post_save, sender=UserFollows)
 def check_follower_badges(sender, instance, created, **kwargs):
-    """Check and award badges when someone gets a new follower"""
+    """Request a badge check when someone gets a new follower"""
     if created:
-        user = instance.following  # The user being followed
-        BadgeService.check_people_trust_you(user)
+        # The user being followed
+        BadgeService.request_evaluation(instance.following_id, BadgeEvaluationTrigger.FOLLOWER_GAINED)
 
 
 @receiver(post_save, sender=Comment)
@@ -76,3 +189,47 @@ def check_comment_badges(sender, instance, created, **kwargs):
         # Send notifications
         from core.models import Notification
         Notification.send_comment_added_notification(instance)
+
+
+@receiver(post_save, sender=Task)
+def invalidate_feeds_on_task_change(sender, instance, created, **kwargs):
+    """Drop cached ranked feeds when a task is created or a ranked field changes"""
+    if not created and not saved_any(kwargs.get('update_fields'), Feed.RANKED_TASK_FIELDS):
+        return
+    
+    ranking = instance.get_ranking_values()
+    # Without a snapshot (e.g. a task saved without being loaded) assume a change
+    loaded = getattr(instance, '_loaded_ranking', {})
+    if created or any(attname not in loaded or loaded[attname] != value for attname, value in ranking.items()):
+        Feed.invalidate_all()
+    instance._loaded_ranking = ranking
+
+
+@receiver(post_delete, sender=Task)
+def invalidate_feeds_on_task_delete(sender, instance, **kwargs):
+    """Drop cached ranked feeds when a task is removed"""
+    Feed.invalidate_all()
+
+
+@receiver(post_save, sender=UserFollows)
+@receiver(post_delete, sender=UserFollows)
+def invalidate_follower_feed(sender, instance, **kwargs):
+    """Followed creators rank higher; re-rank the follower's feed"""
+    Feed(instance.follower).invalidate()
+
+
+@receiver(post_delete, sender=Photo)
+def release_photo_files(sender, instance, **kwargs):
+    """Release a deleted photo's files, also when it goes with its task"""
+    # Runs in the deleting transaction; shared content stays until its last reference goes
+    if instance.url:
+        instance.url.delete(save=False)
+    ImageService.delete_variants(instance.variants)
+
+
+@receiver(post_delete, sender=RegisteredUser)
+def release_profile_photo_files(sender, instance, **kwargs):
+    """Release a deleted user's profile photo and its variants"""
+    if instance.profile_photo:
+        instance.profile_photo.delete(save=False)
+    ImageService.delete_variants(instance.profile_photo_variants)
@@ -0,0 +1,155 @@
+"""
+Content-addressed media storage.
+Files are stored once per distinct content under their SHA-256 digest, so
+re-uploads and shared images take no extra space. Each saved name counts as
+a reference (core/models/media_blob.py) and a file is only removed when its
+last reference is deleted.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage naming files after the SHA-256 digest of their content
+
+    The name asked for (e.g. by an ImageField's upload_to) only contributes
+    its extension: the file is stored as blobs/ab/cd/<digest>.<ext>. Names
+    saved before this storage was introduced are read and deleted as usual.
+    """
+
+    BLOB_DIRECTORY = 'blobs'
+
+    BLOB_NAME_PATTERN = re.compile(r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[a-z0-9]{1,10})?$')
+    EXTENSION_PATTERN = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+    @classmethod
+    def get_digest(cls, name):
+        """Return the digest a stored name refers to, or None for other names"""
+        match = cls.BLOB_NAME_PATTERN.match(name.replace('\\', '/'))
+        return match.group(1) if match else None
+
+    @classmethod
+    def get_blob_name(cls, digest, extension):
+        """Storage name of a blob, fanned out over two directory levels"""
+        return f'{cls.BLOB_DIRECTORY}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def get_available_name(self, name, max_length=None):
+        """Keep the name as is: _save picks the final name from the content"""
+        return name
+
+    def _save(self, name, content):
+        """
+        Store the content unless an identical blob exists, and count the reference
+
+        Called while saving the owning row, the reference joins the caller's
+        transaction: wrap the save in transaction.atomic() so a failed insert
+        rolls the reference back too.
+        """
+        from core.models import MediaBlob
+
+        # Uploads streamed through PhotoUploadHandler were hashed on arrival
+        digest = getattr(content, 'sha256', None)
+        size = content.size
+        if digest is None:
+            digest = hashlib.sha256()
+            for chunk in content.chunks():
+                digest.update(chunk)
+            digest = digest.hexdigest()
+
+        extension = os.path.splitext(name)[1].lower()
+        if not self.EXTENSION_PATTERN.match(extension):
+            extension = ''
+        blob_name = self.get_blob_name(digest, extension)
+
+        with transaction.atomic():
+            MediaBlob.add_reference(digest, size)
+            # Checked under the row lock: a release may just have removed the file
+            if not self.exists(blob_name):
+                self.write_blob(blob_name, content)
+        return blob_name
+
+    def write_blob(self, name, content):
+        """Write a file through a temporary file so readers never see it half-written"""
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def delete(self, name):
+        """
+        Drop a reference, removing the file once nothing refers to it
+
+        The reference is dropped in the caller's transaction, so it should
+        change the owning row in the same transaction.atomic(). The file is
+        only removed after that commits, and only if the blob is still
+        unreferenced by then.
+        """
+        from core.models import MediaBlob
+
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        digest = self.get_digest(name)
+        if digest is None:
+            return super().delete(name)
+
+        with transaction.atomic():
+            if MediaBlob.release(digest) == 0:
+                directory = os.path.dirname(name)
+                transaction.on_commit(lambda: self.remove_blob(digest, directory))
+
+    def discard(self, name):
+        """
+        Remove a file saved in a transaction that was then rolled back
+
+        The reference _save counted went away with the rollback, so the file
+        is removed unless another name still refers to the blob.
+        """
+        from core.models import MediaBlob
+
+        digest = self.get_digest(name)
+        if digest is None:
+            return super().delete(name)
+
+        with transaction.atomic():
+            # The row may have been rolled back too; recreate it so that
+            # remove_blob checks the count under the lock _save takes
+            size = self.size(name) if self.exists(name) else 0
+            MediaBlob.objects.bulk_create([MediaBlob(digest=digest, size=size)], ignore_conflicts=True)
+            self.remove_blob(digest, os.path.dirname(name))
+
+    def remove_blob(self, digest, directory):
+        """Remove the files of a blob, unless it was referenced again meanwhile"""
+        from core.models import MediaBlob
+
+        with transaction.atomic():
+            # Checked under the row lock, which _save takes before writing
+            if MediaBlob.objects.select_for_update().filter(digest=digest, reference_count=0).first() is None:
+                return
+            # The same content may also be stored under another extension
+            for filename in self.listdir(directory)[1] if self.exists(directory) else []:
+                if filename.split('.')[0] == digest:
+                    super().delete(f'{directory}/{filename}')
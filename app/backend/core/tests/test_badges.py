@@ -7,7 +7,8 @@ from datetime import timedelta, time
 from unittest.mock import patch
 from core.models import (
     RegisteredUser, Task, TaskCategory, TaskStatus, Volunteer, 
-    VolunteerStatus, Review, UserFollows, Badge, UserBadge, BadgeType, Photo
+    VolunteerStatus, Review, UserFollows, Badge, UserBadge, BadgeType, Photo,
+    BadgeEvaluationRequest, UserStats
 )
 from core.services.badge_service import BadgeService
 
@@ -813,6 +814,29 @@ class BadgeServiceTestCase(TestCase):
         result = BadgeService.check_help_and_travel(self.user1)
         self.assertFalse(result)
     
+    def test_help_and_travel_bulk_city_matches_check(self):
+        """Test batch evaluation reads the city like check_help_and_travel does"""
+        def complete_at(location):
+            task = Task.objects.create(
+                title=f'Task in {location}',
+                description='Test',
+                category=TaskCategory.OTHER,
+                location=location,
+                deadline=timezone.now() + timedelta(days=7),
+                creator=self.user2,
+                status=TaskStatus.COMPLETED
+            )
+            Volunteer.objects.create(user=self.user1, task=task, status=VolunteerStatus.ACCEPTED)
+        
+        complete_at('Istanbul, Kadikoy')
+        complete_at('Istanbul')
+        eligible = BadgeService.compute_user_level_badges([self.user1.id])
+        self.assertNotIn(BadgeType.HELP_AND_TRAVEL, eligible[self.user1.id])
+        
+        complete_at(' Ankara ,Turkey')
+        eligible = BadgeService.compute_user_level_badges([self.user1.id])
+        self.assertIn(BadgeType.HELP_AND_TRAVEL, eligible[self.user1.id])
+    
     def test_help_and_travel_incomplete_tasks(self):
         """Test badge not awarded if tasks not completed"""
         locations = ['Istanbul, Turkey', 'Ankara, Turkey']
@@ -1378,6 +1402,259 @@ class BadgeServiceTestCase(TestCase):
         result = BadgeService.check_icebreaker(self.user1)
         self.assertFalse(result)
     
+    def _create_batch_badge_history(self):
+        """Give user1, user2 and user3 histories that qualify for user-level badges"""
+        categories = [value for value, _ in TaskCategory.choices]
+        creators = []
+        for i in range(11):
+            creator = RegisteredUser.objects.create_user(
+                email=f'batch{i}@test.com',
+                name=f'Batch{i}',
+                surname='Test',
+                username=f'batch{i}',
+                phone_number=f'+90555000{i:04d}',
+                password='Test123!'
+            )
+            creators.append(creator)
+            
+            # user1 helps 11 neighbours across every category, completing
+            # tasks in two different cities
+            task = Task.objects.create(
+                title=f'Batch Task {i}',
+                description='Test task',
+                category=categories[i % len(categories)],
+                location=['Istanbul, Turkey', 'Ankara, Turkey'][i % 2],
+                deadline=timezone.now() + timedelta(days=7),
+                status=TaskStatus.COMPLETED if i < 2 else TaskStatus.POSTED,
+                creator=creator
+            )
+            Volunteer.objects.create(user=self.user1, task=task, status=VolunteerStatus.ACCEPTED)
+            
+            # user2 gains 11 followers
+            UserFollows.objects.create(follower=creator, following=self.user2)
+            
+            # user3 gets 5 perfect reviews
+            if i < 5:
+                Review.objects.create(
+                    reviewer=creator,
+                    reviewee=self.user3,
+                    task=task,
+                    reliability=5.0,
+                    task_completion=5.0,
+                    communication_requester_to_volunteer=5.0,
+                    safety_and_respect=5.0
+                )
+        
+        Task.objects.create(
+            title='Own Task',
+            description='Test task',
+            category=TaskCategory.OTHER,
+            location='Istanbul',
+            deadline=timezone.now() + timedelta(days=7),
+            creator=self.user1
+        )
+    
+    def test_compute_user_level_badges_batch(self):
+        """Test batch evaluation matches the per-user criteria in two queries"""
+        self._create_batch_badge_history()
+        user_ids = [self.user1.id, self.user2.id, self.user3.id]
+        
+        # Stats rows, completed cities
+        with self.assertNumQueries(2):
+            eligible = BadgeService.compute_user_level_badges(user_ids)
+        
+        self.assertEqual(eligible[self.user1.id], {
+            BadgeType.NEIGHBORHOOD_HERO,
+            BadgeType.JACK_OF_ALL_TRADES,
+            BadgeType.PLATE_NOT_EMPTY,
+            BadgeType.CARING_CONTRIBUTOR,
+            BadgeType.HELP_AND_TRAVEL,
+        })
+        self.assertEqual(eligible[self.user2.id], {BadgeType.PEOPLE_TRUST_YOU})
+        self.assertEqual(eligible[self.user3.id], {
+            BadgeType.JUST_PERFECT,
+            BadgeType.RISING_HELPER,
+            BadgeType.GENTLE_COMMUNICATOR,
+            BadgeType.MODEL_CITIZEN,
+            BadgeType.RELIABLE_NEIGHBOUR,
+        })
+    
+    def test_evaluate_users_awards_in_bulk(self):
+        """Test batch awarding inserts badges and notifications once"""
+        from core.models import Notification, NotificationType
+        
+        self._create_batch_badge_history()
+        user_ids = [self.user1.id, self.user2.id, self.user3.id]
+        
+        # Start from a clean slate; signals may have awarded some already
+        UserBadge.objects.filter(user_id__in=user_ids).delete()
+        Notification.objects.filter(user_id__in=user_ids, type=NotificationType.BADGE_EARNED).delete()
+        
+        # Badge lookup, stats rows, completed cities, user row locks, existing
+        # awards, 2 bulk inserts, the re-read of inserted awards, and one unread
+        # counter update per distinct badge count (5 and 1)
+        with self.assertNumQueries(10):
+            awarded = BadgeService.evaluate_users(user_ids)
+        
+        self.assertEqual(len(awarded[self.user1.id]), 5)
+        self.assertEqual(awarded[self.user2.id], [BadgeType.PEOPLE_TRUST_YOU])
+        self.assertEqual(len(awarded[self.user3.id]), 5)
+        self.assertEqual(UserBadge.objects.filter(user_id__in=user_ids).count(), 11)
+        self.assertEqual(
+            Notification.objects.filter(user_id__in=user_ids, type=NotificationType.BADGE_EARNED).count(),
+            11
+        )
+        
+        # Re-evaluating awards nothing new
+        self.assertEqual(BadgeService.evaluate_users(user_ids), {})
+        self.assertEqual(BadgeService.evaluate_all_users(batch_size=2)[1], 0)
+        self.assertEqual(BadgeService.check_all_badges_for_user(self.user1), [])
+
+    def test_bulk_award_reads_existing_awards_under_user_locks(self):
+        """Test awards are read after locking the users, so a concurrent award is not announced twice"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import Notification, NotificationType
+
+        self._create_batch_badge_history()
+        badge = Badge.objects.get(badge_type=BadgeType.PEOPLE_TRUST_YOU)
+        UserBadge.objects.filter(user=self.user2).delete()
+        UserBadge.objects.create(user=self.user2, badge=badge)
+        Notification.objects.filter(user=self.user2, type=NotificationType.BADGE_EARNED).delete()
+        badges_by_type = BadgeService.get_badges_by_type()
+
+        with CaptureQueriesContext(connection) as queries:
+            awarded = BadgeService.award_badges_bulk(
+                {self.user2.id: {BadgeType.PEOPLE_TRUST_YOU}}, badges_by_type
+            )
+
+        self.assertEqual(awarded, {})
+        self.assertFalse(
+            Notification.objects.filter(user=self.user2, type=NotificationType.BADGE_EARNED).exists()
+        )
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertIn('FOR UPDATE', sql[0])
+        self.assertIn('core_userbadge', sql[1])
+
+    def test_user_stats_follow_incremental_changes(self):
+        """Test signal-maintained counters match a rebuild from scratch"""
+        self._create_batch_badge_history()
+        
+        # Edit a review, withdraw a volunteer and drop a follow
+        review = Review.objects.filter(reviewee=self.user3).first()
+        review.communication_requester_to_volunteer = 3.0
+        review.save()
+        Volunteer.objects.filter(user=self.user1).first().withdraw_volunteer()
+        UserFollows.objects.filter(following=self.user2).first().delete()
+        Review.objects.filter(reviewee=self.user3).last().delete()
+        
+        fields = [field.attname for field in UserStats._meta.fields]
+        user_ids = [self.user1.id, self.user2.id, self.user3.id]
+        incremental = UserStats.objects.filter(user_id__in=user_ids).order_by('user_id').values_list(*fields)
+        incremental = list(incremental)
+        UserStats.rebuild(user_ids)
+        rebuilt = UserStats.objects.filter(user_id__in=user_ids).order_by('user_id').values_list(*fields)
+        self.assertEqual(incremental, list(rebuilt))
+        
+        stats = UserStats.get_for_user(self.user3)
+        self.assertEqual(stats.review_count, 4)
+        self.assertEqual(stats.perfect_review_count, 3)
+        self.assertEqual(stats.great_communication_count, 3)
+        self.assertEqual(UserStats.get_for_user(self.user1).accepted_volunteer_count, 10)
+        self.assertEqual(UserStats.get_for_user(self.user2).follower_count, 10)
+    
+    def test_user_stats_follow_bulk_volunteer_changes(self):
+        """Test accepting and unassigning through VolunteerService keeps the stats rows current"""
+        from core.services.volunteer_service import VolunteerService
+        
+        self._create_batch_badge_history()
+        task = Task.objects.create(
+            title='Bulk task',
+            description='Test',
+            category=TaskCategory.TUTORING,
+            location='Bursa',
+            deadline=timezone.now() + timedelta(days=7),
+            creator=self.user2,
+            volunteer_number=2
+        )
+        first = Volunteer.objects.create(user=self.user1, task=task)
+        second = Volunteer.objects.create(user=self.user3, task=task)
+        user_ids = [self.user1.id, self.user3.id]
+        UserStats.get_for_users(user_ids)
+        
+        fields = [field.attname for field in UserStats._meta.fields]
+        
+        def assert_stats_current():
+            incremental = list(
+                UserStats.objects.filter(user_id__in=user_ids).order_by('user_id').values_list(*fields)
+            )
+            self.assertEqual(len(incremental), 2)
+            computed = UserStats.compute(user_ids)
+            self.assertEqual(
+                incremental,
+                [tuple(getattr(computed[user_id], field) for field in fields) for user_id in sorted(user_ids)]
+            )
+        
+        self.assertTrue(VolunteerService.set_task_volunteers(task, [first.id, second.id])[0])
+        assert_stats_current()
+        self.assertTrue(VolunteerService.set_task_volunteers(task, [second.id])[0])
+        assert_stats_current()
+    
+    def test_user_stats_rebuild_locks_and_updates_rows_in_place(self):
+        """Test rebuilding locks the existing rows before computing and never deletes them"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self._create_batch_badge_history()
+        UserStats.objects.filter(user=self.user3).delete()
+        user_ids = [self.user1.id, self.user3.id]
+        
+        with CaptureQueriesContext(connection) as queries:
+            stats = UserStats.rebuild(user_ids)
+        
+        sql = [query['sql'] for query in queries.captured_queries if not query['sql'].startswith('SAVEPOINT')]
+        self.assertIn('FOR UPDATE', sql[0])
+        self.assertFalse(any(statement.startswith('DELETE') for statement in sql))
+        for user_id in user_ids:
+            stored = UserStats.objects.get(user_id=user_id)
+            self.assertEqual(stored.accepted_volunteer_count, stats[user_id].accepted_volunteer_count)
+            self.assertEqual(stored.review_count, stats[user_id].review_count)
+    
+    def test_user_stats_built_on_first_read(self):
+        """Test a missing stats row is computed from scratch when read"""
+        self._create_batch_badge_history()
+        UserStats.objects.filter(user=self.user1).delete()
+        
+        stats = UserStats.get_for_user(self.user1)
+        self.assertEqual(stats.accepted_volunteer_count, 11)
+        self.assertEqual(stats.distinct_requester_count, 11)
+        self.assertEqual(stats.created_task_count, 1)
+        self.assertTrue(UserStats.objects.filter(user=self.user1).exists())
+    
+    @override_settings(BADGE_EVALUATION_MODE='deferred')
+    def test_deferred_evaluation_queues_until_processed(self):
+        """Test deferred mode only queues checks and the worker awards them"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_batch_badge_history()
+        
+        user_ids = [self.user1.id, self.user2.id, self.user3.id]
+        self.assertFalse(UserBadge.objects.filter(user_id__in=user_ids).exists())
+        queued = BadgeEvaluationRequest.objects.count()
+        self.assertGreater(queued, 0)
+        
+        self.assertEqual(BadgeService.process_queue(), queued)
+        self.assertFalse(BadgeEvaluationRequest.objects.exists())
+        self.assertEqual(BadgeService.process_queue(), 0)
+        
+        self.assertBadgeAwarded(self.user1, BadgeType.NEIGHBORHOOD_HERO)
+        self.assertBadgeAwarded(self.user1, BadgeType.PLATE_NOT_EMPTY)
+        self.assertBadgeAwarded(self.user2, BadgeType.PEOPLE_TRUST_YOU)
+        self.assertBadgeAwarded(self.user3, BadgeType.JUST_PERFECT)
+        # The creation badge of the own task needs a far deadline
+        self.assertFalse(
+            UserBadge.objects.filter(user=self.user1, badge__badge_type=BadgeType.FAR_SIGHTED).exists()
+        )
+    
     def test_badge_notification_sent_on_award(self):
         """Test that notification is sent when a badge is awarded"""
         from core.models import Comment, Notification, NotificationType, Badge
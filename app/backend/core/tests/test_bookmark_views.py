@@ -72,3 +72,40 @@ class BookmarkViewSetTests(TestCase):
         self.assertTrue(
             Bookmark.objects.filter(user=self.user, task=self.other_task).exists()
         )
+
+    def test_list_cursor_pagination(self):
+        """Cursor mode should walk every bookmark once, newest first"""
+        for i in range(4):
+            task = Task.objects.create(
+                title=f'Paged Task {i}',
+                description='Task for cursor paging',
+                category='OTHER',
+                location='Somewhere',
+                deadline=timezone.now() + datetime.timedelta(days=1),
+                creator=self.other_user
+            )
+            Bookmark.add_bookmark(user=self.user, task=task)
+        expected_ids = list(
+            Bookmark.objects.filter(user=self.user).order_by('-timestamp', '-id').values_list('id', flat=True)
+        )
+        view = BookmarkViewSet.as_view({'get': 'list'})
+
+        seen_ids = []
+        cursor = ''
+        while cursor is not None:
+            request = self.factory.get('/bookmarks/', {'cursor': cursor, 'limit': 2})
+            force_authenticate(request, user=self.user)
+            response = view(request)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pagination = response.data['data']['pagination']
+            self.assertNotIn('total_records', pagination)
+            seen_ids += [bookmark['id'] for bookmark in response.data['data']['bookmarks']]
+            cursor = pagination['next_cursor']
+
+        self.assertEqual(seen_ids, expected_ids)
+
+        # Malformed cursors are rejected
+        request = self.factory.get('/bookmarks/', {'cursor': 'not-a-cursor'})
+        force_authenticate(request, user=self.user)
+        response = view(request)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
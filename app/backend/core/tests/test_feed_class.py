@@ -1,7 +1,13 @@
+from unittest import mock
+from django.core.cache import cache
 from django.test import TestCase
 from django.utils import timezone
+from rest_framework.test import APIClient
 import datetime
-from core.models import RegisteredUser, Task, TaskCategory, Feed, Bookmark, Tag
+from core.models import (
+    RegisteredUser, Task, TaskCategory, TaskStatus, Feed, Bookmark, Tag,
+    UserFollows, Volunteer
+)
 
 
 class FeedClassTests(TestCase):
@@ -99,6 +105,9 @@ class FeedClassTests(TestCase):
         
         # Create feed for user
         self.feed = Feed(self.user)
+        
+        # Ranked feeds are cached; start every test cold
+        cache.clear()
 
     def test_feed_initialization(self):
         """Test feed initialization"""
@@ -194,4 +203,126 @@ class FeedClassTests(TestCase):
         bookmarked = self.feed.get_bookmarked_tasks()
         self.assertEqual(len(bookmarked), 2)
         self.assertIn(self.task1, bookmarked)
-        self.assertIn(self.task3, bookmarked)
\ No newline at end of file
+        self.assertIn(self.task3, bookmarked)
+
+    def test_get_followed_users_tasks(self):
+        """Test getting open tasks of followed users"""
+        self.assertEqual(list(self.feed.get_followed_users_tasks()), [])
+        
+        UserFollows.objects.create(follower=self.user, following=self.creator)
+        
+        # Open tasks only, earliest deadline first
+        followed = list(self.feed.get_followed_users_tasks())
+        self.assertEqual(followed, [self.task1, self.task2, self.task3])
+
+    def test_rank_tasks(self):
+        """Test ranking blends urgency, deadline, affinity and follows"""
+        # Urgent task with the nearest deadline ranks first by default
+        ranked = self.feed.rank_tasks()
+        self.assertEqual(ranked, [self.task1.id, self.task2.id, self.task3.id])
+        
+        # A followed creator and a favourite category lift a task
+        other_creator = RegisteredUser.objects.create_user(
+            email='other@example.com',
+            name='Other',
+            surname='Creator',
+            username='othercreator',
+            phone_number='5555555555',
+            password='password789'
+        )
+        followed_task = Task.objects.create(
+            title='Tutoring Again',
+            description='More calculus',
+            category=TaskCategory.TUTORING,
+            location='University',
+            deadline=timezone.now() + datetime.timedelta(days=7),
+            urgency_level=1,
+            creator=other_creator
+        )
+        UserFollows.objects.create(follower=self.user, following=other_creator)
+        Volunteer.objects.create(user=self.user, task=self.task2)
+        
+        ranked = self.feed.rank_tasks()
+        self.assertEqual(ranked[0], followed_task.id)
+        
+        # Tasks the user already volunteered for are left out
+        self.assertNotIn(self.task2.id, ranked)
+
+    def test_rank_tasks_locality(self):
+        """Test nearby tasks rank above distant ones"""
+        self.user.location = 'Kadıköy, İstanbul'
+        self.user.save()
+        for task, location in [(self.task1, 'Ankara'), (self.task3, 'Kadıköy, İstanbul')]:
+            task.location = location
+            task.save()
+        
+        ranked = self.feed.rank_tasks()
+        self.assertLess(ranked.index(self.task3.id), ranked.index(self.task1.id))
+
+    def test_load_ranked_feed_is_cached(self):
+        """Test warm pages are served from the cached ranking"""
+        with mock.patch.object(Feed, 'rank_tasks', autospec=True, side_effect=Feed.rank_tasks) as rank_tasks:
+            page = self.feed.load_ranked_feed(page=1, items_per_page=2)
+            self.assertEqual(page['data'], [self.task1, self.task2])
+            self.assertEqual(page['pagination']['total_records'], 3)
+            self.assertEqual(page['pagination']['next_page'], 2)
+            
+            page = self.feed.load_ranked_feed(page=2, items_per_page=2)
+            self.assertEqual(page['data'], [self.task3])
+            self.assertEqual(rank_tasks.call_count, 1)
+            
+            # Creating a task invalidates every cached feed
+            new_task = Task.objects.create(
+                title='Brand New Task',
+                description='Just posted',
+                category=TaskCategory.OTHER,
+                location='Apartment',
+                deadline=timezone.now() + datetime.timedelta(hours=2),
+                urgency_level=5,
+                creator=self.creator
+            )
+            page = self.feed.load_ranked_feed(page=1, items_per_page=2)
+            self.assertEqual(page['data'][0], new_task)
+            self.assertEqual(rank_tasks.call_count, 2)
+            
+            # So does a status change
+            new_task.status = TaskStatus.CANCELLED
+            new_task.save()
+            page = self.feed.load_ranked_feed(page=1, items_per_page=2)
+            self.assertNotIn(new_task, page['data'])
+            self.assertEqual(rank_tasks.call_count, 3)
+            
+            # A full save changing only unranked fields keeps the ranking
+            task = Task.objects.get(id=self.task1.id)
+            task.title = 'Renamed'
+            task.save()
+            self.feed.load_ranked_feed(page=1, items_per_page=2)
+            self.assertEqual(rank_tasks.call_count, 3)
+
+    def test_cached_feed_leaves_out_tasks_no_longer_posted(self):
+        """Test a ranking cached before another process expired a task does not show it"""
+        self.feed.load_ranked_feed(page=1, items_per_page=3)
+        
+        # As the expiry worker does: a set-based UPDATE whose invalidation
+        # never reaches this process's cache
+        Task.objects.filter(id=self.task1.id).update(status=TaskStatus.EXPIRED)
+        with mock.patch.object(Feed, 'rank_tasks') as rank_tasks:
+            page = self.feed.load_ranked_feed(page=1, items_per_page=3)
+        
+        rank_tasks.assert_not_called()
+        self.assertEqual(page['data'], [self.task2, self.task3])
+
+    def test_feed_endpoint(self):
+        """Test the feed endpoint returns ranked tasks"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        
+        response = client.get('/api/feed/', {'limit': 2})
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        self.assertEqual([task['id'] for task in data['tasks']], [self.task1.id, self.task2.id])
+        self.assertEqual(data['pagination']['total_records'], 3)
+        
+        client.force_authenticate(user=None)
+        self.assertEqual(client.get('/api/feed/').status_code, 401)
@@ -0,0 +1,125 @@
+from django.test import TestCase, override_settings
+import os
+import shutil
+import tempfile
+
+from core.api.views.media_views import RangeNotSatisfiable, get_byte_range
+
+
+class MediaViewTests(TestCase):
+    """Test cases for serving uploaded media"""
+
+    def setUp(self):
+        """Store a file in a temporary media directory"""
+        self.media_root = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_override.enable()
+
+        self.content = b'0123456789abcdef'
+        os.makedirs(os.path.join(self.media_root, 'task_photos', '1'))
+        with open(os.path.join(self.media_root, 'task_photos', '1', 'legacy.jpg'), 'wb') as legacy_file:
+            legacy_file.write(self.content)
+        self.legacy_url = '/media/task_photos/1/legacy.jpg'
+
+    def tearDown(self):
+        """Remove the temporary media directory"""
+        self.media_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_file_is_served_with_validators(self):
+        """Test a file is served with a strong ETag, Last-Modified and range support"""
+        response = self.client.get(self.legacy_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+    def test_repeat_loads_are_not_modified(self):
+        """Test If-None-Match and If-Modified-Since answer 304 while the file is unchanged"""
+        response = self.client.get(self.legacy_url)
+
+        response = self.client.get(self.legacy_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self.legacy_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        # A rewritten file gets a new ETag
+        etag = response['ETag']
+        with open(os.path.join(self.media_root, 'task_photos', '1', 'legacy.jpg'), 'wb') as legacy_file:
+            legacy_file.write(b'changed')
+        response = self.client.get(self.legacy_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_range_requests(self):
+        """Test single byte ranges are answered with 206 and unsatisfiable ones with 416"""
+        response = self.client.get(self.legacy_url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], f'bytes 2-5/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '4')
+
+        response = self.client.get(self.legacy_url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'def')
+
+        response = self.client.get(self.legacy_url, HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+        # A stale If-Range gets the whole file
+        response = self.client.get(self.legacy_url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_get_byte_range(self):
+        """Test parsing of Range headers"""
+        self.assertEqual(get_byte_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(get_byte_range('bytes=5-50', 10), (5, 9))
+        self.assertEqual(get_byte_range('bytes=-50', 10), (0, 9))
+        self.assertIsNone(get_byte_range('bytes=0-1,4-5', 10))
+        self.assertIsNone(get_byte_range('items=0-1', 10))
+        self.assertIsNone(get_byte_range('bytes=5-1', 10))
+        self.assertIsNone(get_byte_range('bytes=a-b', 10))
+        with self.assertRaises(RangeNotSatisfiable):
+            get_byte_range('bytes=10-', 10)
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_transfer_is_offloaded_with_x_accel_redirect(self):
+        """Test the proxy is asked to send the file instead of Python"""
+        response = self.client.get(self.legacy_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/task_photos/1/legacy.jpg')
+        self.assertEqual(response.content, b'')
+        self.assertIn('ETag', response)
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-sendfile')
+    def test_transfer_is_offloaded_with_x_sendfile(self):
+        """Test X-Sendfile carries the absolute file path"""
+        response = self.client.get(self.legacy_url)
+
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(self.media_root, 'task_photos', '1', 'legacy.jpg')
+        )
+
+    def test_missing_and_unsafe_paths_are_not_found(self):
+        """Test missing files, directories and paths outside MEDIA_ROOT give 404"""
+        self.assertEqual(self.client.get('/media/task_photos/1/missing.jpg').status_code, 404)
+        self.assertEqual(self.client.get('/media/task_photos/1').status_code, 404)
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/task_photos/%2e%2e/%2e%2e/%2e%2e/manage.py').status_code, 404)
+
+    def test_only_safe_methods_are_allowed(self):
+        """Test HEAD is answered without a body and POST is refused"""
+        response = self.client.head(self.legacy_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response.content, b'')
+
+        self.assertEqual(self.client.post(self.legacy_url).status_code, 405)
@@ -1,7 +1,13 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 import datetime
-from core.models import RegisteredUser, Task, Volunteer, Notification, NotificationType, Comment
+from io import StringIO
+from django.core.management import call_command
+from core.models import (
+    RegisteredUser, Task, TaskStatus, Volunteer, Notification, NotificationType, Comment, ArchivedNotification,
+    TaskNotificationRequest
+)
+from core.services.notification_service import NotificationService
 
 
 class NotificationModelTests(TestCase):
@@ -389,6 +395,186 @@ class NotificationModelTests(TestCase):
         self.assertIn('Administrator', notification.content)
         self.assertIn(warning_message, notification.content)
 
+    def test_send_bulk_inserts_in_batches(self):
+        """Test send_bulk writes one INSERT per batch and skips duplicate recipients"""
+        users = [
+            RegisteredUser.objects.create_user(
+                email=f'bulk{i}@example.com',
+                name='Bulk',
+                surname=str(i),
+                username=f'bulk{i}',
+                phone_number=f'555000{i:04d}',
+                password='password123'
+            )
+            for i in range(5)
+        ]
+        
+        # 5 distinct users in batches of 2: 3 INSERTs and 3 unread counter UPDATEs
+        with self.assertNumQueries(6):
+            sent_count = Notification.send_bulk(
+                users + [users[0].id],
+                content='Bulk message',
+                notification_type=NotificationType.SYSTEM_NOTIFICATION,
+                batch_size=2
+            )
+        self.assertEqual(sent_count, 5)
+        
+        # A queryset is read batch by batch: SELECT, INSERT and UPDATE per batch, one final SELECT
+        queryset = RegisteredUser.objects.filter(username__startswith='bulk')
+        with self.assertNumQueries(10):
+            sent_count = Notification.send_bulk(
+                queryset,
+                content='Queryset message',
+                notification_type=NotificationType.SYSTEM_NOTIFICATION,
+                related_task=self.task,
+                batch_size=2
+            )
+        self.assertEqual(sent_count, 5)
+        
+        for user in users:
+            self.assertEqual(
+                list(Notification.objects.filter(user=user).values_list('content', flat=True).order_by('id')),
+                ['Bulk message', 'Queryset message']
+            )
+    
+    def test_task_created_notification_targets_nearby_users(self):
+        """Test task creation notifies active users within the radius, except the creator"""
+        self.user1.location = 'Kadıköy'
+        self.user1.save()
+        near_user = RegisteredUser.objects.create_user(
+            email='near@example.com', name='Near', surname='User', username='nearuser',
+            phone_number='5550001111', password='password123', location='Beşiktaş'
+        )
+        far_user = RegisteredUser.objects.create_user(
+            email='far@example.com', name='Far', surname='User', username='faruser',
+            phone_number='5550002222', password='password123', location='Ankara'
+        )
+        inactive_user = RegisteredUser.objects.create_user(
+            email='inactive@example.com', name='Inactive', surname='User', username='inactiveuser',
+            phone_number='5550003333', password='password123', location='Kadıköy', is_active=False
+        )
+        task = Task.objects.create(
+            title='Nearby Task',
+            description='Task Description',
+            category='GROCERY_SHOPPING',
+            location='Kadıköy',
+            deadline=timezone.now() + datetime.timedelta(days=3),
+            creator=self.user1
+        )
+        
+        sent_count = Notification.send_task_created_notification(task, radius_km=10)
+        
+        self.assertEqual(sent_count, 1)
+        notification = Notification.objects.get(related_task=task)
+        self.assertEqual(notification.user, near_user)
+        self.assertEqual(notification.related_task, task)
+        self.assertIn('Nearby Task', notification.content)
+        
+        # Disabled by a zero radius
+        self.assertEqual(Notification.send_task_created_notification(task, radius_km=0), 0)
+        self.assertFalse(Notification.objects.filter(user__in=[far_user, inactive_user]).exists())
+    
+    @override_settings(NOTIFICATION_FANOUT_MODE='deferred', TASK_CREATED_NOTIFICATION_RADIUS_KM=10)
+    def test_deferred_task_created_notifications_are_queued(self):
+        """Test deferred mode queues the nearby fan-out on commit for the notification worker"""
+        near_user = RegisteredUser.objects.create_user(
+            email='near@example.com', name='Near', surname='User', username='nearuser',
+            phone_number='5550001111', password='password123', location='Beşiktaş'
+        )
+        tasks = [
+            Task.objects.create(
+                title=f'Queued Task {i}',
+                description='Task Description',
+                category='GROCERY_SHOPPING',
+                location='Kadıköy',
+                deadline=timezone.now() + datetime.timedelta(days=3),
+                creator=self.user1
+            )
+            for i in range(2)
+        ]
+        
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for task in tasks:
+                NotificationService.request_task_created_notification(task)
+            # Nothing is queued or sent until the transaction commits
+            self.assertFalse(TaskNotificationRequest.objects.exists())
+        self.assertEqual(len(callbacks), 2)
+        self.assertFalse(Notification.objects.filter(user=near_user).exists())
+        
+        # A task cancelled before the worker gets to it notifies nobody
+        tasks[1].status = TaskStatus.CANCELLED
+        tasks[1].save()
+        
+        out = StringIO()
+        call_command('process_notification_queue', stdout=out)
+        self.assertIn('Processed 2 queued notification request(s).', out.getvalue())
+        self.assertFalse(TaskNotificationRequest.objects.exists())
+        self.assertEqual(
+            list(Notification.objects.filter(user=near_user).values_list('related_task', flat=True)),
+            [tasks[0].id]
+        )
+
+
+class ArchivedNotificationTests(TestCase):
+    """Test cases for archiving old read notifications"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = RegisteredUser.objects.create_user(
+            email='user@example.com',
+            name='Test',
+            surname='User',
+            username='testuser',
+            phone_number='1234567890',
+            password='password123'
+        )
+
+    def create_notification(self, content, days_old, is_read):
+        """Create a notification dated some days back"""
+        notification = Notification.send_notification(
+            user=self.user,
+            content=content,
+            notification_type=NotificationType.SYSTEM_NOTIFICATION
+        )
+        Notification.objects.filter(id=notification.id).update(
+            timestamp=timezone.now() - datetime.timedelta(days=days_old),
+            is_read=is_read
+        )
+        return notification
+
+    def test_archive_moves_only_old_read_notifications(self):
+        """Test archiving moves old read notifications in batches and keeps the rest"""
+        old_read = [self.create_notification(f'Old read {i}', 40, True) for i in range(3)]
+        old_unread = self.create_notification('Old unread', 40, False)
+        recent_read = self.create_notification('Recent read', 5, True)
+
+        cutoff = timezone.now() - datetime.timedelta(days=30)
+        self.assertEqual(ArchivedNotification.archive_read_notifications(cutoff, batch_size=2), 3)
+
+        self.assertEqual(
+            set(Notification.objects.values_list('id', flat=True)),
+            {old_unread.id, recent_read.id}
+        )
+        archived = ArchivedNotification.objects.get(id=old_read[0].id)
+        self.assertEqual(archived.content, 'Old read 0')
+        self.assertEqual(archived.user, self.user)
+        self.assertTrue(archived.is_read)
+
+        # Nothing left to archive
+        self.assertEqual(ArchivedNotification.archive_read_notifications(cutoff), 0)
+
+    def test_archive_command(self):
+        """Test the management command archives with the given retention"""
+        old_read = self.create_notification('Old read', 10, True)
+
+        call_command('archive_notifications', days=30, stdout=StringIO())
+        self.assertTrue(Notification.objects.filter(id=old_read.id).exists())
+
+        out = StringIO()
+        call_command('archive_notifications', days=7, stdout=out)
+        self.assertIn('Archived 1 notification(s).', out.getvalue())
+        self.assertTrue(ArchivedNotification.objects.filter(id=old_read.id).exists())
+
 
 class NotificationTypeEnumTests(TestCase):
     """Test cases for the NotificationType enumeration"""
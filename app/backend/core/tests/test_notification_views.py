@@ -0,0 +1,324 @@
+import datetime
+import json
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from unittest.mock import patch
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.api.views.notification_stream_views import NotificationStreamApplication
+from core.models import RegisteredUser, Task, Notification, NotificationType, ArchivedNotification
+from core.services.notification_broker import NotificationBroker, PostgresNotificationBroker
+
+
+class NotificationUnreadCountTests(TestCase):
+    """Test cases for the unread notification counter and its endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = APIClient()
+
+        self.user = RegisteredUser.objects.create_user(
+            email='user@example.com',
+            name='Test',
+            surname='User',
+            username='testuser',
+            phone_number='1234567890',
+            password='password123'
+        )
+        self.other_user = RegisteredUser.objects.create_user(
+            email='other@example.com',
+            name='Other',
+            surname='User',
+            username='otheruser',
+            phone_number='0987654321',
+            password='password456'
+        )
+
+        self.client.force_authenticate(user=self.user)
+
+    def get_unread_count(self, user):
+        """Read the stored counter of a user"""
+        user.refresh_from_db(fields=['unread_notification_count'])
+        return user.unread_notification_count
+
+    def send(self, user, content='Test notification'):
+        """Send a notification to a user"""
+        return Notification.send_notification(
+            user=user,
+            content=content,
+            notification_type=NotificationType.SYSTEM_NOTIFICATION
+        )
+
+    def test_counter_follows_notification_changes(self):
+        """Test sending, reading, bulk sending and deleting keep the counter in step"""
+        first = self.send(self.user)
+        second = self.send(self.user)
+        self.send(self.other_user)
+        self.assertEqual(self.get_unread_count(self.user), 2)
+        self.assertEqual(self.get_unread_count(self.other_user), 1)
+
+        # Two requests marking the same, already loaded notification
+        stale = Notification.objects.get(id=first.id)
+        first.mark_as_read()
+        self.assertFalse(stale.mark_as_read())
+        first.mark_as_read()
+        self.assertEqual(self.get_unread_count(self.user), 1)
+
+        # Marking as unread again through a freshly loaded row
+        reloaded = Notification.objects.get(id=first.id)
+        reloaded.set_is_read(False)
+        self.assertEqual(self.get_unread_count(self.user), 2)
+
+        Notification.send_bulk(
+            [self.user, self.other_user],
+            content='Bulk message',
+            notification_type=NotificationType.SYSTEM_NOTIFICATION
+        )
+        self.assertEqual(self.get_unread_count(self.user), 3)
+        self.assertEqual(self.get_unread_count(self.other_user), 2)
+
+        second.delete()
+        self.assertEqual(self.get_unread_count(self.user), 2)
+
+        self.assertEqual(Notification.mark_all_as_read(self.user), 2)
+        self.assertEqual(self.get_unread_count(self.user), 0)
+        self.assertEqual(self.get_unread_count(self.other_user), 2)
+
+    def test_mark_all_read_endpoint(self):
+        """Test marking all notifications as read resets the counter"""
+        self.send(self.user)
+        self.send(self.user)
+
+        response = self.client.post('/api/notifications/mark-all-read/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], '2 notifications marked as read.')
+        self.assertEqual(self.get_unread_count(self.user), 0)
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=False).exists())
+
+    def test_unread_count_endpoint_with_etag(self):
+        """Test the unread count endpoint answers 304 while the count is unchanged"""
+        self.send(self.user)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['unread_count'], 1)
+        etag = response['ETag']
+
+        response = self.client.get('/api/notifications/unread-count/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        self.send(self.user)
+        response = self.client.get('/api/notifications/unread-count/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['unread_count'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_is_compact_with_constant_queries(self):
+        """Test the list summarizes nested objects unless expanded"""
+        task = Task.objects.create(
+            title='Test Task',
+            description='Task Description',
+            category='GROCERY_SHOPPING',
+            location='Test Location',
+            deadline=timezone.now() + datetime.timedelta(days=3),
+            creator=self.other_user
+        )
+        for i in range(5):
+            Notification.send_notification(
+                user=self.user,
+                content=f'Notification {i}',
+                notification_type=NotificationType.COMMENT_ADDED,
+                related_task=task
+            )
+        
+        # Page count, page rows (joined with user and task), unread counter
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/notifications/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        notification = response.data['data']['notifications'][0]
+        self.assertEqual(notification['user']['id'], self.user.id)
+        self.assertEqual(notification['related_task'], {
+            'id': task.id,
+            'title': 'Test Task',
+            'status': task.status,
+            'category': 'GROCERY_SHOPPING',
+            'creator': {'id': self.other_user.id, 'username': 'otheruser'},
+        })
+        
+        response = self.client.get('/api/notifications/', {'expand': 'related_task'})
+        self.assertIn('description', response.data['data']['notifications'][0]['related_task'])
+        
+        response = self.client.get('/api/notifications/', {'fields': 'id,content'})
+        self.assertEqual(
+            response.data['data']['notifications'][0],
+            {'id': notification['id'], 'content': notification['content']}
+        )
+
+    def test_archive_endpoint_lists_own_archived_notifications(self):
+        """Test the archive endpoint returns the user's archived notifications"""
+        for user in (self.user, self.other_user):
+            notification = self.send(user, f'Old news for {user.username}')
+            notification.mark_as_read()
+        ArchivedNotification.archive_read_notifications(timezone.now() + datetime.timedelta(seconds=1))
+
+        response = self.client.get('/api/notifications/archive/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        notifications = response.data['data']['notifications']
+        self.assertEqual(len(notifications), 1)
+        self.assertEqual(notifications[0]['content'], 'Old news for testuser')
+        self.assertIn('archived_at', notifications[0])
+        self.assertFalse(Notification.objects.filter(user=self.user).exists())
+
+    def test_unread_count_requires_authentication(self):
+        """Test the unread count endpoint rejects anonymous requests"""
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class NotificationStreamTests(TestCase):
+    """Test cases for the Server-Sent Events notification stream"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = RegisteredUser.objects.create_user(
+            email='user@example.com',
+            name='Test',
+            surname='User',
+            username='testuser',
+            phone_number='1234567890',
+            password='password123'
+        )
+        self.other_user = RegisteredUser.objects.create_user(
+            email='other@example.com',
+            name='Other',
+            surname='User',
+            username='otheruser',
+            phone_number='0987654321',
+            password='password456'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.application = NotificationStreamApplication(self.passthrough)
+
+        # As the test client does, keep the test transaction's connection open
+        patcher = patch('core.api.views.notification_stream_views.close_old_connections')
+        self.close_old_connections = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def passthrough(self, scope, receive, send):
+        """Stand-in for the Django application"""
+        await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    def get_scope(self, headers=(), query_string=b'', path='/api/notifications/stream/'):
+        """Build an HTTP scope for the stream"""
+        return {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query_string,
+            'headers': list(headers),
+        }
+
+    def send(self, user, content):
+        """Send a notification and run the publish-on-commit callbacks"""
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.send_notification(
+                user=user,
+                content=content,
+                notification_type=NotificationType.SYSTEM_NOTIFICATION
+            )
+
+    def test_stream_pushes_new_notifications(self):
+        """Test connected users receive their new notifications and unread count"""
+        async def scenario():
+            communicator = ApplicationCommunicator(self.application, self.get_scope(
+                headers=[(b'authorization', f'Token {self.token.key}'.encode())]
+            ))
+            await communicator.send_input({'type': 'http.request', 'body': b''})
+
+            start = await communicator.receive_output(timeout=5)
+            self.assertEqual(start['status'], 200)
+            self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+            initial = (await communicator.receive_output(timeout=5))['body']
+            self.assertIn(b'event: unread_count\ndata: {"unread_count": 0}', initial)
+
+            await sync_to_async(self.send)(self.other_user, 'Not for you')
+            notification = await sync_to_async(self.send)(self.user, 'Hello stream')
+
+            pushed = (await communicator.receive_output(timeout=5))['body'].decode()
+            self.assertIn(f'id: {notification.id}\nevent: notification\n', pushed)
+            self.assertIn('"content": "Hello stream"', pushed)
+            self.assertNotIn('Not for you', pushed)
+            self.assertIn('"unread_count": 1', pushed)
+
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=5)
+
+        async_to_sync(scenario)()
+        self.assertEqual(NotificationBroker.get_backend().get_subscriber_count(), 0)
+
+    def test_stream_replays_missed_notifications(self):
+        """Test reconnecting with Last-Event-ID first sends the missed notifications"""
+        seen = self.send(self.user, 'Already seen')
+        missed = self.send(self.user, 'Missed while away')
+
+        async def scenario():
+            communicator = ApplicationCommunicator(self.application, self.get_scope(
+                headers=[(b'last-event-id', str(seen.id).encode())],
+                query_string=f'token={self.token.key}'.encode()
+            ))
+            await communicator.send_input({'type': 'http.request', 'body': b''})
+            await communicator.receive_output(timeout=5)
+            replay = (await communicator.receive_output(timeout=5))['body'].decode()
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=5)
+            return replay
+
+        replay = async_to_sync(scenario)()
+        self.assertIn(f'id: {missed.id}\n', replay)
+        self.assertNotIn('Already seen', replay)
+        self.assertIn('"unread_count": 2', replay)
+        # Connections are recycled around the token lookup and the replay
+        self.assertEqual(self.close_old_connections.call_count, 4)
+
+    def test_stream_requires_token_and_passes_other_paths(self):
+        """Test anonymous stream requests are rejected and other paths reach Django"""
+        async def request(scope):
+            communicator = ApplicationCommunicator(self.application, scope)
+            await communicator.send_input({'type': 'http.request', 'body': b''})
+            start = await communicator.receive_output(timeout=5)
+            await communicator.receive_output(timeout=5)
+            return start['status']
+
+        self.assertEqual(async_to_sync(request)(self.get_scope()), 401)
+        self.assertEqual(async_to_sync(request)(self.get_scope(query_string=b'token=invalid')), 401)
+        self.assertEqual(async_to_sync(request)(self.get_scope(path='/api/notifications/')), 204)
+
+    def test_postgres_broker_batches_events_per_notify(self):
+        """Test events are sent in as few NOTIFY payloads as fit under the size limit"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        events = [(user_id, 100000 + user_id) for user_id in range(1000)]
+        payloads = list(PostgresNotificationBroker.get_payloads(events))
+
+        self.assertGreater(len(payloads), 1)
+        self.assertTrue(all(
+            len(payload.encode()) < PostgresNotificationBroker.MAX_PAYLOAD_BYTES for payload in payloads
+        ))
+        self.assertEqual(
+            [tuple(pair) for payload in payloads for pair in json.loads(payload)],
+            events
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            PostgresNotificationBroker().publish(events)
+        self.assertEqual(len(queries), len(payloads))
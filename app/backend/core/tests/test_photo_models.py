@@ -1,10 +1,30 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.http.multipartparser import MultiPartParser
+from django.core.management import call_command
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.db import IntegrityError
+from django.urls import reverse
+from io import BytesIO, StringIO
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest import mock
 import datetime
+import hashlib
 import os
+import shutil
 import tempfile
-from core.models import RegisteredUser, Task, Photo
+from core.models import RegisteredUser, Task, Photo, MediaBlob, MediaJob, MediaJobKind, MediaStatus
+from core.api.serializers.photo_serializers import PhotoSerializer
+from core.api.serializers.user_serializers import UserSerializer
+from core.services.image_service import ImageService
+from core.services.media_service import MediaService
+from core.storage import ContentAddressedStorage
+from core.upload_handlers import PhotoUploadHandler
 
 
 class PhotoModelTests(TestCase):
@@ -59,6 +79,7 @@ class PhotoModelTests(TestCase):
         for photo in Photo.objects.all():
             if photo.url and os.path.isfile(photo.url.path):
                 os.remove(photo.url.path)
+            ImageService.delete_variants(photo.variants)
         
         # Restore original MEDIA_ROOT
         os.environ['MEDIA_ROOT'] = self._old_media_root
@@ -119,8 +140,9 @@ class PhotoModelTests(TestCase):
         # Verify file exists
         self.assertTrue(os.path.isfile(file_path))
         
-        # Delete photo
-        result = self.photo.delete_photo()
+        # Delete photo; the file goes once the deletion commits
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.photo.delete_photo()
         
         # Verify result
         self.assertTrue(result)
@@ -180,3 +202,497 @@ class PhotoModelTests(TestCase):
         new_photo = Photo.upload_photo(task=self.task, image_file=test_image)
         _, ext = os.path.splitext(new_photo.url.name)
         self.assertEqual(ext, '.gif')
+
+
+class PhotoVariantTests(TestCase):
+    """Test cases for resized photo variants"""
+
+    def setUp(self):
+        """Set up test data in a temporary media directory"""
+        self.media_root = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_override.enable()
+
+        self.user = RegisteredUser.objects.create_user(
+            email='user@example.com',
+            name='Regular',
+            surname='User',
+            username='regularuser',
+            phone_number='1234567890',
+            password='password123'
+        )
+        self.task = Task.objects.create(
+            title='Task with Photos',
+            description='Task Description',
+            category='HOME_REPAIR',
+            location='Test Location',
+            deadline=timezone.now() + datetime.timedelta(days=3),
+            creator=self.user
+        )
+
+    def tearDown(self):
+        """Remove the temporary media directory"""
+        self.media_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def make_jpeg(self, width, height):
+        """Create a JPEG upload carrying EXIF metadata"""
+        exif = Image.Exif()
+        exif[0x010F] = 'TestCamera'  # Make
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), (200, 50, 50)).save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_generates_variants_without_exif(self):
+        """Test uploading creates every variant in every format, scaled down and without EXIF"""
+        photo = Photo.upload_photo(task=self.task, image_file=self.make_jpeg(2000, 1000))
+
+        photo.refresh_from_db()
+        self.assertEqual(set(photo.variants), {'thumb', 'card', 'full'})
+        self.assertEqual((photo.variants['thumb']['width'], photo.variants['thumb']['height']), (160, 160))
+        self.assertEqual((photo.variants['card']['width'], photo.variants['card']['height']), (640, 320))
+        self.assertEqual((photo.variants['full']['width'], photo.variants['full']['height']), (1600, 800))
+
+        for variant in photo.variants.values():
+            for image_format in ('webp', 'jpeg'):
+                with default_storage.open(variant[image_format]) as variant_file:
+                    image = Image.open(variant_file)
+                    self.assertEqual(image.size, (variant['width'], variant['height']))
+                    self.assertEqual(len(image.getexif()), 0)
+
+        data = PhotoSerializer(photo).data
+        self.assertTrue(data['variants']['thumb']['webp'].endswith('.webp'))
+        self.assertEqual(data['variants']['card']['width'], 640)
+
+        names = [variant[image_format] for variant in photo.variants.values() for image_format in ('webp', 'jpeg')]
+        with self.captureOnCommitCallbacks(execute=True):
+            photo.delete_photo()
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    def test_small_images_are_not_upscaled(self):
+        """Test variants of a small image keep its size"""
+        photo = Photo.upload_photo(task=self.task, image_file=self.make_jpeg(100, 80))
+
+        for variant in photo.variants.values():
+            self.assertEqual((variant['width'], variant['height']), (100, 80))
+
+    def test_backfill_command_generates_missing_variants(self):
+        """Test the backfill command processes photos stored without variants"""
+        photo = Photo.objects.create(task=self.task, url=self.make_jpeg(800, 600))
+        self.user.profile_photo = self.make_jpeg(400, 400)
+        self.user.save()
+
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out)
+
+        photo.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(photo.variants['card']['width'], 640)
+        self.assertEqual(self.user.profile_photo_variants['thumb']['width'], 160)
+        self.assertTrue(
+            UserSerializer(self.user).data['profile_photo_variants']['thumb']['jpeg'].endswith('.jpg')
+        )
+        self.assertIn('1 task photo(s) and 1 profile photo(s)', out.getvalue())
+
+        # Nothing is left to process
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out)
+        self.assertIn('0 task photo(s) and 0 profile photo(s)', out.getvalue())
+
+
+
+@override_settings(MEDIA_PROCESSING_MODE='deferred')
+class MediaQueueTests(TestCase):
+    """Test cases for image processing queued for the media worker"""
+
+    def setUp(self):
+        """Set up test data in a temporary media directory"""
+        self.media_root = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_override.enable()
+
+        self.user = RegisteredUser.objects.create_user(
+            email='user@example.com',
+            name='Regular',
+            surname='User',
+            username='regularuser',
+            phone_number='1234567890',
+            password='password123'
+        )
+        self.task = Task.objects.create(
+            title='Task with Photos',
+            description='Task Description',
+            category='HOME_REPAIR',
+            location='Test Location',
+            deadline=timezone.now() + datetime.timedelta(days=3),
+            creator=self.user
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        """Remove the temporary media directory"""
+        self.media_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def make_jpeg(self, width, height):
+        """Create a JPEG upload"""
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), (50, 200, 50)).save(buffer, 'JPEG')
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_task_photo_upload_is_queued(self):
+        """Test a task photo upload answers 202 and the worker makes the photo ready"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('task-photo', args=[self.task.id]),
+                {'photo': self.make_jpeg(800, 600)},
+                format='multipart'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['data']['status'], MediaStatus.PENDING)
+        photo = Photo.objects.get(id=response.data['data']['photo_id'])
+        self.assertEqual(photo.variants, {})
+        job = MediaJob.objects.get()
+        self.assertEqual((job.kind, job.object_id), (MediaJobKind.TASK_PHOTO, photo.id))
+
+        out = StringIO()
+        call_command('process_media_queue', stdout=out)
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.status, MediaStatus.READY)
+        self.assertEqual(photo.variants['card']['width'], 640)
+        self.assertFalse(MediaJob.objects.exists())
+        self.assertIn('Processed 1 queued media job(s).', out.getvalue())
+
+    def test_profile_photo_upload_is_queued(self):
+        """Test a profile photo upload answers 202 and the worker makes it ready"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/users/{self.user.id}/upload-photo/',
+                {'photo': self.make_jpeg(400, 400)},
+                format='multipart'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['data']['profile_photo_status'], MediaStatus.PENDING)
+
+        self.assertEqual(MediaService.process_queue(), 1)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.profile_photo_status, MediaStatus.READY)
+        self.assertEqual(self.user.profile_photo_variants['thumb']['width'], 160)
+
+    def test_failing_job_is_retried_then_marked_failed(self):
+        """Test a job is rescheduled after an error and gives up after MAX_ATTEMPTS"""
+        with self.captureOnCommitCallbacks(execute=True):
+            photo = Photo.upload_photo(task=self.task, image_file=self.make_jpeg(100, 100))
+
+        with mock.patch.object(ImageService, 'generate_variants', side_effect=OSError('disk full')):
+            for attempt in range(1, MediaService.MAX_ATTEMPTS):
+                self.assertEqual(MediaService.process_queue(), 1)
+                job = MediaJob.objects.get()
+                self.assertEqual(job.attempts, attempt)
+                self.assertGreater(job.run_after, timezone.now())
+                # Not due yet
+                self.assertEqual(MediaService.process_queue(), 0)
+                MediaJob.objects.update(run_after=timezone.now())
+
+            self.assertEqual(MediaService.process_queue(), 1)
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.status, MediaStatus.FAILED)
+        self.assertFalse(MediaJob.objects.exists())
+
+    def test_rolled_back_job_discards_its_variant_files(self):
+        """Test variants written by a job whose savepoint rolls back are removed"""
+        with self.captureOnCommitCallbacks(execute=True):
+            photo = Photo.upload_photo(task=self.task, image_file=self.make_jpeg(100, 100))
+
+        with mock.patch.object(ImageService, 'delete_variants', side_effect=OSError('disk full')):
+            self.assertEqual(MediaService.process_queue(), 1)
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.variants, {})
+        stored = [
+            os.path.relpath(os.path.join(directory, filename), self.media_root).replace(os.sep, '/')
+            for directory, _, filenames in os.walk(self.media_root) for filename in filenames
+        ]
+        self.assertEqual(stored, [photo.url.name])
+        self.assertEqual(MediaBlob.objects.filter(reference_count__gt=0).count(), 1)
+
+    def test_job_for_deleted_photo_is_dropped(self):
+        """Test jobs whose photo was deleted meanwhile are discarded"""
+        with self.captureOnCommitCallbacks(execute=True):
+            photo = Photo.upload_photo(task=self.task, image_file=self.make_jpeg(100, 100))
+        photo.delete_photo()
+
+        self.assertEqual(MediaService.process_queue(), 1)
+        self.assertFalse(MediaJob.objects.exists())
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test cases for deduplicated, reference-counted photo storage"""
+
+    def setUp(self):
+        """Set up test data in a temporary media directory"""
+        self.media_root = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_override.enable()
+
+        self.user = RegisteredUser.objects.create_user(
+            email='user@example.com',
+            name='Regular',
+            surname='User',
+            username='regularuser',
+            phone_number='1234567890',
+            password='password123'
+        )
+        self.task = Task.objects.create(
+            title='Task with Photos',
+            description='Task Description',
+            category='HOME_REPAIR',
+            location='Test Location',
+            deadline=timezone.now() + datetime.timedelta(days=3),
+            creator=self.user
+        )
+        buffer = BytesIO()
+        Image.new('RGB', (300, 200), (20, 20, 200)).save(buffer, 'JPEG')
+        self.image_bytes = buffer.getvalue()
+
+    def tearDown(self):
+        """Remove the temporary media directory"""
+        self.media_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def make_upload(self, name='photo.jpg'):
+        """Create an upload of the same image each time"""
+        return SimpleUploadedFile(name, self.image_bytes, content_type='image/jpeg')
+
+    def test_identical_uploads_share_one_file(self):
+        """Test re-uploading an image reuses its file and keeps it until the last delete"""
+        first = Photo.upload_photo(task=self.task, image_file=self.make_upload())
+        second = Photo.upload_photo(task=self.task, image_file=self.make_upload('retry.jpg'))
+
+        self.assertEqual(first.url.name, second.url.name)
+        digest = ContentAddressedStorage.get_digest(first.url.name)
+        self.assertEqual(digest, hashlib.sha256(self.image_bytes).hexdigest())
+        self.assertEqual(MediaBlob.get_reference_count(digest), 2)
+        self.assertEqual(MediaBlob.objects.get(digest=digest).size, len(self.image_bytes))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete_photo()
+        self.assertTrue(default_storage.exists(second.url.name))
+        self.assertEqual(MediaBlob.get_reference_count(digest), 1)
+
+        name = second.url.name
+        variant_names = [variant['webp'] for variant in second.variants.values()]
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete_photo()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(any(default_storage.exists(name) for name in variant_names))
+        self.assertEqual(MediaBlob.get_reference_count(digest), 0)
+
+        # The content can be stored again afterwards
+        third = Photo.upload_photo(task=self.task, image_file=self.make_upload())
+        self.assertTrue(default_storage.exists(third.url.name))
+        self.assertEqual(MediaBlob.get_reference_count(digest), 1)
+
+    def test_failed_row_changes_keep_references_and_files(self):
+        """Test a failed insert or delete rolls its reference change back with it"""
+        photo = Photo.upload_photo(task=self.task, image_file=self.make_upload())
+        name = photo.url.name
+        digest = ContentAddressedStorage.get_digest(name)
+
+        with mock.patch.object(Photo, '_do_insert', side_effect=IntegrityError('insert failed')):
+            with self.assertRaises(IntegrityError):
+                Photo.upload_photo(task=self.task, image_file=self.make_upload('retry.jpg'))
+        self.assertEqual(MediaBlob.get_reference_count(digest), 1)
+
+        with mock.patch.object(Photo, 'delete', side_effect=IntegrityError('delete failed')):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with self.assertRaises(IntegrityError):
+                    photo.delete_photo()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(MediaBlob.get_reference_count(digest), 1)
+        self.assertTrue(default_storage.exists(name))
+
+    def test_blob_referenced_again_before_removal_is_kept(self):
+        """Test the file is only removed if still unreferenced when the delete commits"""
+        photo = Photo.upload_photo(task=self.task, image_file=self.make_upload())
+        name = photo.url.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            photo.delete_photo()
+            again = Photo.upload_photo(task=self.task, image_file=self.make_upload())
+
+        self.assertEqual(again.url.name, name)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(MediaBlob.get_reference_count(ContentAddressedStorage.get_digest(name)), 1)
+
+    def test_profile_photo_delete_keeps_shared_file(self):
+        """Test deleting a profile photo keeps a task photo with the same content"""
+        photo = Photo.upload_photo(task=self.task, image_file=self.make_upload())
+        self.user.set_profile_photo(self.make_upload())
+        self.assertEqual(self.user.profile_photo.name, photo.url.name)
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.delete(f'/api/users/{self.user.id}/delete-photo/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.profile_photo)
+        self.assertEqual(self.user.profile_photo_variants, {})
+        self.assertTrue(default_storage.exists(photo.url.name))
+        self.assertTrue(all(default_storage.exists(variant['jpeg']) for variant in photo.variants.values()))
+
+    def test_cascade_deletes_release_files(self):
+        """Test deleting a user releases their profile photo and the photos of their tasks"""
+        photo = Photo.upload_photo(task=self.task, image_file=self.make_upload())
+        self.user.set_profile_photo(self.make_upload())
+        names = [photo.url.name] + [variant['jpeg'] for variant in photo.variants.values()]
+        self.assertEqual(MediaBlob.get_reference_count(ContentAddressedStorage.get_digest(names[0])), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        self.assertFalse(Photo.objects.exists())
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+        self.assertFalse(MediaBlob.objects.filter(reference_count__gt=0).exists())
+
+    def test_blobs_are_served_as_immutable(self):
+        """Test content-addressed files are served with their digest as ETag"""
+        photo = Photo.upload_photo(task=self.task, image_file=self.make_upload())
+        digest = ContentAddressedStorage.get_digest(photo.url.name)
+
+        response = self.client.get(photo.get_url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.image_bytes)
+        self.assertEqual(response['ETag'], f'"{digest}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+
+        response = self.client.get(photo.get_url(), HTTP_IF_NONE_MATCH=f'"{digest}"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class PhotoUploadHandlerTests(TestCase):
+    """Test cases for streaming, size-capped photo uploads"""
+
+    def setUp(self):
+        """Set up test data in a temporary media directory"""
+        self.media_root = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_override.enable()
+
+        self.user = RegisteredUser.objects.create_user(
+            email='user@example.com',
+            name='Regular',
+            surname='User',
+            username='regularuser',
+            phone_number='1234567890',
+            password='password123'
+        )
+        self.task = Task.objects.create(
+            title='Task with Photos',
+            description='Task Description',
+            category='HOME_REPAIR',
+            location='Test Location',
+            deadline=timezone.now() + datetime.timedelta(days=3),
+            creator=self.user
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        """Remove the temporary media directory"""
+        self.media_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def post_photo(self, name, content, content_type='image/jpeg'):
+        """Upload a file to the task photo endpoint"""
+        return self.client.post(
+            reverse('task-photo', args=[self.task.id]),
+            {'photo': SimpleUploadedFile(name, content, content_type=content_type)},
+            format='multipart'
+        )
+
+    def test_type_is_sniffed_from_content(self):
+        """Test the stored type and extension follow the bytes, not the client"""
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), (1, 2, 3)).save(buffer, 'PNG')
+
+        response = self.post_photo('photo.jpg', buffer.getvalue(), content_type='application/octet-stream')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        photo = Photo.objects.get(id=response.data['data']['photo_id'])
+        self.assertTrue(photo.url.name.endswith('.png'))
+        self.assertEqual(
+            ContentAddressedStorage.get_digest(photo.url.name),
+            hashlib.sha256(buffer.getvalue()).hexdigest()
+        )
+
+    def test_non_image_is_rejected(self):
+        """Test files that are not images are refused whatever their declared type"""
+        response = self.post_photo('photo.jpg', b'<html>not an image</html>')
+
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        self.assertFalse(Photo.objects.exists())
+
+    @override_settings(MAX_PHOTO_UPLOAD_MB=1)
+    def test_oversized_body_is_rejected(self):
+        """Test a body announced larger than the cap is refused before it is read"""
+        response = self.client.post(
+            f'/api/users/{self.user.id}/upload-photo/',
+            {'photo': SimpleUploadedFile('big.jpg', b'\xff\xd8\xff' + b'\0' * (2 * 1024 * 1024))},
+            format='multipart'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.profile_photo)
+
+    def parse_counting_reads(self, content):
+        """
+        Parse a multipart body holding `content` through PhotoUploadHandler
+
+        Returns:
+            (handler, bytes of the body read, body length)
+        """
+        body = encode_multipart(BOUNDARY, {'photo': SimpleUploadedFile('photo.jpg', content)})
+        stream = BytesIO(body)
+        handler = PhotoUploadHandler()
+        META = {
+            'CONTENT_TYPE': MULTIPART_CONTENT,
+            'CONTENT_LENGTH': str(len(body)),
+        }
+        MultiPartParser(META, stream, [handler]).parse()
+        return handler, stream.tell(), len(body)
+
+    @override_settings(MAX_PHOTO_UPLOAD_MB=1)
+    def test_rejected_uploads_leave_the_body_unread(self):
+        """Test a refused file stops the body from being read any further"""
+        handler, read, length = self.parse_counting_reads(b'<html>' + b'\0' * (900 * 1024))
+        self.assertEqual(handler.error[0], status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        self.assertLess(read, length // 2)
+
+        # A body Content-Length does not already give away as too large
+        with mock.patch.object(PhotoUploadHandler, 'MULTIPART_OVERHEAD', 2 * 1024 * 1024):
+            handler, read, length = self.parse_counting_reads(b'\xff\xd8\xff' + b'\0' * (2 * 1024 * 1024))
+        self.assertEqual(handler.error[0], status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertLess(read, length * 3 // 4)
+
+    @override_settings(MAX_PHOTO_UPLOAD_MB=1)
+    def test_upload_stops_once_file_exceeds_cap(self):
+        """Test the handler stops as soon as the streamed file passes the cap"""
+        handler = PhotoUploadHandler()
+        handler.handle_raw_input(None, {}, None, None)
+        handler.new_file('photo', 'photo.jpg', 'image/jpeg', None)
+        handler.receive_data_chunk(b'\xff\xd8\xff' + b'\0' * (512 * 1024), 0)
+
+        with self.assertRaises(StopUpload):
+            handler.receive_data_chunk(b'\0' * (600 * 1024), 512 * 1024)
+        self.assertEqual(handler.error[0], status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        handler.file.close()
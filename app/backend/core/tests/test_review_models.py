@@ -2,7 +2,7 @@ from django.test import TestCase
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 import datetime
-from core.models import RegisteredUser, Task, Review
+from core.models import RegisteredUser, Task, Review, UserStats
 
 
 class ReviewModelTests(TestCase):
@@ -219,6 +219,57 @@ class ReviewModelTests(TestCase):
         updated_assignee = RegisteredUser.objects.get(id=self.assignee.id)
         self.assertAlmostEqual(updated_assignee.rating, expected_avg, places=2)
 
+    def test_rating_totals_follow_review_changes(self):
+        """Test the rating follows the UserStats totals on review insert, edit and delete"""
+        stats = UserStats.get_for_user(self.assignee)
+        self.assignee.refresh_from_db()
+        self.assertEqual(stats.review_count, 1)
+        self.assertEqual(self.assignee.rating, 4.5)
+        
+        # Editing through submit_review applies only the score change
+        Review.submit_review(
+            reviewer=self.creator,
+            reviewee=self.assignee,
+            task=self.task,
+            score=3.0,
+            comment='Updated my review'
+        )
+        stats.refresh_from_db()
+        self.assignee.refresh_from_db()
+        self.assertEqual(stats.review_count, 1)
+        self.assertEqual(stats.score_sum, 3.0)
+        self.assertEqual(self.assignee.rating, 3.0)
+        
+        Review.objects.get(id=self.review.id).delete()
+        stats.refresh_from_db()
+        self.assignee.refresh_from_db()
+        self.assertEqual(stats.review_count, 0)
+        self.assertEqual(stats.score_sum, 0.0)
+        self.assertEqual(self.assignee.rating, 0.0)
+    
+    def test_deferred_ratings_are_not_fetched_on_load(self):
+        """Test loading a review without its ratings runs no extra queries and later recounts"""
+        with self.assertNumQueries(1):
+            review = Review.objects.only('id', 'comment').get(id=self.review.id)
+        self.assertIsNone(review._loaded_ratings)
+        
+        # The rating change is found by recounting the reviewee's reviews
+        review.score = 2.0
+        review._explicit_score = True
+        review.save(update_fields=['score'])
+        self.assignee.refresh_from_db()
+        self.assertEqual(self.assignee.rating, 2.0)
+        self.assertEqual(UserStats.get_for_user(self.assignee).score_sum, 2.0)
+    
+    def test_rating_is_derived_when_stats_row_is_missing(self):
+        """Test a user whose stats row was dropped gets it rebuilt with the rating"""
+        UserStats.objects.filter(user=self.assignee).delete()
+        RegisteredUser.recalculate_rating(self.assignee.id)
+        
+        self.assignee.refresh_from_db()
+        self.assertEqual(self.assignee.rating, 4.5)
+        self.assertEqual(UserStats.objects.get(user=self.assignee).review_count, 1)
+
     def test_review_validation_rules(self):
         """Test the validation rules for reviews"""
         # Create an incomplete task
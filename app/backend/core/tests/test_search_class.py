@@ -1,3 +1,5 @@
+from unittest import skipUnless
+from django.db import connection
 from django.test import TestCase
 from django.utils import timezone
 import datetime
@@ -116,6 +118,36 @@ class SearchClassTests(TestCase):
         results = Search.search_by_keyword('')
         self.assertEqual(results.count(), 0)
 
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search requires PostgreSQL')
+    def test_search_by_keyword_fulltext(self):
+        """Test ranked full-text keyword search"""
+        # Stemmed match: 'faucets' and 'faucet' share the stem 'faucet'
+        results = Search.search_by_keyword('leaky faucets', search_mode='fulltext')
+        self.assertEqual(list(results), [self.task3])
+        
+        # Title matches rank above description-only matches
+        results = list(Search.search_by_keyword('help', search_mode='fulltext'))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0], self.task1)
+        
+        # Search vector follows title edits
+        self.task2.title = 'Physics Tutoring'
+        self.task2.save()
+        results = Search.search_by_keyword('physics', search_mode='fulltext')
+        self.assertEqual(list(results), [self.task2])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search requires PostgreSQL')
+    def test_search_by_keyword_prefix(self):
+        """Test type-ahead prefix search"""
+        results = Search.search_by_keyword('Tuto', search_mode='prefix')
+        self.assertEqual(list(results), [self.task2])
+        
+        results = Search.search_by_keyword('fix faucet', search_mode='prefix')
+        self.assertEqual(list(results), [self.task3])
+        
+        # Input without words or with tsquery operators matches nothing
+        self.assertEqual(Search.search_by_keyword('&!:*', search_mode='prefix').count(), 0)
+
     def test_search_by_location(self):
         """Test searching tasks by location"""
         # Exact match
@@ -203,6 +235,32 @@ class SearchClassTests(TestCase):
         results = Search.search_users('')
         self.assertEqual(results.count(), 0)
 
+    def test_search_users_limit(self):
+        """Test that user search results are capped"""
+        results = Search.search_users('User', limit=1)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0], self.user1)
+        
+        with self.settings(USER_SEARCH_MAX_RESULTS=1):
+            self.assertEqual(len(Search.search_users('User')), 1)
+
+    def test_search_users_fuzzy(self):
+        """Test typo-tolerant user search ranked by similarity"""
+        if not Search.trigram_search_available():
+            # Without pg_trgm the fuzzy mode is a plain substring search
+            results = Search.search_users('third', Search.SEARCH_MODE_FUZZY)
+            self.assertEqual(list(results), [self.user3])
+            return
+        
+        # Misspelled username still finds the user
+        results = Search.search_users('thirdpersn', Search.SEARCH_MODE_FUZZY)
+        self.assertEqual(results.first(), self.user3)
+        
+        # Closest match comes first
+        results = list(Search.search_users('seconduser', Search.SEARCH_MODE_FUZZY))
+        self.assertEqual(results[0], self.user2)
+        self.assertGreaterEqual(results[0].search_similarity, results[-1].search_similarity)
+
     def test_filter_by_rating(self):
         """Test filtering users by rating"""
         # Filter by minimum rating
@@ -252,6 +310,26 @@ class SearchClassTests(TestCase):
         self.assertIn(self.task1, results)
         self.assertIn(self.task3, results)
 
+    def test_sort_by_proximity_geocoded(self):
+        """Test proximity sorting for locations the geocoder knows"""
+        deadline = timezone.now() + datetime.timedelta(days=2)
+        uskudar = Task.objects.create(
+            title='Üsküdar Task', description='Description', location='Üsküdar, İstanbul',
+            deadline=deadline, creator=self.user1
+        )
+        kadikoy = Task.objects.create(
+            title='Kadıköy Task', description='Description', location='Kadıköy, İstanbul',
+            deadline=deadline, creator=self.user1
+        )
+        
+        results = list(Search.sort_by_proximity('Kadıköy'))
+        self.assertEqual(results, [kadikoy, uskudar])
+        
+        # complex_search sorts nearest first in the database; Üsküdar is
+        # closer than Kadıköy to the İstanbul gazetteer point
+        results = Search.complex_search(location='İstanbul', sort_by='location')
+        self.assertEqual(list(results), [uskudar, kadikoy])
+
     def test_complex_search(self):
         """Test combined search with multiple criteria"""
         # Search with multiple criteria
@@ -1,7 +1,12 @@
+from unittest import mock
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 import datetime
-from core.models import RegisteredUser, Task, TaskCategory, TaskStatus
+import math
+from core.models import RegisteredUser, Task, TaskCategory, TaskStatus, Notification, NotificationType
+from core.services.geocoding import GeocodingService
 
 
 class TaskModelTests(TestCase):
@@ -106,6 +111,23 @@ class TaskModelTests(TestCase):
         self.assertTrue(updated_task.is_recurring)
         self.assertEqual(updated_task.assignee, self.assignee)
 
+    def test_setters_write_only_changed_columns(self):
+        """Test setters issue a narrow UPDATE and skip unrelated signal work"""
+        self.task.set_status(TaskStatus.COMPLETED)
+        
+        with mock.patch('core.signals.BadgeService.request_evaluation') as request_evaluation, \
+                mock.patch('core.signals.Feed.invalidate_all') as invalidate_all, \
+                CaptureQueriesContext(connection) as queries:
+            self.task.set_title('Renamed Task')
+        
+        update_sql = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(update_sql), 1)
+        self.assertIn('"title"', update_sql[0])
+        self.assertNotIn('"description"', update_sql[0])
+        request_evaluation.assert_not_called()
+        invalidate_all.assert_not_called()
+        self.assertEqual(Task.objects.get(id=self.task.id).title, 'Renamed Task')
+
     def test_task_business_logic_methods(self):
         """Test task business logic methods"""
         # Test update_task
@@ -137,6 +159,53 @@ class TaskModelTests(TestCase):
         updated_assignee = RegisteredUser.objects.get(id=self.assignee.id)
         self.assertEqual(updated_assignee.completed_task_count, initial_count + 1)
 
+    def test_confirm_completion_counts_each_assignee_once(self):
+        """Test completion bumps every assignee once and bulk-creates notifications"""
+        second_assignee = RegisteredUser.objects.create_user(
+            email='second@example.com',
+            name='Second',
+            surname='Assignee',
+            username='secondassignee',
+            phone_number='5555555555',
+            password='password789'
+        )
+        self.task.assignee = self.assignee
+        self.task.save()
+        self.task.assignees.add(self.assignee, second_assignee)
+        
+        with mock.patch.object(
+            Notification.objects, 'bulk_create', wraps=Notification.objects.bulk_create
+        ) as bulk_create:
+            self.task.confirm_completion(notify=True)
+        
+        self.assertEqual(bulk_create.call_count, 1)
+        for user in (self.assignee, second_assignee):
+            user.refresh_from_db()
+            self.assertEqual(user.completed_task_count, 1)
+        notified = Notification.objects.filter(
+            type=NotificationType.TASK_COMPLETED, related_task=self.task
+        ).values_list('user_id', flat=True)
+        self.assertEqual(sorted(notified), sorted([self.user.id, self.assignee.id, second_assignee.id]))
+
+    def test_concurrent_completion_counts_once(self):
+        """Test a second completion of a stale copy of the task changes nothing"""
+        self.task.status = TaskStatus.ASSIGNED
+        self.task.save()
+        self.task.assignees.add(self.assignee)
+        stale = Task.objects.get(id=self.task.id)
+        completable = [TaskStatus.ASSIGNED, TaskStatus.IN_PROGRESS]
+
+        self.assertTrue(self.task.confirm_completion(notify=True, from_statuses=completable))
+        self.assertFalse(stale.confirm_completion(notify=True, from_statuses=completable))
+
+        self.assertEqual(stale.status, TaskStatus.COMPLETED)
+        self.assignee.refresh_from_db()
+        self.assertEqual(self.assignee.completed_task_count, 1)
+        self.assertEqual(
+            Notification.objects.filter(type=NotificationType.TASK_COMPLETED, related_task=self.task).count(),
+            2
+        )
+
     def test_task_expiry_check(self):
         """Test task expiry checking"""
         # Create a task with deadline in the past
@@ -157,6 +226,107 @@ class TaskModelTests(TestCase):
         self.assertFalse(self.task.check_expiry())
         self.assertEqual(self.task.status, TaskStatus.POSTED)
 
+    def test_location_is_geocoded_on_save(self):
+        """Test coordinates and geohash follow the location text"""
+        task = Task.objects.create(
+            title='Geocoded Task',
+            description='Description',
+            location='Moda Cd. 12, Kadıköy, İstanbul',
+            deadline=timezone.now() + datetime.timedelta(days=1),
+            creator=self.user
+        )
+        self.assertAlmostEqual(task.latitude, 40.99, places=2)
+        self.assertAlmostEqual(task.longitude, 29.029, places=2)
+        self.assertEqual(task.geohash, GeocodingService.encode_geohash(task.latitude, task.longitude))
+        
+        # Partial saves that include the location also refresh the coordinates
+        task.location = 'Beşiktaş'
+        task.save(update_fields=['location'])
+        task.refresh_from_db()
+        self.assertAlmostEqual(task.latitude, 41.043, places=2)
+        
+        # Places missing from the gazetteer have no coordinates
+        task.location = 'Somewhere unknown'
+        task.save()
+        task.refresh_from_db()
+        self.assertIsNone(task.latitude)
+        self.assertEqual(task.geohash, '')
+
+    def test_nearby(self):
+        """Test radius filtering and database-side distances"""
+        deadline = timezone.now() + datetime.timedelta(days=1)
+        kadikoy = Task.objects.create(
+            title='Kadıköy Task', description='Description', location='Kadıköy',
+            deadline=deadline, creator=self.user
+        )
+        uskudar = Task.objects.create(
+            title='Üsküdar Task', description='Description', location='Üsküdar',
+            deadline=deadline, creator=self.user
+        )
+        Task.objects.create(
+            title='Ankara Task', description='Description', location='Ankara',
+            deadline=deadline, creator=self.user
+        )
+        
+        results = list(Task.objects.nearby(40.99, 29.029, 10).order_by('distance_km'))
+        
+        self.assertEqual(results, [kadikoy, uskudar])
+        self.assertAlmostEqual(results[0].distance_km, 0.0, places=3)
+        self.assertAlmostEqual(results[1].distance_km, 3.7, delta=0.2)
+
+    def test_distance_to_antipode(self):
+        """Test distances between opposite points stay within ASIN's domain"""
+        # Rounding makes the haversine term of these points exceed 1
+        task_point = (66.29489835318125, -172.05016482723107)
+        antipode = (-66.29489835218125, 7.949835172768928)
+        Task.objects.filter(id=self.task.id).update(latitude=task_point[0], longitude=task_point[1])
+        half_circumference = math.pi * GeocodingService.EARTH_RADIUS_KM
+        
+        distance = Task.objects.annotate(
+            distance_km=GeocodingService.distance_expression(*antipode)
+        ).get(id=self.task.id).distance_km
+        self.assertAlmostEqual(distance, half_circumference, places=1)
+        self.assertAlmostEqual(GeocodingService.distance_km(*task_point, *antipode), half_circumference, places=1)
+
+    def test_expire_overdue_tasks(self):
+        """Test bulk expiry only touches overdue POSTED tasks"""
+        past = timezone.now() - datetime.timedelta(days=1)
+        overdue = [
+            Task.objects.create(
+                title=f'Overdue Task {i}',
+                description='Description',
+                location='Location',
+                deadline=past,
+                creator=self.user
+            )
+            for i in range(3)
+        ]
+        assigned_overdue = Task.objects.create(
+            title='Assigned Overdue Task',
+            description='Description',
+            location='Location',
+            deadline=past,
+            status=TaskStatus.ASSIGNED,
+            creator=self.user
+        )
+        
+        with self.assertNumQueries(1):
+            expired_count = Task.expire_overdue_tasks()
+        
+        self.assertEqual(expired_count, 3)
+        for task in overdue:
+            task.refresh_from_db()
+            self.assertEqual(task.status, TaskStatus.EXPIRED)
+        
+        # Non-POSTED and future tasks are left alone
+        assigned_overdue.refresh_from_db()
+        self.assertEqual(assigned_overdue.status, TaskStatus.ASSIGNED)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, TaskStatus.POSTED)
+        
+        # A second sweep has nothing left to do
+        self.assertEqual(Task.expire_overdue_tasks(), 0)
+
     def test_task_with_photos(self):
         """Test task with multiple photos attached"""
         from core.models import Photo
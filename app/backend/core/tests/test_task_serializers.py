@@ -47,7 +47,8 @@ class TaskSerializerTests(TestCase):
             'id', 'title', 'description', 'category', 'category_display',
             'location', 'deadline', 'requirements', 'urgency_level',
             'volunteer_number', 'status', 'status_display', 'is_recurring',
-            'creator', 'assignee', 'created_at', 'updated_at', 'primary_photo_url'
+            'creator', 'assignee', 'created_at', 'updated_at', 'primary_photo_url',
+            'primary_photo_variants', 'distance_km'
         }
         
         self.assertEqual(set(data.keys()), expected_fields)
@@ -68,6 +69,55 @@ class TaskSerializerTests(TestCase):
         self.assertEqual(data['category'], TaskCategory.GROCERY_SHOPPING)
         self.assertEqual(data['category_display'], 'Grocery Shopping')
 
+    def test_task_serializer_reads_prefetched_relations(self):
+        """Test that a prefetched page does not query assignees or photos per task"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import Photo
+
+        assignee = RegisteredUser.objects.create_user(
+            email='assignee@example.com',
+            name='Assignee',
+            surname='User',
+            username='assigneeuser',
+            phone_number='0987654321',
+            password='password123'
+        )
+        for i in range(5):
+            task = Task.objects.create(
+                title=f'Task {i}',
+                description='Description',
+                location='Street 1, Istanbul, Turkey',
+                deadline=timezone.now() + datetime.timedelta(days=3),
+                creator=self.user
+            )
+            task.assignees.add(assignee)
+            Photo.objects.create(task=task, url=f'task_photos/{i}/first.jpg')
+            Photo.objects.create(task=task, url=f'task_photos/{i}/second.jpg')
+
+        request = self.factory.get('/api/tasks/')
+        request.user = assignee
+
+        with CaptureQueriesContext(connection) as ctx:
+            tasks = Task.objects.with_serializer_relations(assignee).order_by('id')
+            data = TaskSerializer(tasks, many=True, context={'request': request}).data
+
+        photo_queries = [q for q in ctx.captured_queries if 'FROM "core_photo"' in q['sql']]
+        assignee_queries = [q for q in ctx.captured_queries if 'core_task_assignees' in q['sql']]
+        self.assertEqual(len(photo_queries), 1)
+        self.assertEqual(len(assignee_queries), 1)
+
+        for item in data[1:]:
+            # Assignees are authorized to see the full address
+            self.assertEqual(item['location'], 'Street 1, Istanbul, Turkey')
+            self.assertTrue(item['primary_photo_url'].endswith('first.jpg'))
+
+        # A single task costs as many queries as the whole page
+        with CaptureQueriesContext(connection) as single:
+            tasks = Task.objects.with_serializer_relations(assignee).filter(id=self.task.id)
+            TaskSerializer(tasks, many=True, context={'request': request}).data
+        self.assertEqual(len(single.captured_queries), len(ctx.captured_queries))
+
 
 class TaskCreateSerializerTests(TestCase):
     """Test cases for TaskCreateSerializer"""
@@ -1,3 +1,5 @@
+from unittest import skipUnless
+from django.db import connection
 from django.test import TestCase
 from django.utils import timezone
 from rest_framework.test import APIClient, APITestCase
@@ -234,6 +236,95 @@ class TaskViewSetTests(APITestCase):
         task_ids = [task['id'] for task in response.data.get('results', response.data.get('data', []))]
         self.assertNotIn(completed_task.id, task_ids)
 
+    def test_list_tasks_near(self):
+        """Test radius search orders tasks by distance"""
+        deadline = timezone.now() + datetime.timedelta(days=3)
+        far_task = Task.objects.create(
+            title='Üsküdar Task', description='Description', location='Üsküdar, İstanbul',
+            deadline=deadline, creator=self.user1
+        )
+        near_task = Task.objects.create(
+            title='Kadıköy Task', description='Description', location='Kadıköy, İstanbul',
+            deadline=deadline, creator=self.user1
+        )
+        
+        response = self.client.get('/api/tasks/', {'near': '40.99,29.03', 'radius_km': '5'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([task['id'] for task in results], [near_task.id, far_task.id])
+        self.assertLess(results[0]['distance_km'], results[1]['distance_km'])
+
+    def test_list_tasks_near_invalid(self):
+        """Test malformed radius search parameters are rejected"""
+        response = self.client.get('/api/tasks/', {'near': 'kadikoy'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.get('/api/tasks/', {'near': '40.99,29.03', 'radius_km': '5000'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_tasks_pagination_modes(self):
+        """Test cursor paging and count-free offset paging on user tasks"""
+        self.client.force_authenticate(user=self.user1)
+        for i in range(3):
+            Task.objects.create(
+                title=f'Paged Task {i}',
+                description='Description',
+                location='Location',
+                deadline=timezone.now() + datetime.timedelta(days=i + 1),
+                creator=self.user1
+            )
+        url = f'/api/users/{self.user1.id}/tasks/'
+        
+        response = self.client.get(url, {'cursor': '', 'limit': 3, 'count': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_page = response.data['data']
+        self.assertEqual(first_page['pagination']['total_records'], 4)
+        self.assertTrue(first_page['pagination']['has_next'])
+        
+        response = self.client.get(url, {'cursor': first_page['pagination']['next_cursor'], 'limit': 3})
+        second_page = response.data['data']
+        self.assertEqual(len(second_page['tasks']), 1)
+        self.assertIsNone(second_page['pagination']['next_cursor'])
+        
+        # Pages follow (deadline, id) order without overlap
+        ids = [task['id'] for task in first_page['tasks'] + second_page['tasks']]
+        expected = list(Task.objects.filter(creator=self.user1).order_by('deadline', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        
+        # Offset paging can skip the total count
+        response = self.client.get(url, {'page': 1, 'limit': 3, 'count': 'false'})
+        pagination = response.data['data']['pagination']
+        self.assertIsNone(pagination['total_records'])
+        self.assertEqual(pagination['next_page'], 2)
+
+    def test_list_hides_overdue_tasks_without_writing(self):
+        """Test overdue POSTED tasks are hidden from the list but not expired by it"""
+        overdue_task = Task.objects.create(
+            title='Overdue Task',
+            description='Description',
+            category=TaskCategory.OTHER,
+            location='Location',
+            deadline=timezone.now() - datetime.timedelta(days=1),
+            creator=self.user1
+        )
+
+        response = self.client.get('/api/tasks/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        task_ids = [task['id'] for task in response.data.get('results', response.data.get('data', []))]
+        self.assertNotIn(overdue_task.id, task_ids)
+        self.assertIn(self.task1.id, task_ids)
+
+        # Expiry is left to the sweeper
+        overdue_task.refresh_from_db()
+        self.assertEqual(overdue_task.status, TaskStatus.POSTED)
+
+        # Still visible when expired tasks are explicitly requested
+        response = self.client.get('/api/tasks/', {'show_expired': 'true'})
+        task_ids = [task['id'] for task in response.data.get('results', response.data.get('data', []))]
+        self.assertIn(overdue_task.id, task_ids)
+
     def test_filter_tasks_by_category(self):
         """Test filtering tasks by category"""
         response = self.client.get('/api/tasks/', {'category': TaskCategory.GROCERY_SHOPPING})
@@ -262,6 +353,15 @@ class TaskViewSetTests(APITestCase):
         task_ids = [task['id'] for task in response.data.get('results', response.data.get('data', []))]
         self.assertIn(self.task1.id, task_ids)
 
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search requires PostgreSQL')
+    def test_search_tasks_prefix_mode(self):
+        """Test type-ahead search through the search vector"""
+        response = self.client.get('/api/tasks/', {'search': 'Descrip', 'search_mode': 'prefix'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        task_ids = [task['id'] for task in response.data.get('results', response.data.get('data', []))]
+        self.assertCountEqual(task_ids, [self.task1.id, self.task2.id])
+
     def test_categories_endpoint(self):
         """Test the categories endpoint"""
         response = self.client.get('/api/tasks/categories/')
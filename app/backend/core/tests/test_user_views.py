@@ -176,6 +176,25 @@ class UserViewSetSearchTests(APITestCase):
         # Should return all 4 users
         self.assertEqual(len(results), 4)
 
+    def test_search_results_are_capped(self):
+        """Test that a search returns at most USER_SEARCH_MAX_RESULTS users"""
+        with self.settings(USER_SEARCH_MAX_RESULTS=2):
+            response = self.client.get('/api/users/', {'search': 'j'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_search_fuzzy_mode(self):
+        """Test searching users with search_mode=fuzzy"""
+        response = self.client.get('/api/users/', {'search': 'johnson', 'search_mode': 'fuzzy'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        
+        # Best match first, whether ranked by pg_trgm or matched as a substring
+        self.assertEqual(results[0]['id'], self.user3.id)
+
     def test_search_requires_authentication(self):
         """Test that search endpoint requires authentication"""
         # Logout the authenticated user
@@ -185,3 +204,89 @@ class UserViewSetSearchTests(APITestCase):
         
         # Should return 401 Unauthorized
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserViewSetProfileStatsTests(APITestCase):
+    """Test cases for annotated profile stats on the user list"""
+
+    def setUp(self):
+        """Set up test data"""
+        from core.models import Badge, BadgeType, UserBadge, UserFollows
+
+        self.client = APIClient()
+        self.viewer = RegisteredUser.objects.create_user(
+            email='viewer@example.com',
+            name='Viewer',
+            surname='User',
+            username='viewer',
+            phone_number='1234567890',
+            password='password123'
+        )
+        self.badge = Badge.objects.create(
+            badge_type=BadgeType.THE_ICEBREAKER,
+            name='The Icebreaker',
+            description='Posted your first comment'
+        )
+        self.users = []
+        for i in range(3):
+            user = RegisteredUser.objects.create_user(
+                email=f'member{i}@example.com',
+                name='Member',
+                surname=str(i),
+                username=f'member{i}',
+                phone_number='1234567890',
+                password='password123'
+            )
+            UserBadge.objects.create(user=user, badge=self.badge)
+            self.users.append(user)
+        UserFollows.objects.create(follower=self.viewer, following=self.users[0])
+        UserFollows.objects.create(follower=self.users[1], following=self.users[0])
+
+        self.client.force_authenticate(user=self.viewer)
+
+    def _get_users(self):
+        """Fetch the user list and return its results keyed by id"""
+        response = self.client.get('/api/users/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {user['id']: user for user in response.data['results']}
+
+    def test_list_uses_annotated_stats(self):
+        """Test counts, follow flag and badges on the user list"""
+        results = self._get_users()
+
+        followed = results[self.users[0].id]
+        self.assertEqual(followed['followers_count'], 2)
+        self.assertEqual(followed['following_count'], 0)
+        self.assertTrue(followed['is_following'])
+        self.assertEqual(followed['badges_count'], 1)
+        self.assertEqual(followed['badges'][0]['badge_type'], 'THE_ICEBREAKER')
+
+        follower = results[self.users[1].id]
+        self.assertEqual(follower['following_count'], 1)
+        self.assertFalse(follower['is_following'])
+
+    def test_list_query_count_does_not_grow_with_users(self):
+        """Test the user list costs a fixed number of queries"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as before:
+            self._get_users()
+
+        from core.models import UserBadge
+        for i in range(5):
+            user = RegisteredUser.objects.create_user(
+                email=f'extra{i}@example.com',
+                name='Extra',
+                surname=str(i),
+                username=f'extra{i}',
+                phone_number='1234567890',
+                password='password123'
+            )
+            UserBadge.objects.create(user=user, badge=self.badge)
+
+        with CaptureQueriesContext(connection) as after:
+            results = self._get_users()
+
+        self.assertEqual(len(results), 9)
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
@@ -1,7 +1,9 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 import datetime
-from core.models import RegisteredUser, Task, Volunteer, VolunteerStatus
+from core.models import RegisteredUser, Task, TaskStatus, Volunteer, VolunteerStatus
 
 
 class VolunteerModelTests(TestCase):
@@ -238,6 +240,74 @@ class VolunteerModelTests(TestCase):
         # Others may remain PENDING if task needs multiple volunteers
         # or be REJECTED if task only needs one volunteer
 
+    def _create_pending_volunteers(self, task, count):
+        """Create `count` pending volunteers for a task"""
+        volunteers = []
+        for i in range(count):
+            user = RegisteredUser.objects.create_user(
+                email=f'bulk{task.id}_{i}@example.com',
+                name='Bulk',
+                surname='Volunteer',
+                username=f'bulk{task.id}_{i}',
+                phone_number=f'+9055500{i:05d}',
+                password='password123'
+            )
+            volunteers.append(Volunteer.objects.create(user=user, task=task))
+        return volunteers
+
+    @override_settings(BADGE_EVALUATION_MODE='deferred')
+    def test_accept_multiple_volunteers_constant_queries(self):
+        """Test bulk acceptance needs the same number of queries for any batch size"""
+        query_counts = []
+        for count in (1, 4):
+            task = Task.objects.create(
+                title=f'Bulk Task {count}',
+                description='Task Description',
+                category='OTHER',
+                location='Test Location',
+                deadline=timezone.now() + datetime.timedelta(days=3),
+                creator=self.creator,
+                volunteer_number=count
+            )
+            volunteers = self._create_pending_volunteers(task, count)
+            
+            with CaptureQueriesContext(connection) as queries:
+                success, _ = Volunteer.accept_multiple_volunteers(task, [v.id for v in volunteers])
+            self.assertTrue(success)
+            query_counts.append(len(queries))
+            
+            task.refresh_from_db()
+            self.assertEqual(task.status, TaskStatus.ASSIGNED)
+            self.assertEqual(task.assignees.count(), count)
+            self.assertEqual(task.assignee_id, volunteers[0].user_id)
+        
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_update_task_volunteers_swaps_assignees(self):
+        """Test replacing the accepted volunteers unassigns the others"""
+        self.task.volunteer_number = 2
+        self.task.save()
+        second = Volunteer.objects.create(user=self.volunteer_user2, task=self.task)
+        self.assertTrue(self.volunteer.accept_volunteer())
+        
+        success, message = Volunteer.update_task_volunteers(self.task, [second.id])
+        self.assertTrue(success)
+        self.assertIn('Unassigned: 1', message)
+        
+        self.volunteer.refresh_from_db()
+        second.refresh_from_db()
+        self.task.refresh_from_db()
+        self.assertEqual(self.volunteer.status, VolunteerStatus.PENDING)
+        self.assertEqual(second.status, VolunteerStatus.ACCEPTED)
+        self.assertEqual(list(self.task.assignees.all()), [self.volunteer_user2])
+        self.assertEqual(self.task.assignee, self.volunteer_user2)
+        self.assertEqual(self.task.status, TaskStatus.ASSIGNED)
+        
+        # Accepting beyond capacity is refused under the task lock
+        third = self._create_pending_volunteers(self.task, 1)[0]
+        self.volunteer.accept_volunteer()
+        self.assertFalse(third.accept_volunteer())
+
     def test_volunteer_cannot_apply_twice(self):
         """Test that a user cannot volunteer twice for the same task"""
         # Try to volunteer again with the same user
@@ -0,0 +1,161 @@
+"""
+Streaming photo uploads.
+Photo endpoints parse multipart bodies with PhotoMultiPartParser, which
+streams each file through PhotoUploadHandler: the size cap is enforced and
+the image type sniffed while the body is read, and the content is hashed in
+the same pass, instead of validating a fully buffered upload afterwards.
+"""
+import hashlib
+import os
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser
+
+
+def get_max_photo_upload_bytes():
+    """Largest accepted photo, from settings.MAX_PHOTO_UPLOAD_MB"""
+    try:
+        max_mb = int(getattr(settings, 'MAX_PHOTO_UPLOAD_MB', 10))
+    except (TypeError, ValueError):
+        max_mb = 10
+    return max_mb * 1024 * 1024
+
+
+class PhotoUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload handler accepting only images under MAX_PHOTO_UPLOAD_MB
+
+    Files are written to a temporary file chunk by chunk. The upload stops
+    as soon as a file exceeds the cap (or, when Content-Length already
+    announces a larger body, before reading it) or its first bytes are not
+    a supported image, and the rest of the body is left unread. Accepted
+    files get the sniffed content type, a matching extension and their
+    SHA-256 digest as `sha256`, which ContentAddressedStorage reuses.
+    """
+
+    # Leading bytes -> (content type, extension)
+    SIGNATURES = [
+        (b'\xff\xd8\xff', ('image/jpeg', 'jpg')),
+        (b'\x89PNG\r\n\x1a\n', ('image/png', 'png')),
+        (b'GIF87a', ('image/gif', 'gif')),
+        (b'GIF89a', ('image/gif', 'gif')),
+    ]
+    # Bytes needed to recognise every supported type (RIFF....WEBP)
+    SNIFF_LENGTH = 12
+
+    # Allowance for the boundaries and form fields around the file
+    MULTIPART_OVERHEAD = 64 * 1024
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = get_max_photo_upload_bytes()
+        self.body_too_large = False
+        # (status code, message) once the upload was rejected
+        self.error = None
+
+    @classmethod
+    def sniff(cls, header):
+        """
+        Identify an image from its first bytes
+
+        Returns:
+            (content type, extension), or None if it is not a supported image
+        """
+        for signature, image_type in cls.SIGNATURES:
+            if header.startswith(signature):
+                return image_type
+        if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+            return 'image/webp', 'webp'
+        return None
+
+    def reject(self, status_code, message):
+        """
+        Record why the upload was refused and stop parsing it
+
+        connection_reset keeps Django from reading (and discarding) the
+        rest of the body; the server closes the connection after answering.
+        """
+        self.error = (status_code, message)
+        raise StopUpload(connection_reset=True)
+
+    def reject_too_large(self):
+        """Refuse an upload over the size cap"""
+        max_mb = self.max_bytes // (1024 * 1024)
+        self.reject(
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            f'File too large. Maximum allowed size is {max_mb}MB.'
+        )
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        """Note a body that is too large before any of it is read"""
+        self.body_too_large = bool(content_length) and content_length > self.max_bytes + self.MULTIPART_OVERHEAD
+
+    def new_file(self, *args, **kwargs):
+        """Start a file, unless the body is known to be too large"""
+        if self.body_too_large:
+            self.reject_too_large()
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header = b''
+        self.image_type = None
+        self.digest = hashlib.sha256()
+
+    def check_header(self):
+        """Refuse the file unless its first bytes are a supported image"""
+        self.image_type = self.sniff(self.header)
+        if self.image_type is None:
+            self.reject(
+                status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                'Unsupported media type. Only JPEG, PNG, GIF and WebP images are allowed.'
+            )
+
+    def receive_data_chunk(self, raw_data, start):
+        """Check, hash and store one chunk"""
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self.reject_too_large()
+
+        if self.image_type is None and len(self.header) < self.SNIFF_LENGTH:
+            self.header += raw_data[:self.SNIFF_LENGTH - len(self.header)]
+            if len(self.header) == self.SNIFF_LENGTH:
+                self.check_header()
+
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        """Return the stored file, described by its content rather than the client"""
+        if self.image_type is None:
+            # Shorter than SNIFF_LENGTH
+            self.check_header()
+
+        uploaded_file = super().file_complete(file_size)
+        content_type, extension = self.image_type
+        uploaded_file.content_type = content_type
+        uploaded_file.name = f'{os.path.splitext(uploaded_file.name)[0]}.{extension}'
+        uploaded_file.sha256 = self.digest.hexdigest()
+        return uploaded_file
+
+    @staticmethod
+    def get_error(request):
+        """
+        Why a request's photo upload was rejected
+
+        Returns:
+            (status code, message), or None if nothing was rejected
+        """
+        request.FILES  # Parse the body first
+        for handler in request.upload_handlers:
+            if isinstance(handler, PhotoUploadHandler) and handler.error:
+                return handler.error
+        return None
+
+
+class PhotoMultiPartParser(MultiPartParser):
+    """Multipart parser streaming files through PhotoUploadHandler"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        request._request.upload_handlers = [PhotoUploadHandler(request._request)]
+        return super().parse(stream, media_type, parser_context)
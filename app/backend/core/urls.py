@@ -4,7 +4,7 @@ from .api.views import (
     user_views, auth_views, task_views, volunteer_views,
     review_views, bookmark_views, notification_views,
     photo_views, admin_views, comment_views, report_views,
-    badge_views
+    badge_views, feed_views
 )
 
 # Create a router and register our viewsets
@@ -34,6 +34,9 @@ urlpatterns = [
     path('auth/reset-password/', auth_views.ResetPasswordView.as_view(), name='reset-password'),
     path('auth/check-availability/', auth_views.CheckAvailabilityView.as_view(), name='check-availability'),
     
+    # Feed endpoint
+    path('feed/', feed_views.FeedView.as_view(), name='feed'),
+    
     # Task-specific endpoints
     path('tasks/<int:task_id>/volunteers/', volunteer_views.TaskVolunteersView.as_view(), name='task-volunteers'),
     path('tasks/<int:task_id>/reviews/', review_views.TaskReviewsView.as_view(), name='task-reviews'),
@@ -118,7 +118,7 @@ def validate_phone_number(phone_number):
     return bool(re.match(pattern, phone_number))
 
 
-def paginate_results(queryset, page=1, items_per_page=20):
+def paginate_results(queryset, page=1, items_per_page=20, include_count=True):
     """
     Paginate queryset results
     
@@ -126,6 +126,9 @@ def paginate_results(queryset, page=1, items_per_page=20):
         queryset: The queryset to paginate
         page (int): Page number (1-based)
         items_per_page (int): Number of items per page
+        include_count (bool): Run a COUNT for total_records/total_pages;
+            when False they are None and next_page comes from fetching
+            one extra row
         
     Returns:
         dict: Dictionary with paginated data and pagination metadata
@@ -137,21 +140,29 @@ def paginate_results(queryset, page=1, items_per_page=20):
     start = (page - 1) * items_per_page
     end = start + items_per_page
     
-    # Get total count
-    total_count = queryset.count()
-    
-    # Get paginated data
-    data = queryset[start:end]
-    
-    # Calculate total pages
-    total_pages = (total_count + items_per_page - 1) // items_per_page
+    if include_count:
+        # Get total count
+        total_count = queryset.count()
+        
+        # Get paginated data
+        data = queryset[start:end]
+        
+        # Calculate total pages
+        total_pages = (total_count + items_per_page - 1) // items_per_page
+        has_next = page < total_pages
+    else:
+        data = list(queryset[start:end + 1])
+        has_next = len(data) > items_per_page
+        data = data[:items_per_page]
+        total_count = None
+        total_pages = None
     
     # Prepare pagination metadata
     pagination = {
         'total_records': total_count,
         'current_page': page,
         'total_pages': total_pages,
-        'next_page': page + 1 if page < total_pages else None,
+        'next_page': page + 1 if has_next else None,
         'prev_page': page - 1 if page > 1 else None
     }
     
@@ -161,6 +172,159 @@ def paginate_results(queryset, page=1, items_per_page=20):
     }
 
 
+def encode_cursor(values):
+    """
+    Encode keyset values into an opaque cursor string
+    
+    Args:
+        values (list): Ordering key values of the last row on a page
+        
+    Returns:
+        str: URL-safe cursor
+    """
+    import base64
+    import json
+    
+    # Keep full microsecond precision; DjangoJSONEncoder would round
+    # datetimes to milliseconds and rows could be skipped between pages
+    payload = json.dumps(
+        [value.isoformat() if hasattr(value, 'isoformat') else value for value in values],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Args:
+        cursor (str): Cursor string
+        
+    Returns:
+        list: Ordering key values, or None if the cursor is malformed
+    """
+    import base64
+    import binascii
+    import json
+    
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def paginate_by_cursor(queryset, ordering, cursor=None, items_per_page=20, include_count=False):
+    """
+    Paginate queryset results by keyset instead of OFFSET
+    
+    Each page continues after the last row of the previous one, so deep
+    pages cost the same as the first and the total COUNT is optional.
+    
+    Args:
+        queryset: The queryset to paginate
+        ordering (tuple): Two fields, a sort key and a unique tie-breaker,
+            both in the same direction, e.g. ('-timestamp', '-id')
+        cursor (str, optional): next_cursor from the previous page
+        items_per_page (int): Number of items per page
+        include_count (bool): Also return the total number of records
+        
+    Returns:
+        dict: Dictionary with paginated data and pagination metadata
+        
+    Raises:
+        ValidationError: If the cursor is malformed
+    """
+    from django.core.exceptions import ValidationError as DjangoValidationError
+    from django.db.models import Q
+    from rest_framework.exceptions import ValidationError
+    
+    key_field, tiebreak_field = [field.lstrip('-') for field in ordering]
+    descending = ordering[0].startswith('-')
+    lookup = 'lt' if descending else 'gt'
+    
+    page_queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor)
+        if values is None or len(values) != 2:
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        
+        opts = queryset.model._meta
+        try:
+            key_value = opts.get_field(key_field).to_python(values[0])
+            tiebreak_value = opts.get_field(tiebreak_field).to_python(values[1])
+        except DjangoValidationError:
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        
+        page_queryset = page_queryset.filter(
+            Q(**{f'{key_field}__{lookup}': key_value}) |
+            Q(**{key_field: key_value, f'{tiebreak_field}__{lookup}': tiebreak_value})
+        )
+    
+    # Fetch one extra row to learn whether there is a next page
+    data = list(page_queryset[:items_per_page + 1])
+    has_next = len(data) > items_per_page
+    data = data[:items_per_page]
+    
+    next_cursor = None
+    if has_next:
+        last = data[-1]
+        next_cursor = encode_cursor([getattr(last, key_field), getattr(last, tiebreak_field)])
+    
+    pagination = {
+        'next_cursor': next_cursor,
+        'has_next': has_next,
+        'limit': items_per_page
+    }
+    if include_count:
+        pagination['total_records'] = queryset.count()
+    
+    return {
+        'data': data,
+        'pagination': pagination
+    }
+
+
+def paginate_request(request, queryset, cursor_ordering):
+    """
+    Paginate a list endpoint from its query parameters
+    
+    Offset paging (page, limit) stays the default. Passing `cursor`
+    (empty for the first page) switches to keyset paging ordered by
+    `cursor_ordering`. `count=false` skips the total COUNT in offset mode;
+    `count=true` adds it in cursor mode.
+    
+    Args:
+        request: DRF request
+        queryset: The queryset to paginate
+        cursor_ordering (tuple): Ordering used in cursor mode, see paginate_by_cursor
+        
+    Returns:
+        dict: Dictionary with paginated data and pagination metadata
+    """
+    params = request.query_params
+    limit = int(params.get('limit', 20))
+    count_param = params.get('count')
+    
+    if 'cursor' in params:
+        return paginate_by_cursor(
+            queryset,
+            cursor_ordering,
+            cursor=params.get('cursor'),
+            items_per_page=limit,
+            include_count=count_param == 'true'
+        )
+    
+    return paginate_results(
+        queryset,
+        page=int(params.get('page', 1)),
+        items_per_page=limit,
+        include_count=count_param != 'false'
+    )
+
+
 def generate_token(length=32):
     """
     Generate a random token for password reset
@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'neighborhood_assistance_board.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from core.api.views.notification_stream_views import NotificationStreamApplication  # noqa: E402
+
+# The notification stream is served directly; everything else goes to Django
+application = NotificationStreamApplication(django_application)
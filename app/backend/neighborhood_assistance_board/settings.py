@@ -13,6 +13,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'corsheaders',
@@ -107,9 +108,88 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored once per distinct content, named after their SHA-256 digest
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+# Browser cache lifetime of those content-addressed files, which never change
+MEDIA_BLOB_MAX_AGE = int(os.environ.get('MEDIA_BLOB_MAX_AGE', str(60 * 60 * 24 * 365)))
+# Browser cache lifetime of other media; 0 revalidates every load (304 when unchanged)
+MEDIA_MAX_AGE = int(os.environ.get('MEDIA_MAX_AGE', '0'))
+# Let the reverse proxy send media files: '' (Python sends them),
+# 'x-accel-redirect' (nginx, Caddy) or 'x-sendfile' (Apache, lighttpd)
+MEDIA_SENDFILE_BACKEND = os.environ.get('MEDIA_SENDFILE_BACKEND', '')
+# Internal URL prefix the proxy maps to MEDIA_ROOT for X-Accel-Redirect
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+
 # Photo upload constraints (in megabytes)
 MAX_PHOTO_UPLOAD_MB = int(os.environ.get('MAX_PHOTO_UPLOAD_MB', '10'))
 
+# Image variants are generated inline with the upload ('sync') or queued for
+# `manage.py process_media_queue --loop` ('deferred')
+MEDIA_PROCESSING_MODE = os.environ.get('MEDIA_PROCESSING_MODE', 'sync')
+MEDIA_QUEUE_POLL_INTERVAL = int(os.environ.get('MEDIA_QUEUE_POLL_INTERVAL', '2'))
+
+# Seconds between sweeps of `manage.py expire_tasks --loop`
+TASK_EXPIRY_SWEEP_INTERVAL = int(os.environ.get('TASK_EXPIRY_SWEEP_INTERVAL', '60'))
+
+# Badge checks run inline with the request ('sync') or are queued for
+# `manage.py process_badge_queue --loop` ('deferred')
+BADGE_EVALUATION_MODE = os.environ.get('BADGE_EVALUATION_MODE', 'sync')
+BADGE_QUEUE_POLL_INTERVAL = int(os.environ.get('BADGE_QUEUE_POLL_INTERVAL', '5'))
+
+# Upper bound on the number of users a single user search can return
+USER_SEARCH_MAX_RESULTS = int(os.environ.get('USER_SEARCH_MAX_RESULTS', '50'))
+
+# Offline gazetteer (name,latitude,longitude CSV) used to geocode locations
+GEOCODER_GAZETTEER_PATH = os.environ.get(
+    'GEOCODER_GAZETTEER_PATH', os.path.join(BASE_DIR, 'core', 'data', 'gazetteer.csv')
+)
+
+# Radius defaults for `/api/tasks/?near=lat,lon&radius_km=`
+TASK_NEARBY_DEFAULT_RADIUS_KM = float(os.environ.get('TASK_NEARBY_DEFAULT_RADIUS_KM', '5'))
+TASK_NEARBY_MAX_RADIUS_KM = float(os.environ.get('TASK_NEARBY_MAX_RADIUS_KM', '50'))
+
+# Users living within this many km of a new task are notified of it (0 disables)
+TASK_CREATED_NOTIFICATION_RADIUS_KM = float(os.environ.get('TASK_CREATED_NOTIFICATION_RADIUS_KM', '0'))
+
+# New-task notifications are fanned out inline with the request ('sync') or
+# queued for `manage.py process_notification_queue --loop` ('deferred')
+NOTIFICATION_FANOUT_MODE = os.environ.get('NOTIFICATION_FANOUT_MODE', 'sync')
+NOTIFICATION_QUEUE_POLL_INTERVAL = int(os.environ.get('NOTIFICATION_QUEUE_POLL_INTERVAL', '2'))
+
+# Pub/sub backend pushing new notifications to open streams. The in-memory
+# broker only reaches streams served by the publishing process; use
+# core.services.notification_broker.PostgresNotificationBroker across processes
+NOTIFICATION_BROKER_BACKEND = os.environ.get(
+    'NOTIFICATION_BROKER_BACKEND', 'core.services.notification_broker.InMemoryNotificationBroker'
+)
+
+# Server-Sent Events notification stream, served by the ASGI application:
+# seconds between keep-alive comments, and most missed notifications
+# replayed to a client reconnecting with Last-Event-ID
+NOTIFICATION_STREAM_PATH = '/api/notifications/stream/'
+NOTIFICATION_STREAM_HEARTBEAT = int(os.environ.get('NOTIFICATION_STREAM_HEARTBEAT', '15'))
+NOTIFICATION_STREAM_REPLAY_LIMIT = int(os.environ.get('NOTIFICATION_STREAM_REPLAY_LIMIT', '100'))
+
+# `manage.py archive_notifications`: read notifications older than this many
+# days move to the archive table, in batches; seconds between runs with --loop
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '30'))
+NOTIFICATION_ARCHIVE_BATCH_SIZE = int(os.environ.get('NOTIFICATION_ARCHIVE_BATCH_SIZE', '1000'))
+NOTIFICATION_ARCHIVE_INTERVAL = int(os.environ.get('NOTIFICATION_ARCHIVE_INTERVAL', '3600'))
+
+# Per-process memory cache by default; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared cache (e.g. memcached) so invalidations reach every worker
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Ranked feed (/api/feed/): seconds a user's ranking stays cached, and how
+# many open tasks are considered when ranking
+FEED_CACHE_TTL = int(os.environ.get('FEED_CACHE_TTL', '120'))
+FEED_CANDIDATE_LIMIT = int(os.environ.get('FEED_CANDIDATE_LIMIT', '500'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 